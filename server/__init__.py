@@ -1,2 +1,8 @@
+from dotenv import load_dotenv
+
+# Load environment variables from .env before any module reads its settings.
+# Every server.* import runs this first, whatever the entry point.
+load_dotenv()
+
 from .app import app
 from .database import setup_database
\ No newline at end of file
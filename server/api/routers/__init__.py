@@ -4,3 +4,4 @@ from .user.user import router as user_router
 from .order.order import router as order_router
 from .items import router as items_router
 from .supermarket.supermarket import router as supermarket_router
+from .events.events import router as events_router
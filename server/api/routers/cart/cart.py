@@ -1,11 +1,12 @@
 from fastapi import APIRouter, HTTPException, Depends
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import func
 from sqlalchemy.future import select
-from server.models import Cart, Supermarket, Item, StockLevel, User, CartItems, WalletTransaction, OrderSlot
+from server.models import Cart, Supermarket, Item, StockLevel, User, CartItems, OrderSlot
 from server.enums import CartStatus
 from server.dependencies import get_db
 from server.utils import handle_schedule_order, handle_order_now
+from server.utils.wallet import get_user_balance
+from server.models.money import ZERO
 from server.schemas import CreateCartRequest, CartResponse, AddItemRequest, RemoveItemRequest, ViewCartResponse, CartItemResponse, SubmitDeliveryDetailsResponse, SubmitDeliveryDetailsRequest
 from typing import List
 from loguru import logger  # Add this at the top of your file
@@ -365,7 +366,7 @@ async def view_cart(cart_id: int, db: AsyncSession = Depends(get_db)) -> ViewCar
         cart_items = result.all()
 
         items: List[CartItemResponse] = []
-        total_price = 0.0
+        total_price = ZERO
 
         for cart_item, item in cart_items:
             items.append(CartItemResponse(
@@ -377,8 +378,7 @@ async def view_cart(cart_id: int, db: AsyncSession = Depends(get_db)) -> ViewCar
             ))
             total_price += cart_item.quantity * item.price
 
-        stmt = select(func.sum(WalletTransaction.amount)).where(WalletTransaction.user_id == cart.user_id)
-        wallet_balance = (await db.execute(stmt)).scalar() or 0.0
+        wallet_balance = await get_user_balance(db, cart.user_id)
 
         logger.info(f"Cart viewed successfully: cart_id={cart_id}, total_price={total_price}, wallet_balance={wallet_balance}")
         return ViewCartResponse(
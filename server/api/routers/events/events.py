@@ -0,0 +1,55 @@
+import os
+import json
+import asyncio
+from fastapi import APIRouter, HTTPException, Request
+from fastapi.responses import StreamingResponse
+from sqlalchemy import select
+from server.database import SessionLocal
+from server.models import SharedCart
+from server.utils.events import event_broker, shared_cart_channel, SharedCartEventType
+from loguru import logger
+
+# Seconds between keep-alive comments on an idle event stream
+SSE_HEARTBEAT_INTERVAL = float(os.getenv("SSE_HEARTBEAT_INTERVAL", "15"))
+
+router = APIRouter()
+
+
+def format_event(event_type: str, payload: dict) -> str:
+    return f"event: {event_type}\ndata: {json.dumps(payload, default=str)}\n\n"
+
+
+@router.get("/shared-carts/{shared_cart_id}/events")
+async def stream_shared_cart_events(shared_cart_id: int, request: Request):
+    """
+    Server-sent event stream of shared cart deltas: contributor_joined, items_added,
+    order_updated, fee_split_changed and order_placed. The stream ends after order_placed.
+    """
+    logger.info(f"Opening event stream for shared_cart_id={shared_cart_id}")
+    # Short-lived session: the stream itself must not hold a database connection
+    async with SessionLocal() as session:
+        result = await session.execute(select(SharedCart.status).where(SharedCart.id == shared_cart_id))
+        status = result.scalar()
+    if status is None:
+        raise HTTPException(status_code=404, detail="Shared cart not found.")
+
+    async def stream():
+        async with event_broker.subscribe(shared_cart_channel(shared_cart_id)) as queue:
+            yield "retry: 5000\n\n"
+            yield format_event("subscribed", {"shared_cart_id": shared_cart_id, "status": status.value})
+            while not await request.is_disconnected():
+                try:
+                    message = await asyncio.wait_for(queue.get(), timeout=SSE_HEARTBEAT_INTERVAL)
+                except asyncio.TimeoutError:
+                    yield ": keep-alive\n\n"
+                    continue
+                yield format_event(message["type"], message)
+                if message["type"] == SharedCartEventType.ORDER_PLACED:
+                    break
+        logger.info(f"Closed event stream for shared_cart_id={shared_cart_id}")
+
+    return StreamingResponse(
+        stream(),
+        media_type="text/event-stream",
+        headers={"Cache-Control": "no-cache", "X-Accel-Buffering": "no"},
+    )
@@ -1,7 +1,9 @@
 from fastapi import APIRouter
 from .categories import router as categories_router
+from .search import router as search_router
 from .items import router as items_router
 
 router = APIRouter()
 router.include_router(categories_router)
+router.include_router(search_router)
 router.include_router(items_router)
@@ -1,9 +1,11 @@
-from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi import APIRouter, Depends, Query, HTTPException, Request, Response
 from sqlalchemy.future import select
 from sqlalchemy.ext.asyncio import AsyncSession
 from server.schemas import CategoryResponse
 from server.models import Category, SupermarketCategory
-from server.dependencies import get_db
+from server.dependencies import get_read_db
+from server.enums import CatalogScope
+from server.utils.http_cache import conditional_get
 from typing import List
 from loguru import logger
 
@@ -11,14 +13,20 @@ router = APIRouter()
 
 @router.get("/items/categories", response_model=List[CategoryResponse])
 async def get_categories_by_supermarket(
+    request: Request,
+    response: Response,
     supermarket_id: int = Query(..., description="ID of the supermarket to filter categories"),
-    db: AsyncSession = Depends(get_db),
+    db: AsyncSession = Depends(get_read_db),
 ) -> List[CategoryResponse]:
     """
     Fetch categories available in a specific supermarket (mock response).
     """
     logger.info(f"Fetching categories for supermarket_id={supermarket_id}")
     try:
+        not_modified = await conditional_get(request, response, db, [CatalogScope.CATALOG])
+        if not_modified:
+            return not_modified
+
         # Query to join categories and supermarket_categories
         query = (
             select(Category.id, Category.name)
@@ -38,6 +46,8 @@ async def get_categories_by_supermarket(
         logger.info(f"Categories fetched successfully for supermarket_id={supermarket_id}, count={len(categories)}")
         # Return categories as a list of CategoryResponse
         return [CategoryResponse(id=cat.id, name=cat.name) for cat in categories]
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching categories for supermarket_id={supermarket_id}: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
\ No newline at end of file
@@ -1,49 +1,138 @@
-from fastapi import APIRouter, Depends, Query, HTTPException
+from fastapi import APIRouter, Depends, Query, HTTPException, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
-from typing import List
-from server.models import Item, Category
+from sqlalchemy import select, and_, tuple_, func
+from typing import List, Optional
+from server.models import Item, Category, StockLevel
 from server.schemas import ItemListResponse, ItemResponse
-from server.dependencies import get_db
+from server.dependencies import get_read_db
+from server.enums import CatalogScope
+from server.utils.http_cache import conditional_get
+from server.utils.stock import stock_snapshot
+from server.utils.responses import list_response_class
+from server.utils.pagination import encode_cursor, decode_cursor
 from loguru import logger  # Add this at the top of your file
 
 
 router = APIRouter()
 
-@router.get("/items", response_model=ItemListResponse)
+AVAILABLE_QUANTITY = func.coalesce(StockLevel.quantity, 0)
+
+# Item fields a client may request through the `fields` projection parameter
+ITEM_FIELDS = {
+    "name": Item.name,
+    "photo_url": Item.photo_url,
+    "price": Item.price,
+    "description": Item.description,
+    "supermarket_id": Item.supermarket_id,
+    "available_quantity": AVAILABLE_QUANTITY.label("available_quantity"),
+}
+SORT_COLUMNS = {"name": Item.name, "price": Item.price}
+
+
+def parse_fields(fields: Optional[str]) -> List[str]:
+    """
+    Validate the comma-separated field projection. Defaults to every field.
+    """
+    if not fields:
+        return list(ITEM_FIELDS)
+    requested = [field.strip() for field in fields.split(",") if field.strip() and field.strip() != "id"]
+    unknown = [field for field in requested if field not in ITEM_FIELDS]
+    if unknown:
+        raise HTTPException(status_code=400, detail=f"Unknown item fields: {', '.join(unknown)}.")
+    return requested
+
+
+@router.get(
+    "/items",
+    response_model=ItemListResponse,
+    response_model_exclude_unset=True,
+    response_class=list_response_class(),
+)
 async def get_items_by_category_and_supermarket(
+    request: Request,
+    response: Response,
     category_id: int = Query(..., description="ID of the category to filter items"),
     supermarket_id: int = Query(..., description="ID of the supermarket to filter items"),
-    db: AsyncSession = Depends(get_db),
+    sort_by: str = Query("name", pattern="^(name|price)$", description="Sort items by name or price"),
+    order: str = Query("asc", pattern="^(asc|desc)$", description="Sort direction"),
+    limit: int = Query(50, ge=1, le=200, description="Maximum number of items per page"),
+    cursor: Optional[str] = Query(None, description="Cursor returned as next_cursor by the previous page"),
+    fields: Optional[str] = Query(None, description="Comma-separated item fields to return, e.g. name,price"),
+    in_stock: Optional[bool] = Query(None, description="Only return items that are (true) or are not (false) in stock"),
+    db: AsyncSession = Depends(get_read_db),
 ) -> ItemListResponse:
     """
-    Fetch items for a given category and supermarket.
+    Fetch a page of items for a given category and supermarket.
     """
     logger.info(f"Fetching items for category_id={category_id} and supermarket_id={supermarket_id}")
     try:
-        # Query to fetch items based on category and supermarket
+        # Listings carry stock quantities, so they are only revalidated while the stock snapshot
+        # keeps a fresh digest of this supermarket's stock
+        stock_digest = stock_snapshot.digest(supermarket_id)
+        if stock_digest is not None:
+            not_modified = await conditional_get(
+                request, response, db, [CatalogScope.CATALOG], extra=[stock_digest], max_age=5
+            )
+            if not_modified:
+                return not_modified
+        else:
+            response.headers["Cache-Control"] = "no-cache"
+
+        projection = parse_fields(fields)
+        sort_column = SORT_COLUMNS[sort_by]
+        descending = order == "desc"
+
+        # Items are outer joined onto their category so the category name arrives in the same
+        # statement, and an unknown category can be told apart from an empty page.
+        # Stock levels are joined onto the items inside that outer join, so the stock filter
+        # narrows the items without dropping the category row.
+        item_filter = and_(Item.category_id == Category.id, Item.supermarket_id == supermarket_id)
+        if in_stock is not None:
+            item_filter = and_(item_filter, AVAILABLE_QUANTITY > 0 if in_stock else AVAILABLE_QUANTITY <= 0)
+        if cursor:
+            last_value, last_id = decode_cursor(cursor, sort_by, order)
+            keyset = tuple_(sort_column, Item.id)
+            item_filter = and_(item_filter, keyset < (last_value, last_id) if descending else keyset > (last_value, last_id))
+
+        columns = {field: ITEM_FIELDS[field] for field in projection}
+        columns.setdefault(sort_by, sort_column)
         query = (
-            select(Item.id, Item.name, Item.photo_url, Item.price, Item.description, Item.supermarket_id)
-            .where(Item.category_id == category_id, Item.supermarket_id == supermarket_id)
+            select(Category.name.label("category_name"), Item.id, *columns.values())
+            .select_from(
+                Category.__table__.outerjoin(
+                    Item.__table__.outerjoin(
+                        StockLevel.__table__,
+                        and_(StockLevel.item_id == Item.id, StockLevel.supermarket_id == Item.supermarket_id),
+                    ),
+                    item_filter,
+                )
+            )
+            .where(Category.id == category_id)
+            .order_by(sort_column.desc() if descending else sort_column, Item.id.desc() if descending else Item.id)
+            .limit(limit + 1)
         )
 
         # Execute the query
         result = await db.execute(query)
-        items = result.fetchall()
+        rows = result.fetchall()
+
+        if not rows:
+            logger.warning(f"Category not found for category_id={category_id}")
+            raise HTTPException(status_code=404, detail="Category not found.")
+
+        category_name = rows[0].category_name
+        items = [row for row in rows if row.id is not None]
 
-        # Raise error if no items are found
-        if not items:
+        # Raise error if the category has no items in this supermarket at all
+        if not items and not cursor:
             logger.warning(f"No items found for category_id={category_id} and supermarket_id={supermarket_id}")
             raise HTTPException(status_code=404, detail="No items found for the given category and supermarket.")
 
-        # Fetch category name
-        category_query = select(Category.name).where(Category.id == category_id)
-        category_result = await db.execute(category_query)
-        category_name = category_result.scalar()
-
-        if not category_name:
-            logger.warning(f"Category not found for category_id={category_id}")
-            raise HTTPException(status_code=404, detail="Category not found.")
+        next_cursor = None
+        if len(items) > limit:
+            items = items[:limit]
+            last = items[-1]
+            next_cursor = encode_cursor(getattr(last, sort_by), last.id, sort_by, order)
 
         logger.info(f"Items fetched successfully for category_id={category_id} and supermarket_id={supermarket_id}, count={len(items)}")
 
@@ -52,17 +141,13 @@ async def get_items_by_category_and_supermarket(
             category_id=category_id,
             category_name=category_name,
             items=[
-                ItemResponse(
-                    id=item.id,
-                    name=item.name,
-                    photo_url=item.photo_url,
-                    price=item.price,
-                    description=item.description,
-                    supermarket_id=item.supermarket_id
-                )
+                ItemResponse(id=item.id, **{field: getattr(item, field) for field in projection})
                 for item in items
-            ]
+            ],
+            next_cursor=next_cursor,
         )
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Error fetching items for category_id={category_id} and supermarket_id={supermarket_id}: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
@@ -0,0 +1,94 @@
+from fastapi import APIRouter, Depends, Query, HTTPException
+from sqlalchemy.ext.asyncio import AsyncSession
+from typing import Optional
+from server.schemas import ItemSearchResponse, ItemSearchResult, AutocompleteResponse
+from server.dependencies import get_read_db
+from server.utils.search import item_search_index
+from server.utils.stock import stock_snapshot
+from loguru import logger
+
+router = APIRouter()
+
+
+async def ensure_index(db: AsyncSession):
+    """
+    Build the search index on first use if startup did not build it.
+    """
+    if not item_search_index.ready:
+        count = await item_search_index.rebuild(db)
+        logger.info(f"Item search index built lazily with {count} items")
+
+
+@router.get("/items/search", response_model=ItemSearchResponse)
+async def search_items(
+    q: str = Query(..., min_length=1, description="Search text matched against item names and descriptions"),
+    supermarket_id: Optional[int] = Query(None, description="Restrict results to a single supermarket"),
+    in_stock: Optional[bool] = Query(None, description="Only return items that are (true) or are not (false) in stock"),
+    offset: int = Query(0, ge=0, description="Number of results to skip"),
+    limit: int = Query(20, ge=1, le=100, description="Maximum number of results to return"),
+    db: AsyncSession = Depends(get_read_db),
+) -> ItemSearchResponse:
+    """
+    Ranked full-text search over the item catalog. The last word is matched as a prefix.
+    Availability comes from the periodically refreshed stock snapshot and may be briefly stale.
+    """
+    logger.info(f"Searching items for q={q!r}, supermarket_id={supermarket_id}, offset={offset}, limit={limit}")
+    try:
+        await ensure_index(db)
+        if not stock_snapshot.ready:
+            await stock_snapshot.refresh(db)
+
+        def available_quantity(item) -> int:
+            return stock_snapshot.quantity(item.id, item.supermarket_id) or 0
+
+        predicate = None
+        if in_stock is not None:
+            predicate = lambda item: (available_quantity(item) > 0) == in_stock
+
+        total, matches = item_search_index.search(
+            q, supermarket_id=supermarket_id, offset=offset, limit=limit, predicate=predicate
+        )
+
+        logger.info(f"Item search for q={q!r} matched {total} items")
+        return ItemSearchResponse(
+            query=q,
+            total=total,
+            offset=offset,
+            limit=limit,
+            results=[
+                ItemSearchResult(
+                    id=item.id,
+                    name=item.name,
+                    photo_url=item.photo_url,
+                    price=item.price,
+                    description=item.description,
+                    supermarket_id=item.supermarket_id,
+                    category_id=item.category_id,
+                    available_quantity=available_quantity(item),
+                    score=round(score, 4),
+                )
+                for item, score in matches
+            ],
+        )
+    except Exception as e:
+        logger.error(f"Error searching items for q={q!r}: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
+
+
+@router.get("/items/autocomplete", response_model=AutocompleteResponse)
+async def autocomplete_items(
+    prefix: str = Query(..., min_length=1, description="Partially typed search text"),
+    supermarket_id: Optional[int] = Query(None, description="Restrict suggestions to a single supermarket"),
+    limit: int = Query(10, ge=1, le=50, description="Maximum number of suggestions"),
+    db: AsyncSession = Depends(get_read_db),
+) -> AutocompleteResponse:
+    """
+    Suggest item names for search-as-you-type.
+    """
+    try:
+        await ensure_index(db)
+        suggestions = item_search_index.autocomplete(prefix, supermarket_id=supermarket_id, limit=limit)
+        return AutocompleteResponse(prefix=prefix, suggestions=suggestions)
+    except Exception as e:
+        logger.error(f"Error autocompleting items for prefix={prefix!r}: {e}")
+        raise HTTPException(status_code=500, detail="Internal server error")
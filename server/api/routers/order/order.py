@@ -1,13 +1,16 @@
-from fastapi import APIRouter, Depends, HTTPException, Query
+from fastapi import APIRouter, Depends, HTTPException, Query, Request, Response
 from sqlalchemy.orm import joinedload
 from sqlalchemy import select
 from sqlalchemy.ext.asyncio import AsyncSession
-from server.dependencies import get_db
+from server.dependencies import get_read_db
 from server.schemas import (
     SubmitDeliveryDetailsRequest,
     SubmitDeliveryDetailsResponse,
     PaymentSummaryResponse,
     OrderSlotsResponse,
+    SlotAvailability,
+    SlotWindow,
+    SlotScheduleResponse,
     AddressesResponse,
     CartItem,
     OrderItemDetail,
@@ -23,18 +26,23 @@ from server.models import (
     Order,
     SharedCart,
     SharedCartContributor,
+    SharedCartContribution,
     OrderItem,
-    OrderSlot,
-    Address,
 )
-from server.utils import aggregate_items
+from server.models.money import ZERO
+from server.utils import aggregate_items, get_user_addresses
+from server.utils.http_cache import conditional_get
+from server.utils.responses import list_response_class
+from server.utils.slots import slot_registry, utc_now
+from server.utils.capacity import remaining_capacity, SLOT_CAPACITY_CACHE_TTL
 from typing import List
+from collections import defaultdict
 from loguru import logger
 
 router = APIRouter()
 
 @router.get("/orders/{order_id}/payment-summary", response_model=PaymentSummaryResponse)
-async def display_payment_summary(order_id: int, db: AsyncSession = Depends(get_db)) -> PaymentSummaryResponse:
+async def display_payment_summary(order_id: int, db: AsyncSession = Depends(get_read_db)) -> PaymentSummaryResponse:
     logger.info(f"Fetching payment summary for order_id={order_id}")
     try:
         result = await db.execute(
@@ -51,7 +59,7 @@ async def display_payment_summary(order_id: int, db: AsyncSession = Depends(get_
             raise HTTPException(status_code=404, detail="Order not found.")
 
         basket_value = sum(item.price * item.quantity for item in order.order_items)
-        delivery_fee = order.delivery_fee or 0.0
+        delivery_fee = order.delivery_fee or ZERO
         total_amount = basket_value + delivery_fee
 
         items = [
@@ -81,7 +89,7 @@ async def display_payment_summary(order_id: int, db: AsyncSession = Depends(get_
 @router.get("/order/details", response_model=OrderDetailResponse)
 async def get_order_details(
     order_id: int = Query(..., description="The ID of the order to fetch details for"),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     logger.info(f"Fetching order details for order_id={order_id}")
     try:
@@ -141,43 +149,109 @@ async def get_order_details(
 
 @router.get("/orders/slots", response_model=OrderSlotsResponse)
 async def display_order_slots(
+    request: Request,
+    response: Response,
     supermarket_id: int = Query(..., description="The ID of the supermarket"),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ) -> OrderSlotsResponse:
     logger.info(f"Fetching order slots for supermarket_id={supermarket_id}")
     try:
-        result = await db.execute(
-            select(OrderSlot).where(OrderSlot.supermarket_id == supermarket_id)
-        )
-        slots = result.scalars().all()
+        # Served from the slot registry and the cached capacity view; both feed the validator
+        await slot_registry.ensure_loaded(db)
+        slots = slot_registry.for_supermarket(supermarket_id)
 
         if not slots:
             logger.warning(f"No order slots found for supermarket_id={supermarket_id}")
             raise HTTPException(status_code=404, detail="No order slots found for the specified supermarket.")
 
-        available_slots = [slot.delivery_time for slot in slots]
+        now = utc_now()
+        windows = {slot.id: slot.next_window(now) for slot in slots}
+        remaining = await remaining_capacity(db, supermarket_id, slots, windows)
+
+        not_modified = await conditional_get(
+            request,
+            response,
+            db,
+            [],
+            extra=[slot_registry.digest(supermarket_id), repr(sorted(remaining.items()))],
+            max_age=int(SLOT_CAPACITY_CACHE_TTL),
+        )
+        if not_modified:
+            return not_modified
+
+        # Fully booked slots are listed with zero capacity but not offered
+        available_slots = [slot.label for slot in slots if remaining[slot.id] != 0]
         logger.info(f"Order slots for supermarket_id={supermarket_id} fetched successfully.")
-        return OrderSlotsResponse(available_slots=available_slots)
+        return OrderSlotsResponse(
+            available_slots=available_slots,
+            slots=[SlotAvailability(label=slot.label, remaining_capacity=remaining[slot.id]) for slot in slots],
+        )
 
+    except HTTPException:
+        raise
     except Exception as e:
         logger.error(f"Failed to fetch order slots for supermarket_id={supermarket_id}: {e}")
         raise HTTPException(status_code=500, detail=f"Failed to fetch order slots: {e}")
 
 
+@router.get("/orders/slots/schedule", response_model=SlotScheduleResponse)
+async def display_slot_schedule(
+    supermarket_id: int = Query(..., description="The ID of the supermarket"),
+    db: AsyncSession = Depends(get_read_db)
+) -> SlotScheduleResponse:
+    """
+    Next delivery occurrence and order cutoff of every slot, computed in each slot's timezone.
+    """
+    logger.info(f"Fetching slot schedule for supermarket_id={supermarket_id}")
+    try:
+        await slot_registry.ensure_loaded(db)
+        slots = slot_registry.for_supermarket(supermarket_id)
+
+        if not slots:
+            logger.warning(f"No order slots found for supermarket_id={supermarket_id}")
+            raise HTTPException(status_code=404, detail="No order slots found for the specified supermarket.")
+
+        now = utc_now()
+        upcoming = {slot.id: slot.next_window(now) for slot in slots}
+        remaining = await remaining_capacity(db, supermarket_id, slots, upcoming)
+        windows = []
+        for slot in slots:
+            window = upcoming[slot.id]
+            windows.append(
+                SlotWindow(
+                    slot_id=slot.id,
+                    label=slot.label,
+                    timezone=slot.timezone,
+                    delivery_at=window.delivery_at,
+                    cutoff_at=window.cutoff_at,
+                    seconds_until_cutoff=int((window.cutoff_at - now).total_seconds()),
+                    remaining_capacity=remaining[slot.id],
+                )
+            )
+
+        logger.info(f"Slot schedule for supermarket_id={supermarket_id} computed successfully.")
+        return SlotScheduleResponse(supermarket_id=supermarket_id, generated_at=now, slots=windows)
+
+    except HTTPException:
+        raise
+    except Exception as e:
+        logger.error(f"Failed to compute slot schedule for supermarket_id={supermarket_id}: {e}")
+        raise HTTPException(status_code=500, detail=f"Failed to compute slot schedule: {e}")
+
+
 @router.get("/user/addresses", response_model=AddressesResponse)
-async def display_addresses(user_id: int, db: AsyncSession = Depends(get_db)) -> AddressesResponse:
+async def display_addresses(user_id: int, db: AsyncSession = Depends(get_read_db)) -> AddressesResponse:
     logger.info(f"Fetching addresses for user_id={user_id}")
     try:
-        result = await db.execute(select(Address))
-        addresses = result.scalars().all()
+        addresses = await get_user_addresses(db, user_id)
 
         if not addresses:
             logger.info(f"No addresses found for user_id={user_id}")
             return AddressesResponse(addresses=[])
 
         address_responses = [
-            AddressResponse(address_id=address.id, address_details=address.building_name)
-            for address in addresses
+            AddressResponse(address_id=address_id, address_details=building_name)
+            for address_id, building_name in addresses
         ]
 
         logger.info(f"Addresses for user_id={user_id} fetched successfully.")
@@ -188,10 +262,10 @@ async def display_addresses(user_id: int, db: AsyncSession = Depends(get_db)) ->
         raise HTTPException(status_code=500, detail=f"Failed to fetch addresses: {e}")
 
 
-@router.get("/orders", response_model=List[OrderDetail])
+@router.get("/orders", response_model=List[OrderDetail], response_class=list_response_class())
 async def view_my_orders(
     user_id: int = Query(..., description="The ID of the user"),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     logger.info(f"Fetching normal orders for user_id={user_id}")
     try:
@@ -240,10 +314,10 @@ async def view_my_orders(
         raise HTTPException(status_code=500, detail=f"Failed to fetch orders: {e}")
 
 
-@router.get("/shared-orders", response_model=List[SharedOrderDetail])
+@router.get("/shared-orders", response_model=List[SharedOrderDetail], response_class=list_response_class())
 async def view_shared_orders(
     user_id: int = Query(..., description="The ID of the user"),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     logger.info(f"Fetching shared orders for user_id={user_id}")
     try:
@@ -316,7 +390,7 @@ async def view_shared_orders(
 @router.get("/shared-orders-test", response_model=List[SharedOrderDetail])
 async def view_shared_orders_test(
     user_id: int = Query(..., description="The ID of the user"),
-    db: AsyncSession = Depends(get_db)
+    db: AsyncSession = Depends(get_read_db)
 ):
     logger.info(f"Fetching shared orders (test) for user_id={user_id}")
     try:
@@ -331,13 +405,11 @@ async def view_shared_orders_test(
             logger.info(f"No shared carts found for user_id={user_id}")
             return []
 
-        # Step 2: Fetch shared carts with related data
+        # Step 2: Fetch shared carts with their orders
         shared_carts_result = await db.execute(
             select(SharedCart)
             .options(
                 joinedload(SharedCart.orders).joinedload(Order.order_items).joinedload(OrderItem.item),
-                joinedload(SharedCart.contributors).joinedload(SharedCartContributor.user),
-                joinedload(SharedCart.shared_cart_items).joinedload(SharedCartItem.item),
                 joinedload(SharedCart.supermarket),
             )
             .where(SharedCart.id.in_(shared_cart_ids))
@@ -345,44 +417,29 @@ async def view_shared_orders_test(
         )
         shared_carts = shared_carts_result.unique().scalars().all()
 
+        # Step 3: Fetch the precomputed contributions of those carts
+        contributions_result = await db.execute(
+            select(SharedCartContribution)
+            .where(SharedCartContribution.shared_cart_id.in_(shared_cart_ids))
+            .order_by(SharedCartContribution.shared_cart_id, SharedCartContribution.contributor_id)
+        )
+        contributions_by_cart = defaultdict(list)
+        for contribution in contributions_result.scalars():
+            contributions_by_cart[contribution.shared_cart_id].append(
+                ContributorContribution(
+                    user_id=contribution.user_id,
+                    name=contribution.user_name,
+                    delivery_fee_contribution=contribution.delivery_fee_contribution,
+                    total_contribution=contribution.item_total + contribution.delivery_fee_contribution,
+                    items=[OrderItemDetail(**line) for line in contribution.items],
+                )
+            )
+
         shared_order_details = []
 
-        # Step 3: Process shared carts
+        # Step 4: Process orders in the shared carts
         for shared_cart in shared_carts:
-            # Step 3.1: Fetch delivery fee from supermarket
-            delivery_fee = shared_cart.supermarket.delivery_fee or 0.0
-            num_contributors = len(shared_cart.contributors)
-            split_delivery_fee = delivery_fee / num_contributors if num_contributors > 0 else 0.0
-
-            # Step 3.2: Aggregate contributor details
-            contributor_contributions = []
-            for contributor in shared_cart.contributors:
-                user_items = [
-                    OrderItemDetail(
-                        item_id=item.item.id,
-                        name=item.item.name,
-                        price=item.price,
-                        quantity=item.quantity,
-                        total_cost=item.price * item.quantity,
-                    )
-                    for item in shared_cart.shared_cart_items
-                    if item.contributor_id == contributor.id
-                ]
-
-                delivery_fee_contribution = contributor.delivery_fee_contribution or 0.0
-                total_contribution = sum(item.total_cost for item in user_items) + delivery_fee_contribution
-
-                contributor_contributions.append(
-                    ContributorContribution(
-                        user_id=contributor.user.id,
-                        name=contributor.user.name,
-                        delivery_fee_contribution=delivery_fee_contribution,
-                        total_contribution=total_contribution,
-                        items=user_items,
-                    )
-                )
-
-            # Step 3.3: Process orders in the shared cart
+            delivery_fee = shared_cart.supermarket.delivery_fee or ZERO
             for order in shared_cart.orders:
                 items = [
                     OrderItemDetail(
@@ -395,13 +452,12 @@ async def view_shared_orders_test(
                     for item in order.order_items
                 ]
 
-                # IMPORTANT: Ensure 'contributions' is included to avoid validation error
                 shared_order_detail = SharedOrderDetail(
                     order_id=order.id,
                     shared_cart_id=shared_cart.id,
                     total_cost=order.total_amount,
                     status=order.status.value,
-                    contributions=contributor_contributions,  # Must include this field
+                    contributions=contributions_by_cart[shared_cart.id],
                     items=items,
                     delivery_fee=delivery_fee,
                 )
@@ -1,23 +1,31 @@
-from fastapi import APIRouter, Depends, HTTPException
+from fastapi import APIRouter, Depends, HTTPException, Request, Response
 from sqlalchemy.ext.asyncio import AsyncSession
 from sqlalchemy.future import select
 from server.models import Supermarket
 from typing import List
-from server.dependencies import get_db
+from server.dependencies import get_read_db
 from server.schemas import SupermarketFeedResponse, SupermarketResponse
+from server.enums import CatalogScope
+from server.utils.http_cache import conditional_get
 from loguru import logger  # Added loguru for logging
 
 router = APIRouter()
 
 @router.get("/supermarket/feed", response_model=SupermarketFeedResponse)
 async def get_supermarket_feed(
-    db: AsyncSession = Depends(get_db)
+    request: Request,
+    response: Response,
+    db: AsyncSession = Depends(get_read_db)
 ) -> SupermarketFeedResponse:
     """
     Fetch a list of supermarkets with their basic details.
     """
     logger.info("Fetching supermarket feed")
     try:
+        not_modified = await conditional_get(request, response, db, [CatalogScope.CATALOG])
+        if not_modified:
+            return not_modified
+
         # Query to fetch supermarket details
         query = select(
             Supermarket.id,
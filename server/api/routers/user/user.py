@@ -4,14 +4,16 @@ from sqlalchemy.orm import selectinload
 from sqlalchemy import func
 from sqlalchemy.ext.asyncio import AsyncSession
 from server.schemas import AccountDetailsResponse, OrderHistoryResponse, OrderSummary
-from server.models import User, WalletTransaction, Order, Address, SharedCartContributor
-from server.dependencies import get_db
+from server.models import User, Order, Address, SharedCartContributor
+from server.dependencies import get_read_db
+from server.utils.wallet import get_wallet_balance
+from server.models.money import ZERO
 from loguru import logger  # Added loguru for logging
 
 router = APIRouter()
 
 @router.get("/user/account", response_model=AccountDetailsResponse)
-async def get_account_details(user_id: int, db: AsyncSession = Depends(get_db)) -> AccountDetailsResponse:
+async def get_account_details(user_id: int, db: AsyncSession = Depends(get_read_db)) -> AccountDetailsResponse:
     """
     Overview:
     Fetch account details for a user.
@@ -41,11 +43,9 @@ async def get_account_details(user_id: int, db: AsyncSession = Depends(get_db))
 
         # Fetch wallet balance
         if not user.wallet:
-            wallet_balance = 0.0
+            wallet_balance = ZERO
         else:
-            stmt_wallet = select(func.sum(WalletTransaction.amount)).where(WalletTransaction.wallet_id == user.wallet.id)
-            wallet_result = await db.execute(stmt_wallet)
-            wallet_balance = wallet_result.scalar() or 0.0
+            wallet_balance = await get_wallet_balance(db, user.wallet.id)
 
         logger.info(f"Wallet balance for user_id={user_id}: {wallet_balance}")
 
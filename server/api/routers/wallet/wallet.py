@@ -1,12 +1,14 @@
 from fastapi import APIRouter, Depends, HTTPException
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select, func
+from sqlalchemy import select
 from sqlalchemy.orm import selectinload, joinedload
 from datetime import datetime
-from typing import List
+from typing import List, Optional
 
 from server.schemas import WalletTopUpRequest, WalletPaymentRequest, WalletResponse, WalletTransactionResponse
-from server.dependencies import get_db
+from server.dependencies import get_db, get_read_db
+from server.utils.responses import list_response_class
+from server.utils.wallet import get_wallet_balance, transaction_history
 from server.models import Wallet, WalletTransaction, User
 from server.models.wallet_transaction import TransactionType
 from loguru import logger
@@ -44,9 +46,7 @@ async def top_up_wallet(request: WalletTopUpRequest, db: AsyncSession = Depends(
         await db.commit()
 
         # Calculate updated balance
-        balance_stmt = select(func.sum(WalletTransaction.amount)).where(WalletTransaction.wallet_id == wallet.id)
-        balance_result = await db.execute(balance_stmt)
-        balance = balance_result.scalar() or 0.0
+        balance = await get_wallet_balance(db, wallet.id)
 
         logger.info(f"Wallet topped up successfully for user_id={request.user_id}. New balance: {balance}")
         return WalletResponse(
@@ -81,9 +81,7 @@ async def pay_from_wallet(request: WalletPaymentRequest, db: AsyncSession = Depe
         wallet = user.wallet
 
         # Calculate current balance
-        balance_stmt = select(func.sum(WalletTransaction.amount)).where(WalletTransaction.wallet_id == wallet.id)
-        balance_result = await db.execute(balance_stmt)
-        balance = balance_result.scalar() or 0.0
+        balance = await get_wallet_balance(db, wallet.id)
 
         logger.info(f"Current balance for user_id={request.user_id} is {balance}")
 
@@ -134,9 +132,7 @@ async def check_wallet_balance(user_id: int, db: AsyncSession = Depends(get_db))
         wallet = user.wallet
 
         # Calculate balance
-        balance_stmt = select(func.sum(WalletTransaction.amount)).where(WalletTransaction.wallet_id == wallet.id)
-        balance_result = await db.execute(balance_stmt)
-        balance = balance_result.scalar() or 0.0
+        balance = await get_wallet_balance(db, wallet.id)
 
         logger.info(f"Retrieved wallet balance for user_id={user_id}: {balance}")
         return WalletResponse(
@@ -151,8 +147,13 @@ async def check_wallet_balance(user_id: int, db: AsyncSession = Depends(get_db))
         logger.error(f"Unexpected error fetching balance for user_id={user_id}: {e}")
         raise HTTPException(status_code=500, detail="Internal server error")
 
-@router.get("/wallet/transactions", response_model=List[WalletTransactionResponse])
-async def fetch_transaction_history(user_id: int, db: AsyncSession = Depends(get_db)) -> List[WalletTransactionResponse]:
+@router.get("/wallet/transactions", response_model=List[WalletTransactionResponse], response_class=list_response_class())
+async def fetch_transaction_history(
+    user_id: int,
+    since: Optional[datetime] = None,
+    until: Optional[datetime] = None,
+    db: AsyncSession = Depends(get_read_db),
+) -> List[WalletTransactionResponse]:
     logger.info(f"Fetching transaction history for user_id={user_id}")
     try:
         # Fetch the user with the wallet eagerly loaded
@@ -166,14 +167,9 @@ async def fetch_transaction_history(user_id: int, db: AsyncSession = Depends(get
 
         wallet = user.wallet
 
-        # Fetch transaction history
-        transaction_stmt = (
-            select(WalletTransaction)
-            .where(WalletTransaction.wallet_id == wallet.id)
-            .order_by(WalletTransaction.created_at.desc())
-        )
-        transactions_result = await db.execute(transaction_stmt)
-        transactions = transactions_result.scalars().all()
+        # Fetch transaction history, archived transactions included; a date range only reads the months it covers
+        transactions_result = await db.execute(transaction_history(wallet.id, since, until))
+        transactions = transactions_result.all()
 
         logger.info(f"Fetched {len(transactions)} transactions for user_id={user_id}")
         return transactions
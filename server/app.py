@@ -1,15 +1,85 @@
+import asyncio
+from contextlib import asynccontextmanager
 from fastapi import FastAPI
 from fastapi.middleware.cors import CORSMiddleware
+from fastapi.middleware.gzip import GZipMiddleware
 import os
-import uvicorn
-from dotenv import load_dotenv
+from loguru import logger
 from .api import master_router
-from .database import setup_database, populate_database, drop_all_tables
+from .database import dispose_engines, SessionLocal, DATABASE_URL, read_router
+from .utils.search import item_search_index, SEARCH_INDEX_REFRESH_INTERVAL
+from .utils.stock import stock_snapshot, STOCK_SNAPSHOT_INTERVAL
+from .utils.slots import slot_registry, SLOT_REGISTRY_REFRESH_INTERVAL
+from .utils.scheduler import placement_scheduler
+from .utils.wallet import wallet_compactor, WALLET_COMPACTION_INTERVAL
+from .utils.partitions import partition_maintainer, PARTITION_MAINTENANCE_INTERVAL
+from .utils.events import event_broker
+from .utils.replicas import ReadYourWritesMiddleware
+from .utils.responses import GZIP_MINIMUM_SIZE, GZIP_COMPRESS_LEVEL
 
-# Load environment variables from .env
-load_dotenv()
+# Drop, recreate and seed the database when the app starts; deploys run `python -m server.seed` instead
+SEED_ON_STARTUP = os.getenv("SEED_ON_STARTUP", "0").lower() in ("1", "true", "yes")
 
-app = FastAPI()
+# Seconds shutdown waits for order placements that are already running
+SHUTDOWN_DRAIN_TIMEOUT = float(os.getenv("SHUTDOWN_DRAIN_TIMEOUT", "20"))
+
+# Background loops started with the app and cancelled on shutdown
+BACKGROUND_TASKS = ("stock_snapshot_task", "slot_registry_task", "search_index_task", "replica_lag_task", "wallet_compactor_task", "partition_maintainer_task")
+
+
+async def startup():
+    if SEED_ON_STARTUP:
+        # Imported here so pandas and the CSV loaders stay out of a cold start that does not seed
+        from .seed import seed_database
+
+        await seed_database()
+    placement_scheduler.bind(SessionLocal)
+    # asyncpg takes a plain postgresql:// DSN
+    dsn = DATABASE_URL.replace("postgresql+asyncpg://", "postgresql://")
+    await event_broker.start(dsn)
+    async with SessionLocal() as session:
+        await item_search_index.rebuild(session)
+        await stock_snapshot.refresh(session)
+        await slot_registry.load(session)
+        # One worker re-schedules placements that were pending when the server last stopped
+        if await placement_scheduler.acquire_leadership(dsn):
+            recovered = await placement_scheduler.recover(session, os.getenv("ENVIRONMENT") == "development")
+            logger.info(f"Recovered {recovered} pending order placements.")
+    if STOCK_SNAPSHOT_INTERVAL > 0:
+        app.state.stock_snapshot_task = asyncio.create_task(stock_snapshot.run(SessionLocal))
+    if SLOT_REGISTRY_REFRESH_INTERVAL > 0:
+        app.state.slot_registry_task = asyncio.create_task(slot_registry.run(SessionLocal))
+    if SEARCH_INDEX_REFRESH_INTERVAL > 0:
+        app.state.search_index_task = asyncio.create_task(item_search_index.run(SessionLocal))
+    if PARTITION_MAINTENANCE_INTERVAL > 0:
+        app.state.partition_maintainer_task = asyncio.create_task(partition_maintainer.run(SessionLocal))
+    if WALLET_COMPACTION_INTERVAL > 0:
+        app.state.wallet_compactor_task = asyncio.create_task(wallet_compactor.run(SessionLocal))
+    if read_router.replicas:
+        app.state.replica_lag_task = asyncio.create_task(read_router.run())
+
+
+async def shutdown():
+    for name in BACKGROUND_TASKS:
+        task = getattr(app.state, name, None)
+        if task is not None:
+            task.cancel()
+    await placement_scheduler.drain(SHUTDOWN_DRAIN_TIMEOUT)
+    await placement_scheduler.release_leadership()
+    await event_broker.stop()
+    await dispose_engines()
+
+
+@asynccontextmanager
+async def lifespan(app: FastAPI):
+    await startup()
+    try:
+        yield
+    finally:
+        await shutdown()
+
+
+app = FastAPI(lifespan=lifespan)
 
 ## API VERSION: 1
 app.include_router(master_router, tags=["API Router"])
@@ -24,12 +94,13 @@ app.add_middleware(
     allow_headers=["*"],  # specific headers like ["Content-Type", "Authorization"] or use ["*"] for all headers
 )
 
+# Compress large responses for clients that accept gzip
+app.add_middleware(GZipMiddleware, minimum_size=GZIP_MINIMUM_SIZE, compresslevel=GZIP_COMPRESS_LEVEL)
+
+# Send a client's reads to the primary for a few seconds after its own writes
+if read_router.replicas:
+    app.add_middleware(ReadYourWritesMiddleware)
 
-@app.on_event("startup")
-async def startup_event():
-    await drop_all_tables()
-    await setup_database()
-    await populate_database()
 
 # Testing Endpoint
 @app.get('/')
@@ -38,4 +109,7 @@ async def index():
 
 
 if __name__ == '__main__':
+    # Development entry point; use `python -m server.serve` in production
+    import uvicorn
+
     uvicorn.run(app, host='0.0.0.0', port=int(os.getenv('SERVER_PORT', 5200)))
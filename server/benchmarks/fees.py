@@ -0,0 +1,89 @@
+"""
+Compare splitting delivery fees cart by cart with the vectorized allocation.
+
+Usage:
+    python -m server.benchmarks.fees [--carts 5000] [--max-contributors 8] [--repeat 20]
+
+Every contributor holds the full fee, as they do before placement. Both methods
+must agree on every share and refund; the command exits non-zero when they differ.
+"""
+import argparse
+import random
+import sys
+import time
+from server.models.money import from_cents, split_money, to_cents
+from server.utils.fees import allocate_fees
+
+
+def contributor_rows(carts: int, max_contributors: int, seed: int = 0):
+    """
+    (shared_cart_id, contributor_id, fee, held) per contributor, in cents, in no particular order.
+    """
+    rng = random.Random(seed)
+    rows = []
+    contributor_id = 0
+    for shared_cart_id in range(1, carts + 1):
+        fee = rng.randint(0, 5000)
+        for _ in range(rng.randint(1, max_contributors)):
+            contributor_id += 1
+            rows.append((shared_cart_id, contributor_id, fee, fee))
+    rng.shuffle(rows)
+    return rows
+
+
+def per_cart(rows):
+    """
+    The old path: group the contributors of each cart and split its fee with split_money.
+    """
+    carts = {}
+    for shared_cart_id, contributor_id, fee, held in rows:
+        carts.setdefault(shared_cart_id, (fee, []))[1].append((contributor_id, held))
+    allocation = {}
+    for fee, contributors in carts.values():
+        contributors.sort()
+        for (contributor_id, held), share in zip(contributors, split_money(from_cents(fee), len(contributors))):
+            share = to_cents(share)
+            allocation[contributor_id] = (share, max(held - share, 0))
+    return allocation
+
+
+def vectorized(rows):
+    return allocate_fees(*zip(*rows))
+
+
+def timed(function, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = function()
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+
+def run(carts: int, max_contributors: int, repeat: int) -> int:
+    rows = contributor_rows(carts, max_contributors)
+    loop_seconds, expected = timed(lambda: per_cart(rows), repeat)
+    array_seconds, allocation = timed(lambda: vectorized(rows), repeat)
+
+    print(f"{len(rows)} contributors in {carts} carts")
+    print(f"{'method':<12}{'ms':>10}")
+    print(f"{'per cart':<12}{loop_seconds * 1000:>10.2f}")
+    print(f"{'vectorized':<12}{array_seconds * 1000:>10.2f}")
+
+    actual = dict(zip(
+        allocation.contributor_ids.tolist(),
+        zip(allocation.shares.tolist(), allocation.refunds.tolist()),
+    ))
+    if actual != expected:
+        print("Vectorized allocation differs from the per-cart split.", file=sys.stderr)
+        return 1
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--carts", type=int, default=5000, help="Shared carts settled in one pass")
+    parser.add_argument("--max-contributors", type=int, default=8, help="Most contributors in a cart")
+    parser.add_argument("--repeat", type=int, default=20, help="Timing repetitions; the best run is reported")
+    args = parser.parse_args()
+    sys.exit(run(args.carts, args.max_contributors, args.repeat))
@@ -0,0 +1,103 @@
+"""
+Check the cold import time of the web app against a budget.
+
+Usage:
+    python -m server.benchmarks.import_time [--budget-ratio 2.0] [--repeat 3] [--top 10]
+
+Each run imports `server.app` in a fresh interpreter with `python -X importtime`
+and reads the cumulative time of the top-level import. The same runs import the
+framework stack the app is built on (FastAPI, SQLAlchemy, asyncpg, loguru) as a
+baseline, so the budget is a ratio to it rather than a fixed number of
+milliseconds and holds on slow and fast runners alike. The best app run is
+compared with the best baseline run times the ratio, and the command exits
+non-zero when it is exceeded, so CI can catch a heavy dependency (e.g. pandas)
+creeping back into the startup path.
+"""
+import argparse
+import os
+import subprocess
+import sys
+from typing import List, Tuple
+
+# Cold import budget for server.app, as a multiple of the baseline import: the app measures about 1.3x, so 2x leaves room for noisy runners
+IMPORT_BUDGET_RATIO = float(os.getenv("IMPORT_BUDGET_RATIO", "2.0"))
+
+# Third-party stack imported by every worker, timed on the same runner as the baseline
+BASELINE_MODULES = ("fastapi", "sqlalchemy.ext.asyncio", "sqlalchemy.dialects.postgresql", "asyncpg", "loguru")
+
+# Modules that must not be imported by server.app; they are loaded on demand by seeding and fee settlement
+FORBIDDEN_MODULES = ("pandas", "numpy", "server.seed")
+
+
+def measure(module: str) -> List[Tuple[str, int, int]]:
+    """
+    Import `module` (or a comma-separated list) in a fresh interpreter and return (module, self_us, cumulative_us)
+    for every import, in the order reported by -X importtime.
+    """
+    result = subprocess.run(
+        [sys.executable, "-X", "importtime", "-c", f"import {module}"],
+        capture_output=True,
+        text=True,
+    )
+    if result.returncode != 0:
+        sys.stderr.write(result.stderr)
+        raise SystemExit(f"Importing {module} failed.")
+
+    rows = []
+    for line in result.stderr.splitlines():
+        if not line.startswith("import time:") or "self [us]" in line:
+            continue
+        self_us, cumulative_us, name = line[len("import time:"):].split("|", 2)
+        rows.append((name.strip(), int(self_us), int(cumulative_us)))
+    return rows
+
+
+def best_import_us(modules, repeat: int) -> Tuple[int, List[Tuple[str, int, int]]]:
+    """
+    Fastest of `repeat` cold imports of `modules`, as (cumulative_us, rows of that run).
+    Each module's last row is its top-level import; a package may report it nested first.
+    """
+    best = None
+    for _ in range(repeat):
+        rows = measure(", ".join(modules))
+        total_us = sum(
+            next(cumulative for name, _, cumulative in reversed(rows) if name == module) for module in modules
+        )
+        if best is None or total_us < best[0]:
+            best = (total_us, rows)
+    return best
+
+
+def main(module: str, budget_ratio: float, repeat: int, top: int) -> int:
+    total_us, rows = best_import_us((module,), repeat)
+    baseline_us, _ = best_import_us(BASELINE_MODULES, repeat)
+
+    print(f"Slowest imports under {module}:")
+    for name, _, cumulative in sorted(rows, key=lambda row: row[2], reverse=True)[1:top + 1]:
+        print(f"  {cumulative / 1000:>9.1f} ms  {name}")
+
+    failed = False
+    imported = {name for name, _, _ in rows}
+    for name in FORBIDDEN_MODULES:
+        if name in imported:
+            print(f"FAIL: {module} imports {name}, which should only load on demand.")
+            failed = True
+
+    total_ms, baseline_ms = total_us / 1000, baseline_us / 1000
+    budget_ms = baseline_ms * budget_ratio
+    status = "FAIL" if total_ms > budget_ms else "OK"
+    print(
+        f"{status}: import {module} took {total_ms:.1f} ms, {total_ms / baseline_ms:.2f}x the "
+        f"{baseline_ms:.1f} ms baseline (budget {budget_ratio:.2f}x = {budget_ms:.0f} ms, best of {repeat})."
+    )
+    return 1 if failed or total_ms > budget_ms else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--module", default="server.app", help="Module whose cold import is measured")
+    parser.add_argument("--budget-ratio", type=float, default=IMPORT_BUDGET_RATIO, help="Fail above this multiple of the baseline import")
+    parser.add_argument("--repeat", type=int, default=3, help="Fresh interpreters to try; the best run is compared")
+    parser.add_argument("--top", type=int, default=10, help="Slowest imports to list")
+    args = parser.parse_args()
+    sys.exit(main(args.module, args.budget_ratio, args.repeat, args.top))
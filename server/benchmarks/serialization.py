@@ -0,0 +1,134 @@
+"""
+Compare JSON encoders and gzip on the largest list payloads.
+
+Usage:
+    python -m server.benchmarks.serialization [--rows 5000] [--repeat 20]
+
+Encoders compared:
+- stdlib:   jsonable_encoder + json.dumps (FastAPI's classic JSONResponse path)
+- pydantic: TypeAdapter.dump_json (FastAPI's default path when a response model is set)
+- orjson:   TypeAdapter.dump_python(mode="json") + orjson.dumps (JSON_SERIALIZER=orjson)
+"""
+import argparse
+import gzip
+import json
+import time
+from datetime import datetime, timedelta
+from typing import List
+from fastapi.encoders import jsonable_encoder
+from pydantic import TypeAdapter
+from server.schemas import (
+    WalletTransactionResponse,
+    SharedOrderDetail,
+    ContributorContribution,
+    OrderItemDetail,
+    ItemListResponse,
+    ItemResponse,
+)
+from server.utils.responses import orjson, GZIP_COMPRESS_LEVEL
+
+
+def transaction_history(rows: int) -> List[WalletTransactionResponse]:
+    start = datetime(2024, 1, 1)
+    return [
+        WalletTransactionResponse(
+            id=i,
+            wallet_id=1,
+            user_id=1,
+            amount=-12.5 if i % 3 else 100.0,
+            transaction_type="debit" if i % 3 else "credit",
+            created_at=start + timedelta(minutes=i),
+        )
+        for i in range(rows)
+    ]
+
+
+def shared_orders(rows: int) -> List[SharedOrderDetail]:
+    items = [
+        OrderItemDetail(item_id=i, name=f"Item {i}", price=4.5, quantity=2, total_cost=9.0)
+        for i in range(10)
+    ]
+    contributions = [
+        ContributorContribution(
+            user_id=u,
+            name=f"User {u}",
+            total_contribution=56.0,
+            delivery_fee_contribution=11.0,
+            items=items[:5],
+        )
+        for u in range(4)
+    ]
+    return [
+        SharedOrderDetail(
+            order_id=i,
+            shared_cart_id=i,
+            total_cost=123.0,
+            status="placed",
+            items=items,
+            delivery_fee=33.0,
+            contributions=contributions,
+        )
+        for i in range(max(rows // 10, 1))
+    ]
+
+
+def item_listing(rows: int) -> ItemListResponse:
+    return ItemListResponse(
+        category_id=5,
+        category_name="Chips & Snacks",
+        items=[
+            ItemResponse(
+                id=i,
+                name=f"Snack {i}",
+                photo_url=f"https://images.example.com/items/{i}.jpeg?w=1260&h=750",
+                price=3.25,
+                description="Crunchy salted potato chips, family size bag",
+                supermarket_id=1,
+                available_quantity=40,
+            )
+            for i in range(rows)
+        ],
+    )
+
+
+def timed(function, repeat: int):
+    best = float("inf")
+    for _ in range(repeat):
+        start = time.perf_counter()
+        body = function()
+        best = min(best, time.perf_counter() - start)
+    return best, body
+
+
+def run(rows: int, repeat: int):
+    payloads = {
+        "transaction history": (List[WalletTransactionResponse], transaction_history(rows)),
+        "shared orders": (List[SharedOrderDetail], shared_orders(rows)),
+        "item listing": (ItemListResponse, item_listing(rows)),
+    }
+
+    print(f"{'payload':<22}{'encoder':<10}{'ms':>10}{'bytes':>12}{'gzip ms':>10}{'gzip bytes':>12}")
+    for name, (model, data) in payloads.items():
+        adapter = TypeAdapter(model)
+        encoders = {
+            "stdlib": lambda: json.dumps(jsonable_encoder(data)).encode(),
+            "pydantic": lambda: adapter.dump_json(data),
+        }
+        if orjson is not None:
+            encoders["orjson"] = lambda: orjson.dumps(adapter.dump_python(data, mode="json"))
+
+        for encoder, function in encoders.items():
+            seconds, body = timed(function, repeat)
+            gzip_seconds, compressed = timed(lambda: gzip.compress(body, compresslevel=GZIP_COMPRESS_LEVEL), repeat)
+            print(
+                f"{name:<22}{encoder:<10}{seconds * 1000:>10.2f}{len(body):>12}"
+                f"{gzip_seconds * 1000:>10.2f}{len(compressed):>12}"
+            )
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--rows", type=int, default=5000, help="Rows in the largest payload")
+    parser.add_argument("--repeat", type=int, default=20, help="Timing repetitions; the best run is reported")
+    args = parser.parse_args()
+    run(args.rows, args.repeat)
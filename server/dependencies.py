@@ -1,7 +1,15 @@
-from sqlalchemy.ext.asyncio import AsyncSession
-from .database import SessionLocal
+from fastapi import Request
+from .database import SessionLocal, read_router
+from .utils.replicas import is_sticky
 
 # Dependency to provide a session for each request
 async def get_db():
     async with SessionLocal() as session:
         yield session
+
+# Dependency for read-only handlers: a replica session, or the primary when replicas lag
+# or the client wrote recently (read-your-writes)
+async def get_read_db(request: Request):
+    session_factory = read_router.choose(sticky=is_sticky(request.cookies))
+    async with session_factory() as session:
+        yield session
@@ -1,4 +1,5 @@
 from .cart import CartStatus
 from .shared_cart import SharedCartStatus
 from .order import OrderStatus
-from .wallet_transaction import TransactionType
\ No newline at end of file
+from .wallet_transaction import TransactionType
+from .catalog import CatalogScope
\ No newline at end of file
@@ -0,0 +1,5 @@
+import enum
+
+# Enumerations for independently versioned parts of the catalog
+class CatalogScope(enum.Enum):
+    CATALOG = "catalog"
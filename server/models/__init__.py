@@ -9,13 +9,20 @@ from .order import Order
 from .supermarkets import Supermarket
 from .user import User
 from .user_orders import UserOrder
+from .user_address import UserAddress
 from .stock_levels import StockLevel
 from .wallet import Wallet
 from .supermarket_categories import SupermarketCategory
 from .shared_cart import SharedCart
 from .shared_cart_contributor import SharedCartContributor
 from .shared_cart_item import SharedCartItem
+from .shared_cart_contribution import SharedCartContribution
 from .wallet_transaction import WalletTransaction
+from .wallet_balance_snapshot import WalletBalanceSnapshot
+from .wallet_transaction_archive import WalletTransactionArchive
+from .catalog_version import CatalogVersion
+from .order_slot_booking import OrderSlotBooking
+from .money import Money
 from .base import Base
 
 
@@ -1,6 +1,7 @@
 from sqlalchemy import Column, Integer, Float, ForeignKey, String
 from sqlalchemy.orm import relationship
 from .base import Base
+from .money import Money
 
 class CartItems(Base):
     __tablename__ = 'cart_items'
@@ -9,7 +10,7 @@ class CartItems(Base):
     cart_id = Column(Integer, ForeignKey('carts.id'), nullable=False)
     item_id = Column(Integer, ForeignKey('items.id'), nullable=False)
     quantity = Column(Integer, nullable=False)
-    price = Column(Float, nullable=False)  # Price can vary (e.g., discounts)
+    price = Column(Money, nullable=False)  # Price can vary (e.g., discounts)
 
     # Relationships
     cart = relationship("Cart", back_populates="cart_items")
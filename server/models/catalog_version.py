@@ -0,0 +1,15 @@
+## scope (catalog)
+## version counter, bumped whenever that part of the catalog changes
+## updated_at (used as Last-Modified)
+
+from sqlalchemy import Column, String, BigInteger, DateTime
+from .base import Base
+import datetime
+
+# Catalog version model
+class CatalogVersion(Base):
+    __tablename__ = 'catalog_versions'
+
+    scope = Column(String, primary_key=True)
+    version = Column(BigInteger, nullable=False, default=1)
+    updated_at = Column(DateTime, nullable=False, default=datetime.datetime.utcnow)
@@ -6,9 +6,10 @@
 ## item category (id)
 ## supermarket id
 
-from sqlalchemy import Column, Integer, String, ForeignKey, Float, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, Float, DateTime, Index, UniqueConstraint
 from sqlalchemy.orm import relationship
 from .base import Base
+from .money import Money
 
 # Items model
 class Item(Base):
@@ -17,7 +18,7 @@ class Item(Base):
     id = Column(Integer, primary_key=True, autoincrement=True)
     name = Column(String, nullable=False)
     photo_url = Column(String)
-    price = Column(Float, nullable=False)
+    price = Column(Money, nullable=False)
     description = Column(String)
     category_id = Column(Integer, ForeignKey('categories.id'))
     supermarket_id = Column(Integer, ForeignKey('supermarkets.id'))
@@ -25,4 +26,12 @@ class Item(Base):
     category = relationship("Category", back_populates="items")
     supermarket = relationship("Supermarket", back_populates="items")
     stock_levels = relationship("StockLevel", back_populates="item")
-    shared_cart_items = relationship("SharedCartItem", back_populates="item")
\ No newline at end of file
+    shared_cart_items = relationship("SharedCartItem", back_populates="item")
+
+    __table_args__ = (
+        # Keyset pagination of a category listing, sorted by name or by price
+        Index('ix_items_listing_name', 'supermarket_id', 'category_id', 'name', 'id'),
+        Index('ix_items_listing_price', 'supermarket_id', 'category_id', 'price', 'id'),
+        # Natural key of a supplier feed row, used by delta imports to upsert items
+        UniqueConstraint('supermarket_id', 'name', name='uq_items_supermarket_name'),
+    )
\ No newline at end of file
@@ -0,0 +1,85 @@
+## Money is stored as a whole number of cents (BIGINT) and handled in Python as a
+## Decimal with two places, so sums and splits are exact
+
+import numbers
+from decimal import Decimal, ROUND_HALF_UP
+from typing import List
+from sqlalchemy import BigInteger, Integer, Numeric, cast
+from sqlalchemy.sql import operators
+from sqlalchemy.types import TypeDecorator
+
+CENT = Decimal("0.01")
+
+ZERO = Decimal("0.00")
+
+
+def to_cents(value) -> int:
+    """
+    Whole cents of an amount given as a Decimal, int, str or float, rounded half up.
+    Floats go through their shortest repr, so 0.285 is 29 cents rather than 28.
+    numpy scalars are taken as the Python int or float they hold.
+    """
+    if isinstance(value, numbers.Integral):
+        value = int(value)
+    elif isinstance(value, numbers.Real) and not isinstance(value, Decimal):
+        value = repr(float(value))
+    return int(Decimal(value).scaleb(2).quantize(Decimal(1), rounding=ROUND_HALF_UP))
+
+
+def from_cents(cents: int) -> Decimal:
+    return Decimal(int(cents)).scaleb(-2)
+
+
+def to_money(value) -> Decimal:
+    """
+    Round an amount to cents.
+    """
+    return from_cents(to_cents(value))
+
+
+def split_money(amount, parts: int) -> List[Decimal]:
+    """
+    Split an amount into `parts` shares that differ by at most a cent and add up to
+    exactly the amount. The leftover cents go to the first shares.
+    """
+    if parts <= 0:
+        raise ValueError("Cannot split an amount into fewer than one share")
+    share, remainder = divmod(to_cents(amount), parts)
+    return [from_cents(share + 1 if index < remainder else share) for index in range(parts)]
+
+
+def money_units(expression):
+    """
+    A Money SQL expression as an exact numeric amount, e.g. for JSON built in the database.
+    """
+    return cast(cast(expression, Numeric) / 100, Numeric(20, 2))
+
+
+class Money(TypeDecorator):
+    """
+    Amount of money stored as integer cents. Values bound to it are amounts (12.34),
+    not cents; results come back as Decimal. Sums and differences of Money and
+    products with integers stay Money, so their results are converted back too.
+    """
+    impl = BigInteger
+    cache_ok = True
+
+    def process_bind_param(self, value, dialect):
+        return None if value is None else to_cents(value)
+
+    def process_result_value(self, value, dialect):
+        return None if value is None else from_cents(value)
+
+    def coerce_compared_value(self, op, value):
+        # A multiplier or divisor is a plain number, not an amount
+        if op in (operators.mul, operators.truediv, operators.floordiv):
+            return Integer() if isinstance(value, int) else Numeric()
+        return self
+
+    class comparator_factory(TypeDecorator.Comparator):
+        def _adapt_expression(self, op, other_comparator):
+            if op in (operators.add, operators.sub) and isinstance(other_comparator.type, Money):
+                return op, self.type
+            if op is operators.mul and other_comparator.type._type_affinity is Integer:
+                return op, self.type
+            return super()._adapt_expression(op, other_comparator)
@@ -11,6 +11,7 @@ from sqlalchemy import UniqueConstraint
 from sqlalchemy.orm import relationship
 from sqlalchemy.types import Enum
 from .base import Base
+from .money import Money
 from server.enums import OrderStatus
 
 # Order model
@@ -20,8 +21,8 @@ class Order(Base):
     id = Column(Integer, primary_key=True, autoincrement=True)
     user_id = Column(Integer, ForeignKey('users.id'))
     address_id = Column(Integer, ForeignKey('addresses.id'))
-    delivery_fee = Column(Float, nullable=False)
-    total_amount= Column(Float, nullable=False)
+    delivery_fee = Column(Money, nullable=False)
+    total_amount= Column(Money, nullable=False)
     status = Column(Enum(OrderStatus), default=OrderStatus.PENDING)
     supermarket_id = Column(Integer, ForeignKey('supermarkets.id'))
     cart_id = Column(Integer, ForeignKey('carts.id'))
@@ -11,6 +11,7 @@ price
 from sqlalchemy import Column, Integer, String, ForeignKey, Float, DateTime
 from sqlalchemy.orm import relationship
 from .base import Base
+from .money import Money
 
 # Order Items model
 class OrderItem(Base):
@@ -20,7 +21,7 @@ class OrderItem(Base):
     order_id = Column(Integer, ForeignKey('orders.id'))
     item_id = Column(Integer, ForeignKey('items.id'))
     quantity = Column(Integer, nullable=False)
-    price = Column(Float, nullable=False)
+    price = Column(Money, nullable=False)
 
     order = relationship("Order", back_populates="order_items")
     item = relationship("Item")
\ No newline at end of file
@@ -0,0 +1,18 @@
+## order slot id
+## slot date (local date of the slot occurrence in the slot's timezone)
+## booked (number of orders booked into that occurrence)
+
+from sqlalchemy import Column, Integer, Date, ForeignKey, PrimaryKeyConstraint
+from .base import Base
+
+# Order Slot Bookings model: one atomic counter per slot occurrence
+class OrderSlotBooking(Base):
+    __tablename__ = 'order_slot_bookings'
+
+    order_slot_id = Column(Integer, ForeignKey('order_slots.id'), nullable=False)
+    slot_date = Column(Date, nullable=False)
+    booked = Column(Integer, nullable=False, default=0)
+
+    __table_args__ = (
+        PrimaryKeyConstraint('order_slot_id', 'slot_date', name='pk_order_slot_bookings'),
+    )
@@ -1,11 +1,21 @@
 ## id
 ## Order slot (6:00AM, 9:00AM, 12:00PM, 3:00PM, 6:00PM, 9:00PM, 12:00AM)
 ## supermarket id (Order slots differ for each supermarket)
+## slot time (time of day in the slot's timezone, empty for the "now" slot)
+## timezone (IANA name, e.g. Asia/Dubai)
+## cutoff minutes (orders for an occurrence close this long before delivery)
+## capacity (orders accepted per occurrence, empty for unlimited)
 
-from sqlalchemy import Column, Integer, String, ForeignKey, Float, DateTime
+import os
+from sqlalchemy import Column, Integer, String, ForeignKey, Float, DateTime, Time
 from sqlalchemy.orm import relationship
 from .base import Base
 
+DEFAULT_SLOT_TIMEZONE = os.getenv("DEFAULT_SLOT_TIMEZONE", "Asia/Dubai")
+DEFAULT_SLOT_CUTOFF_MINUTES = int(os.getenv("DEFAULT_SLOT_CUTOFF_MINUTES", "30"))
+# Orders accepted per slot occurrence when seeding; unset means unlimited
+DEFAULT_SLOT_CAPACITY = int(os.getenv("DEFAULT_SLOT_CAPACITY")) if os.getenv("DEFAULT_SLOT_CAPACITY") else None
+
 # Order Slots model
 class OrderSlot(Base):
     __tablename__ = 'order_slots'
@@ -13,6 +23,10 @@ class OrderSlot(Base):
     id = Column(Integer, primary_key=True, autoincrement=True)
     supermarket_id = Column(Integer, ForeignKey("supermarkets.id"))
     delivery_time = Column(String, nullable=False)
+    slot_time = Column(Time, nullable=True)
+    timezone = Column(String, nullable=False, default=DEFAULT_SLOT_TIMEZONE)
+    cutoff_minutes = Column(Integer, nullable=False, default=DEFAULT_SLOT_CUTOFF_MINUTES)
+    capacity = Column(Integer, nullable=True)
 
     supermarket = relationship("Supermarket", back_populates="order_slots")
-    orders = relationship("Order", back_populates="order_slot")
\ No newline at end of file
+    orders = relationship("Order", back_populates="order_slot")
@@ -1,4 +1,4 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Float, DateTime, Boolean
+from sqlalchemy import Column, Integer, String, ForeignKey, Float, DateTime, Boolean, Index, text
 from sqlalchemy.orm import relationship
 from sqlalchemy.types import Enum
 from .base import Base
@@ -19,4 +19,15 @@ class SharedCart(Base):
     shared_cart_items = relationship("SharedCartItem", back_populates="shared_cart")
     contributors = relationship("SharedCartContributor", back_populates="shared_cart")
     orders = relationship("Order", back_populates="shared_cart")
-    supermarket = relationship("Supermarket", back_populates="shared_carts") 
\ No newline at end of file
+    supermarket = relationship("Supermarket", back_populates="shared_carts")
+
+    __table_args__ = (
+        # At most one open cart per building and slot; covers the matching lookup including the id
+        Index(
+            'uq_shared_carts_open_match',
+            'supermarket_id', 'address_id', 'order_slot_id',
+            unique=True,
+            postgresql_where=text("status = 'OPEN'"),
+            postgresql_include=['id'],
+        ),
+    ) 
\ No newline at end of file
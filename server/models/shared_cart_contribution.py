@@ -0,0 +1,33 @@
+## shared cart id
+## user id
+## contributor id
+## user name
+## item lines, units and cost the contributor added to the shared cart
+## delivery fee contribution (held fee until placement, split fee afterwards)
+## items (the contributor's item lines, ready to serve)
+## updated at
+
+from sqlalchemy import Column, Integer, String, ForeignKey, Float, DateTime, PrimaryKeyConstraint
+from sqlalchemy.dialects.postgresql import JSONB
+from datetime import datetime
+from .base import Base
+from .money import Money
+
+# Shared Cart Contributions model: per-contributor summary maintained on join and at placement
+class SharedCartContribution(Base):
+    __tablename__ = "shared_cart_contributions"
+
+    shared_cart_id = Column(Integer, ForeignKey("shared_carts.id"), nullable=False)
+    user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
+    contributor_id = Column(Integer, ForeignKey("shared_cart_contributors.id"), nullable=False)
+    user_name = Column(String, nullable=False)
+    item_count = Column(Integer, nullable=False, default=0)
+    item_quantity = Column(Integer, nullable=False, default=0)
+    item_total = Column(Money, nullable=False, default=0)
+    delivery_fee_contribution = Column(Money, nullable=False, default=0)
+    items = Column(JSONB, nullable=False, default=list)
+    updated_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    __table_args__ = (
+        PrimaryKeyConstraint('shared_cart_id', 'user_id', name='pk_shared_cart_contributions'),
+    )
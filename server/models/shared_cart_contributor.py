@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Float, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, Float, DateTime, UniqueConstraint
 from sqlalchemy.orm import relationship
 from .base import Base
+from .money import Money
 
 
 
@@ -10,8 +11,12 @@ class SharedCartContributor(Base):
     id = Column(Integer, primary_key=True, autoincrement=True)
     shared_cart_id = Column(Integer, ForeignKey("shared_carts.id"), nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    delivery_fee_contribution = Column(Float, nullable=True)
+    delivery_fee_contribution = Column(Money, nullable=True)
 
     shared_cart = relationship("SharedCart", back_populates="contributors")
     items = relationship("SharedCartItem", back_populates="contributor")
-    user = relationship("User", back_populates="shared_cart_contributors")
\ No newline at end of file
+    user = relationship("User", back_populates="shared_cart_contributors")
+
+    __table_args__ = (
+        UniqueConstraint('shared_cart_id', 'user_id', name='uq_shared_cart_contributor'),
+    )
\ No newline at end of file
@@ -1,6 +1,7 @@
 from sqlalchemy import Column, Integer, String, ForeignKey, Float, DateTime
 from sqlalchemy.orm import relationship
 from .base import Base
+from .money import Money
 
 
 class SharedCartItem(Base):
@@ -9,10 +10,10 @@ class SharedCartItem(Base):
     id = Column(Integer, primary_key=True, autoincrement=True)
     #order_id = Column(Integer, ForeignKey('orders.id'), nullable=False) 
     shared_cart_id = Column(Integer, ForeignKey('shared_carts.id'), nullable=False)
-    contributor_id = Column(Integer, ForeignKey("shared_cart_contributors.id"), nullable=False)
+    contributor_id = Column(Integer, ForeignKey("shared_cart_contributors.id"), nullable=False, index=True)
     item_id = Column(Integer, ForeignKey("items.id"), nullable=False)
     quantity = Column(Integer, nullable=False)
-    price = Column(Float, nullable=False)
+    price = Column(Money, nullable=False)
 
     shared_cart = relationship("SharedCart", back_populates="shared_cart_items")
     contributor = relationship("SharedCartContributor", back_populates="items")
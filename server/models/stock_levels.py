@@ -7,7 +7,7 @@ supermarket_id
 quantity
 """
 
-from sqlalchemy import Column, Integer, String, ForeignKey, Float, DateTime
+from sqlalchemy import Column, Integer, String, ForeignKey, Float, DateTime, UniqueConstraint
 from sqlalchemy.orm import relationship
 from .base import Base
 
@@ -21,4 +21,9 @@ class StockLevel(Base):
     quantity = Column(Integer, nullable=False)
 
     item = relationship("Item")
-    supermarket = relationship("Supermarket")
\ No newline at end of file
+    supermarket = relationship("Supermarket")
+
+    __table_args__ = (
+        # One stock record per item and supermarket; also serves the item listing join
+        UniqueConstraint('item_id', 'supermarket_id', name='uq_stock_item_supermarket'),
+    )
\ No newline at end of file
@@ -5,6 +5,7 @@
 from sqlalchemy import Column, Integer, String, ForeignKey, Float, DateTime
 from sqlalchemy.orm import relationship
 from .base import Base
+from .money import Money
 
 # Supermarkets model
 class Supermarket(Base):
@@ -15,7 +16,7 @@ class Supermarket(Base):
     photo_url = Column(String)
     address = Column(String, nullable=False)
     phone_number = Column(String, nullable=False)
-    delivery_fee = Column(Float, nullable=False)
+    delivery_fee = Column(Money, nullable=False)
 
     items = relationship("Item", back_populates="supermarket")
     carts = relationship("Cart", back_populates="supermarket")
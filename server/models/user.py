@@ -18,6 +18,7 @@ class User(Base):
     orders = relationship("Order", back_populates="user")
     user_orders = relationship("UserOrder", back_populates="user")
     default_address = relationship("Address")
+    user_addresses = relationship("UserAddress", back_populates="user", cascade="all, delete-orphan")
     cart = relationship("Cart", back_populates="user")
     transactions = relationship("WalletTransaction", back_populates="user", cascade="all, delete-orphan")
     wallet = relationship("Wallet", back_populates="user", uselist=False)
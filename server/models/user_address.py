@@ -0,0 +1,25 @@
+## user id
+## address id
+## created at (when the address was first linked to the user)
+
+from sqlalchemy import Column, Integer, ForeignKey, DateTime, PrimaryKeyConstraint, Index
+from sqlalchemy.orm import relationship
+from datetime import datetime
+from .base import Base
+
+# User Addresses model: the addresses each user may deliver to
+class UserAddress(Base):
+    __tablename__ = 'user_addresses'
+
+    user_id = Column(Integer, ForeignKey('users.id'), nullable=False)
+    address_id = Column(Integer, ForeignKey('addresses.id'), nullable=False)
+    created_at = Column(DateTime, nullable=False, default=datetime.utcnow)
+
+    user = relationship("User", back_populates="user_addresses")
+    address = relationship("Address")
+
+    __table_args__ = (
+        # Leading user_id serves the per-user address lookup
+        PrimaryKeyConstraint('user_id', 'address_id', name='pk_user_addresses'),
+        Index('ix_user_addresses_address_id', 'address_id'),
+    )
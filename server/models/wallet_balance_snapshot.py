@@ -0,0 +1,21 @@
+## wallet id
+## last transaction id (the snapshot covers every transaction of the wallet up to this id)
+## balance (sum of those transactions)
+## transactions since (every transaction after the snapshot was created at or after this time)
+## updated at
+
+import datetime
+from sqlalchemy import Column, Integer, DateTime, ForeignKey
+from .base import Base
+from .money import Money
+
+# Wallet Balance Snapshots model: one checkpoint per wallet, rolled forward by the compactor
+class WalletBalanceSnapshot(Base):
+    __tablename__ = 'wallet_balance_snapshots'
+
+    wallet_id = Column(Integer, ForeignKey('wallet.id', ondelete='CASCADE'), primary_key=True)
+    last_transaction_id = Column(Integer, nullable=False)
+    balance = Column(Money, nullable=False)
+    # Lower bound on created_at for the transactions after the snapshot, so balance reads skip older partitions
+    transactions_since = Column(DateTime, nullable=False)
+    updated_at = Column(DateTime, nullable=False, default=datetime.datetime.utcnow)
@@ -1,6 +1,7 @@
-from sqlalchemy import Column, Integer, String, ForeignKey, Float, DateTime, Enum
+from sqlalchemy import Column, Integer, String, ForeignKey, Float, DateTime, Enum, Index
 from sqlalchemy.orm import relationship
 from .base import Base
+from .money import Money
 import datetime
 from server.enums import TransactionType
 
@@ -11,9 +12,19 @@ class WalletTransaction(Base):
     id = Column(Integer, primary_key=True, autoincrement=True)
     wallet_id = Column(Integer, ForeignKey("wallet.id"), nullable=False)
     user_id = Column(Integer, ForeignKey("users.id"), nullable=False)
-    amount = Column(Float, nullable=False)
+    amount = Column(Money, nullable=False)
     transaction_type = Column(Enum(TransactionType), nullable=False)  # Using Enum
-    created_at = Column(DateTime, default=datetime.datetime.utcnow)
+    # Partition key, so it is part of the primary key
+    created_at = Column(DateTime, primary_key=True, default=datetime.datetime.utcnow)
 
     user = relationship("User", back_populates="transactions")
     wallet = relationship("Wallet", back_populates="transactions")
+
+    __table_args__ = (
+        # Balance reads sum a wallet's transactions after its snapshot
+        Index('ix_wallet_transactions_wallet_id_id', 'wallet_id', 'id', postgresql_include=['amount']),
+        # The compactor looks up the oldest transaction still settling
+        Index('ix_wallet_transactions_created_at', 'created_at'),
+        # Monthly partitions, see server.utils.partitions
+        {'postgresql_partition_by': 'RANGE (created_at)'},
+    )
@@ -0,0 +1,25 @@
+## Same columns, keys and indexes as wallet_transactions; its monthly partitions are
+## moved here whole once every transaction in them is covered by a balance snapshot
+
+from sqlalchemy import Column, Integer, DateTime, Enum, Index
+from .base import Base
+from .money import Money
+from server.enums import TransactionType
+
+
+# Wallet Transactions Archive model: cold, read-only months of the wallet ledger
+class WalletTransactionArchive(Base):
+    __tablename__ = "wallet_transactions_archive"
+
+    id = Column(Integer, primary_key=True)
+    wallet_id = Column(Integer, nullable=False)
+    user_id = Column(Integer, nullable=False)
+    amount = Column(Money, nullable=False)
+    transaction_type = Column(Enum(TransactionType), nullable=False)
+    created_at = Column(DateTime, primary_key=True)
+
+    __table_args__ = (
+        Index('ix_wallet_transactions_archive_wallet_id_id', 'wallet_id', 'id', postgresql_include=['amount']),
+        Index('ix_wallet_transactions_archive_created_at', 'created_at'),
+        {'postgresql_partition_by': 'RANGE (created_at)'},
+    )
@@ -0,0 +1,66 @@
+"""
+Maintain the monthly partitions of the wallet ledger.
+
+Usage:
+    python -m server.retention [--months-ahead 3] [--archive-after-days 90] [--retain-months 24 [--drop]]
+
+Creates the partitions of the coming --months-ahead months. With
+--archive-after-days, rolls the balance snapshots forward and moves every month
+older than that whose transactions are all covered by a snapshot from
+wallet_transactions to wallet_transactions_archive. With --retain-months,
+detaches archived months older than that many months from the archive; they
+stay in the database as standalone wallet_transactions_yYYYYmMM tables to be
+dumped, or are dropped with --drop.
+
+Moving a partition is a detach and an attach, so no row is copied or deleted
+and neither table needs vacuuming afterwards. Detaching briefly locks the
+parent table; run it off-peak.
+"""
+import argparse
+import asyncio
+import sys
+from datetime import datetime
+from server.database import SessionLocal, dispose_engines
+from server.utils.partitions import (
+    PARTITION_MONTHS_AHEAD,
+    add_months,
+    detach_archived_partitions,
+    ensure_upcoming_partitions,
+    month_start,
+)
+from server.utils.wallet import WALLET_ARCHIVE_AFTER_DAYS, compact_wallet_balances
+
+
+async def main(months_ahead: int, archive_after_days: float, retain_months: int, drop: bool) -> int:
+    try:
+        async with SessionLocal() as session:
+            created = await ensure_upcoming_partitions(session, months_ahead)
+            await session.commit()
+            print(f"Created {len(created)} partitions {created}.")
+
+            if archive_after_days > 0:
+                written = await compact_wallet_balances(session, archive_after_days=archive_after_days)
+                await session.commit()
+                if written is None:
+                    print("Another worker is compacting wallet balances; nothing archived.", file=sys.stderr)
+                    return 1
+                print(f"Rolled {written} wallet balance snapshots forward.")
+
+            if retain_months > 0:
+                before = datetime.combine(add_months(month_start(datetime.utcnow()), -retain_months), datetime.min.time())
+                detached = await detach_archived_partitions(session, before, drop)
+                await session.commit()
+                print(f"{'Dropped' if drop else 'Detached'} {len(detached)} archived partitions {detached}.")
+    finally:
+        await dispose_engines()
+    return 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--months-ahead", type=int, default=PARTITION_MONTHS_AHEAD, help="Months of partitions to create ahead")
+    parser.add_argument("--archive-after-days", type=float, default=WALLET_ARCHIVE_AFTER_DAYS, help="Archive months older than this; 0 skips archiving")
+    parser.add_argument("--retain-months", type=int, default=0, help="Detach archived months older than this; 0 keeps them all")
+    parser.add_argument("--drop", action="store_true", help="Drop detached partitions instead of keeping them as tables")
+    args = parser.parse_args()
+    sys.exit(asyncio.run(main(args.months_ahead, args.archive_after_days, args.retain_months, args.drop)))
@@ -1,6 +1,6 @@
 from .cart import CreateCartRequest, CartResponse, AddItemRequest, RemoveItemRequest, UpdateCartRequest, ViewCartResponse, CartItem, CartItemResponse, SubmitDeliveryDetailsRequest, SubmitDeliveryDetailsResponse
 from .wallet import WalletResponse, WalletTopUpRequest, WalletPaymentRequest, WalletTransactionResponse
 from .user import AccountDetailsResponse, OrderHistoryResponse, OrderSummary 
-from .order import PaymentSummaryResponse, CancelOrderResponse, TrackOrderResponse, OrderSlotsResponse, AddressesResponse, AddressResponse, CartItem, OrderItemDetail, OrderDetail, ContributorDetail, SharedOrderDetail, OrderDetailResponse, ContributorContribution
-from .items import CategoryResponse, ItemResponse, ItemListResponse
+from .order import PaymentSummaryResponse, CancelOrderResponse, TrackOrderResponse, OrderSlotsResponse, SlotAvailability, SlotWindow, SlotScheduleResponse, AddressesResponse, AddressResponse, CartItem, OrderItemDetail, OrderDetail, ContributorDetail, SharedOrderDetail, OrderDetailResponse, ContributorContribution
+from .items import CategoryResponse, ItemResponse, ItemListResponse, ItemSearchResult, ItemSearchResponse, AutocompleteResponse
 from .supermarket import SupermarketFeedResponse, Supermarket, SupermarketResponse
\ No newline at end of file
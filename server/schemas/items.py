@@ -1,5 +1,5 @@
 from pydantic import BaseModel
-from typing import List
+from typing import List, Optional
 
 # Response model for categories
 class CategoryResponse(BaseModel):
@@ -7,17 +7,37 @@ class CategoryResponse(BaseModel):
     name: str
 
 # Response model for items
+# Every field except id may be left out when the client requests a field projection
 class ItemResponse(BaseModel):
     id: int
-    name: str
-    photo_url: str
-    price: float
-    description: str
-    supermarket_id: int
+    name: Optional[str] = None
+    photo_url: Optional[str] = None
+    price: Optional[float] = None
+    description: Optional[str] = None
+    supermarket_id: Optional[int] = None
+    available_quantity: Optional[int] = None
 
 # Response model for items by category
 class ItemListResponse(BaseModel):
     category_id: int
     category_name: str
     items: List[ItemResponse]
+    next_cursor: Optional[str] = None
+
+# Response model for a single search hit
+class ItemSearchResult(ItemResponse):
+    category_id: int
+    score: float
+
+# Response model for item search
+class ItemSearchResponse(BaseModel):
+    query: str
+    total: int
+    offset: int
+    limit: int
+    results: List[ItemSearchResult]
 
+# Response model for search-as-you-type suggestions
+class AutocompleteResponse(BaseModel):
+    prefix: str
+    suggestions: List[str]
@@ -48,8 +48,30 @@ class TrackOrderResponse(BaseModel):
     message: str
 
 
+class SlotAvailability(BaseModel):
+    label: str
+    remaining_capacity: Optional[int] = None
+
+
 class OrderSlotsResponse(BaseModel):
     available_slots: List[str]
+    slots: List[SlotAvailability] = []
+
+
+class SlotWindow(BaseModel):
+    slot_id: int
+    label: str
+    timezone: str
+    delivery_at: datetime
+    cutoff_at: datetime
+    seconds_until_cutoff: int
+    remaining_capacity: Optional[int] = None
+
+
+class SlotScheduleResponse(BaseModel):
+    supermarket_id: int
+    generated_at: datetime
+    slots: List[SlotWindow]
 
 
 class AddressResponse(BaseModel):
@@ -1,10 +1,11 @@
 from pydantic import BaseModel, Field
 from datetime import datetime
+from decimal import Decimal
 
 # Request model for topping up the wallet
 class WalletTopUpRequest(BaseModel):
     user_id : int
-    amount: float = Field(..., gt=0, description="Amount to add to the wallet.")
+    amount: Decimal = Field(..., gt=0, decimal_places=2, description="Amount to add to the wallet.")
 
 # Response model for wallet operations
 class WalletResponse(BaseModel):
@@ -15,7 +16,7 @@ class WalletResponse(BaseModel):
 # Request model for paying from the wallet
 class WalletPaymentRequest(BaseModel):
     user_id : int
-    amount: float = Field(..., gt=0, description="Amount to deduct from the wallet.")
+    amount: Decimal = Field(..., gt=0, decimal_places=2, description="Amount to deduct from the wallet.")
 
 class WalletTransactionResponse(BaseModel):
     id: int
@@ -0,0 +1 @@
+from .runner import populate_database, seed_database, run_seed
@@ -0,0 +1,85 @@
+"""
+Seed the database from the CSV files.
+
+Usage:
+    python -m server.seed [--data-dir ./server/data/] [--dry-run] [--no-reset] [--chunk-size 50000]
+    python -m server.seed --delta [--data-dir ./server/data/] [--dry-run] [--chunk-size 50000]
+
+Run once per deploy, before the web workers start. Independent tables load
+concurrently in dependency order; each table's rows, rejected rows, duration,
+rows per second and any failure are printed as it finishes. Rejected rows are
+written with their line number and reason to SEED_REJECTS_DIR. Files are
+streamed --chunk-size rows at a time, each chunk committed on its own, so
+memory stays flat whatever the file size. The exit code is 1 when any table
+failed or was skipped because a table it depends on failed.
+
+--dry-run only validates the files and writes the rejected-rows reports,
+without connecting to the database.
+
+--no-reset fails the wallet_transactions table once wallet balance snapshots
+exist: balances no longer read back that far, so historical transactions
+would be left out of them.
+
+--delta imports only the rows of the supplier feeds (items, stock levels) that
+changed since the last import, without taking the service down. With --dry-run
+it reports how many rows would change.
+"""
+import argparse
+import asyncio
+import sys
+import time
+from server.database import dispose_engines
+from server.seed.runner import SEED_DATA_DIR, SeedStatus, run_seed, seed_database
+from server.seed.delta import run_delta
+from server.seed.validation import SEED_CHUNK_SIZE
+
+
+async def delta(data_dir: str, dry_run: bool, chunk_size: int) -> int:
+    started = time.perf_counter()
+    try:
+        results = await run_delta(data_dir, dry_run, chunk_size=chunk_size)
+    finally:
+        await dispose_engines()
+
+    changed = sum(result.changed for result in results)
+    failed = [result for result in results if result.failed]
+    verb = "Would upsert" if dry_run else "Upserted"
+    print(f"{verb} {changed} changed rows in {time.perf_counter() - started:.2f}s.")
+    for result in failed:
+        print(f"  {result.feed}: {result.status}: {result.error}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+async def main(data_dir: str, dry_run: bool, reset: bool, chunk_size: int) -> int:
+    started = time.perf_counter()
+    try:
+        if dry_run:
+            results = await run_seed(data_dir, dry_run=True, chunk_size=chunk_size)
+        else:
+            results = await seed_database(data_dir, reset=reset, chunk_size=chunk_size)
+    finally:
+        await dispose_engines()
+
+    rows = sum(result.rows for result in results)
+    rejected = sum(result.rejected for result in results)
+    failed = [result for result in results if result.failed]
+    done = sum(result.status in (SeedStatus.LOADED, SeedStatus.VALID) for result in results)
+    elapsed = time.perf_counter() - started
+    verb = "Validated" if dry_run else "Loaded"
+    print(f"{verb} {rows} rows from {done}/{len(results)} tables in {elapsed:.2f}s; {rejected} rows rejected.")
+    for result in failed:
+        print(f"  {result.table}: {result.status}: {result.error}", file=sys.stderr)
+    return 1 if failed else 0
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--data-dir", default=SEED_DATA_DIR, help="Folder holding the seed CSV files")
+    parser.add_argument("--dry-run", action="store_true", help="Validate the files without touching the database")
+    parser.add_argument("--chunk-size", type=int, default=SEED_CHUNK_SIZE, help="Rows read, validated and committed at a time")
+    parser.add_argument("--delta", action="store_true", help="Upsert only the changed rows of the supplier feeds")
+    parser.add_argument("--no-reset", dest="reset", action="store_false", help="Keep existing tables instead of dropping them first")
+    args = parser.parse_args()
+    if args.delta:
+        sys.exit(asyncio.run(delta(args.data_dir, args.dry_run, args.chunk_size)))
+    sys.exit(asyncio.run(main(args.data_dir, args.dry_run, args.reset, args.chunk_size)))
@@ -0,0 +1,244 @@
+"""
+Delta imports of the supplier feeds (items and stock levels).
+
+Every clean row of a feed is hashed, keyed by its natural key, and compared with
+the manifest written by the previous import. Only new or changed rows are
+upserted, in batches of INSERT ... ON CONFLICT DO UPDATE; rows whose values did
+not actually change in the database are left untouched by the conflict clause.
+Feeds are streamed and committed chunk by chunk. The manifest is replaced only
+once the whole feed went through, so after a failure the next import simply
+re-sends every changed row; upserts make that harmless. Without a manifest
+every row counts as changed.
+"""
+import os
+import time
+from dataclasses import dataclass
+from typing import Dict, List, Optional, Sequence, Tuple
+import numpy as np
+import pandas as pd
+from sqlalchemy import or_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from server.database import SessionLocal
+from server.enums import CatalogScope
+from server.models import Item, StockLevel
+from server.utils.http_cache import bump_catalog_version
+from .validation import SEED_CHUNK_SIZE, Field, iter_valid, read_chunks, records
+from .loaders import ITEM_FIELDS, STOCK_LEVEL_FIELDS
+
+# Folder holding the row-hash manifest of the last import of each feed
+SEED_MANIFEST_DIR = os.getenv("SEED_MANIFEST_DIR", "./server/data/manifests/")
+
+# Rows per INSERT ... ON CONFLICT statement
+DELTA_BATCH_SIZE = int(os.getenv("DELTA_BATCH_SIZE", "1000"))
+
+
+@dataclass(frozen=True)
+class DeltaFeed:
+    name: str
+    file_name: str
+    model: type
+    fields: Dict[str, Field]
+    key: Tuple[str, ...]
+    constraint: str
+    scopes: Tuple[CatalogScope, ...] = ()
+
+
+DELTA_FEEDS: List[DeltaFeed] = [
+    DeltaFeed(
+        "items",
+        "items.csv",
+        Item,
+        ITEM_FIELDS,
+        ("supermarket_id", "name"),
+        "uq_items_supermarket_name",
+        (CatalogScope.CATALOG,),
+    ),
+    # Stock is not versioned: the stock snapshot picks changes up within STOCK_SNAPSHOT_INTERVAL
+    DeltaFeed(
+        "stock_levels",
+        "stock_levels.csv",
+        StockLevel,
+        STOCK_LEVEL_FIELDS,
+        ("item_id", "supermarket_id"),
+        "uq_stock_item_supermarket",
+    ),
+]
+
+
+@dataclass(frozen=True)
+class DeltaResult:
+    feed: str
+    status: str
+    rows: int = 0
+    changed: int = 0
+    removed: int = 0
+    rejected: int = 0
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def failed(self) -> bool:
+        return self.status == "failed"
+
+
+def manifest_path(feed: DeltaFeed, manifest_dir: str = SEED_MANIFEST_DIR) -> str:
+    return os.path.join(manifest_dir, f"{feed.name}.manifest.csv")
+
+
+def row_hashes(frame: pd.DataFrame, key: Sequence[str]) -> pd.DataFrame:
+    """
+    (key_hash, row_hash) of every row, hashed column-wise by pandas.
+    """
+    return pd.DataFrame(
+        {
+            "key_hash": pd.util.hash_pandas_object(frame[list(key)], index=False).to_numpy(),
+            "row_hash": pd.util.hash_pandas_object(frame, index=False).to_numpy(),
+        },
+        index=frame.index,
+    )
+
+
+def empty_manifest() -> pd.DataFrame:
+    return pd.DataFrame({"key_hash": np.array([], dtype="uint64"), "row_hash": np.array([], dtype="uint64")})
+
+
+def load_manifest(path: str) -> pd.DataFrame:
+    if not os.path.exists(path):
+        return empty_manifest()
+    return pd.read_csv(path, dtype="uint64")
+
+
+def save_manifest(path: str, hashes: pd.DataFrame):
+    os.makedirs(os.path.dirname(path), exist_ok=True)
+    # Write next to the old manifest and swap, so a crash never leaves a truncated manifest
+    hashes.to_csv(f"{path}.tmp", index=False)
+    os.replace(f"{path}.tmp", path)
+
+
+def upsert_statement(feed: DeltaFeed):
+    table = feed.model.__table__
+    values = [name for name in feed.fields if name not in feed.key]
+    stmt = insert(table)
+    return stmt.on_conflict_do_update(
+        constraint=feed.constraint,
+        set_={name: stmt.excluded[name] for name in values},
+        # Skip rows the database already holds with the same values
+        where=or_(*(table.c[name].is_distinct_from(stmt.excluded[name]) for name in values)),
+    )
+
+
+async def upsert_rows(db: AsyncSession, feed: DeltaFeed, frame: pd.DataFrame, batch_size: int = DELTA_BATCH_SIZE):
+    """
+    Upsert the rows of a clean frame in batches.
+    Runs inside the caller's transaction; the caller commits.
+    """
+    stmt = upsert_statement(feed)
+    for start in range(0, len(frame), batch_size):
+        await db.execute(stmt, records(frame.iloc[start:start + batch_size]))
+
+
+async def apply_delta(
+    db: AsyncSession,
+    feed: DeltaFeed,
+    data_dir: str,
+    dry_run: bool = False,
+    manifest_dir: str = SEED_MANIFEST_DIR,
+    chunk_size: int = SEED_CHUNK_SIZE,
+) -> DeltaResult:
+    """
+    Stream a feed chunk by chunk, upserting and committing each chunk's changed rows.
+    Only the row hashes of the whole feed are kept, for the new manifest.
+    """
+    file_path = os.path.join(data_dir, feed.file_name)
+    if not os.path.exists(file_path):
+        return DeltaResult(feed.name, "missing", error=f"{feed.file_name} not found")
+    started = time.perf_counter()
+    path = manifest_path(feed, manifest_dir)
+    manifest = load_manifest(path)
+    previous = pd.MultiIndex.from_frame(manifest[["key_hash", "row_hash"]])
+    all_hashes = []
+    rows = changed = rejected = 0
+
+    async for result in read_chunks(file_path, feed.fields, chunk_size):
+        # A key repeated in one statement would hit the same row twice; the last one wins
+        clean = result.valid.drop_duplicates(subset=list(feed.key), keep="last")
+        hashes = row_hashes(clean, feed.key)
+        is_changed = ~pd.MultiIndex.from_frame(hashes).isin(previous)
+        if is_changed.any() and not dry_run:
+            await upsert_rows(db, feed, clean.loc[is_changed])
+            await db.commit()
+        all_hashes.append(hashes)
+        rows, changed, rejected = rows + len(clean), changed + int(is_changed.sum()), rejected + len(result.rejected)
+
+    hashes = pd.concat(all_hashes) if all_hashes else empty_manifest()
+    removed = int((~manifest["key_hash"].isin(hashes["key_hash"])).sum())
+    if not dry_run:
+        # Caches are invalidated once, after the whole feed is in
+        if changed and feed.scopes:
+            await bump_catalog_version(db, *feed.scopes)
+            await db.commit()
+        save_manifest(path, hashes)
+    return DeltaResult(
+        feed.name,
+        "checked" if dry_run else "applied",
+        rows,
+        changed,
+        removed,
+        rejected,
+        time.perf_counter() - started,
+    )
+
+
+def write_manifests(
+    data_dir: str,
+    feeds: Sequence[DeltaFeed] = DELTA_FEEDS,
+    manifest_dir: str = SEED_MANIFEST_DIR,
+    chunk_size: int = SEED_CHUNK_SIZE,
+):
+    """
+    Record the feeds as they were just fully loaded, so the next delta import
+    only sends what changed since.
+    """
+    for feed in feeds:
+        file_path = os.path.join(data_dir, feed.file_name)
+        if os.path.exists(file_path):
+            hashes = [
+                row_hashes(result.valid.drop_duplicates(subset=list(feed.key), keep="last"), feed.key)
+                for result in iter_valid(file_path, feed.fields, chunk_size)
+            ]
+            save_manifest(manifest_path(feed, manifest_dir), pd.concat(hashes) if hashes else empty_manifest())
+
+
+def print_delta(result: DeltaResult):
+    line = f"{result.feed:<24}{result.status:<9}{result.rows:>8} rows{result.changed:>8} changed{result.removed:>7} removed{result.rejected:>7} rejected"
+    if result.seconds:
+        line += f"{result.seconds:>8.2f}s"
+    if result.error:
+        line += f"  {result.error}"
+    print(line)
+
+
+async def run_delta(
+    data_dir: str,
+    dry_run: bool = False,
+    session_factory=SessionLocal,
+    feeds: Sequence[DeltaFeed] = DELTA_FEEDS,
+    chunk_size: int = SEED_CHUNK_SIZE,
+) -> List[DeltaResult]:
+    """
+    Apply every feed in order (items before the stock that references them), each in
+    its own transaction. Removed rows are only reported, never deleted: orders and
+    carts keep referencing them.
+    """
+    results = []
+    for feed in feeds:
+        async with session_factory() as session:
+            try:
+                result = await apply_delta(session, feed, data_dir, dry_run, chunk_size=chunk_size)
+            except Exception as e:
+                await session.rollback()
+                result = DeltaResult(feed.name, "failed", error=str(e).strip())
+        print_delta(result)
+        results.append(result)
+    return results
@@ -0,0 +1,185 @@
+"""
+CSV seed loaders, one per table. Each streams one file in chunks, validates
+every chunk in bulk against its schema, inserts and commits the clean rows
+chunk by chunk, and returns (rows loaded, rows rejected). Nothing here imports pandas directly;
+it is only loaded with the validation module, when seeding runs.
+"""
+from typing import Dict, Tuple
+from sqlalchemy import insert, select
+from sqlalchemy.ext.asyncio import AsyncSession
+from sqlalchemy.dialects.postgresql import insert as pg_insert
+from server.enums import TransactionType
+from server.models.order_slots import DEFAULT_SLOT_CAPACITY
+from server.utils.slots import NOW_SLOT
+from server.utils.partitions import WALLET_TRANSACTIONS, ensure_partitions
+from server.models import (
+    Address,
+    Category,
+    Item,
+    OrderSlot,
+    Supermarket,
+    User,
+    UserAddress,
+    Wallet,
+    StockLevel,
+    SupermarketCategory,
+    WalletTransaction,
+    WalletBalanceSnapshot,
+)
+from .validation import SEED_CHUNK_SIZE, Field, coerce, read_chunks, records
+
+ADDRESS_FIELDS: Dict[str, Field] = {"building_name": Field("str")}
+
+CATEGORY_FIELDS: Dict[str, Field] = {"name": Field("str")}
+
+SUPERMARKET_FIELDS: Dict[str, Field] = {
+    "name": Field("str"),
+    "address": Field("str"),
+    "phone_number": Field("str"),
+    "photo_url": Field("str", required=False),
+    "delivery_fee": Field("float", minimum=0),
+}
+
+ITEM_FIELDS: Dict[str, Field] = {
+    "name": Field("str"),
+    "photo_url": Field("str", required=False),
+    "price": Field("float", minimum=0),
+    "description": Field("str", required=False),
+    "category_id": Field("int", minimum=1),
+    "supermarket_id": Field("int", minimum=1),
+}
+
+ORDER_SLOT_FIELDS: Dict[str, Field] = {
+    "supermarket_id": Field("int", minimum=1),
+    "delivery_time": Field("str"),
+    "capacity": Field("int", required=False, minimum=0),
+}
+
+SLOT_TIME_FIELD = Field("time", required=False, format="%I:%M%p", null_values=(NOW_SLOT,))
+
+USER_FIELDS: Dict[str, Field] = {
+    "name": Field("str"),
+    "default_address_id": Field("int", required=False, minimum=1),
+}
+
+WALLET_FIELDS: Dict[str, Field] = {"user_id": Field("int", minimum=1)}
+
+STOCK_LEVEL_FIELDS: Dict[str, Field] = {
+    "item_id": Field("int", minimum=1),
+    "supermarket_id": Field("int", minimum=1),
+    "quantity": Field("int", minimum=0),
+}
+
+SUPERMARKET_CATEGORY_FIELDS: Dict[str, Field] = {
+    "supermarket_id": Field("int", minimum=1),
+    "category_id": Field("int", minimum=1),
+}
+
+WALLET_TRANSACTION_FIELDS: Dict[str, Field] = {
+    "user_id": Field("int", minimum=1),
+    "wallet_id": Field("int", minimum=1),
+    "amount": Field("float"),
+    "transaction_type": Field("enum", choices=TransactionType),
+    "created_at": Field("datetime", format="%Y-%m-%d %H:%M:%S"),
+}
+
+
+async def load_rows(
+    session: AsyncSession,
+    model,
+    file_path: str,
+    fields: Dict[str, Field],
+    chunk_size: int = SEED_CHUNK_SIZE,
+) -> Tuple[int, int]:
+    """
+    Bulk insert the clean rows of a file in file order, one executemany and one
+    commit per chunk, so neither the frame nor the session grows with the file.
+    """
+    loaded = rejected = 0
+    async for result in read_chunks(file_path, fields, chunk_size):
+        if not result.valid.empty:
+            await session.execute(insert(model), records(result.valid))
+        await session.commit()
+        loaded, rejected = loaded + len(result.valid), rejected + len(result.rejected)
+    return loaded, rejected
+
+
+async def populate_addresses(session: AsyncSession, file_path: str, chunk_size: int = SEED_CHUNK_SIZE):
+    return await load_rows(session, Address, file_path, ADDRESS_FIELDS, chunk_size)
+
+
+async def populate_categories(session: AsyncSession, file_path: str, chunk_size: int = SEED_CHUNK_SIZE):
+    return await load_rows(session, Category, file_path, CATEGORY_FIELDS, chunk_size)
+
+
+async def populate_supermarkets(session: AsyncSession, file_path: str, chunk_size: int = SEED_CHUNK_SIZE):
+    return await load_rows(session, Supermarket, file_path, SUPERMARKET_FIELDS, chunk_size)
+
+
+async def populate_items(session: AsyncSession, file_path: str, chunk_size: int = SEED_CHUNK_SIZE):
+    # Category and supermarket IDs are used directly from the CSV
+    return await load_rows(session, Item, file_path, ITEM_FIELDS, chunk_size)
+
+
+async def populate_order_slots(session: AsyncSession, file_path: str, chunk_size: int = SEED_CHUNK_SIZE):
+    loaded = rejected = 0
+    async for result in read_chunks(file_path, ORDER_SLOT_FIELDS, chunk_size):
+        slots = result.valid.copy()
+        # Slot labels such as "6:00AM" become a time of day; the "now" slot has none
+        slots["slot_time"], unparsed = coerce(slots["delivery_time"], SLOT_TIME_FIELD)
+        if unparsed.any():
+            print(f"Skipping order slots with unparseable labels: {sorted(slots.loc[unparsed, 'delivery_time'].unique())}")
+            slots = slots[~unparsed]
+        if DEFAULT_SLOT_CAPACITY is not None:
+            slots["capacity"] = slots["capacity"].fillna(DEFAULT_SLOT_CAPACITY)
+
+        if not slots.empty:
+            await session.execute(insert(OrderSlot), records(slots))
+        await session.commit()
+        loaded, rejected = loaded + len(slots), rejected + len(result.rejected) + int(unparsed.sum())
+    return loaded, rejected
+
+
+async def populate_users(session: AsyncSession, file_path: str, chunk_size: int = SEED_CHUNK_SIZE):
+    loaded = await load_rows(session, User, file_path, USER_FIELDS, chunk_size)
+
+    # Every user starts with their default address in their address book
+    await session.execute(
+        pg_insert(UserAddress)
+        .from_select(
+            ["user_id", "address_id"],
+            select(User.id, User.default_address_id).where(User.default_address_id.isnot(None)),
+        )
+        .on_conflict_do_nothing()
+    )
+    await session.commit()
+    return loaded
+
+
+async def populate_wallets(session: AsyncSession, file_path: str, chunk_size: int = SEED_CHUNK_SIZE):
+    return await load_rows(session, Wallet, file_path, WALLET_FIELDS, chunk_size)
+
+
+async def populate_stock_levels(session: AsyncSession, file_path: str, chunk_size: int = SEED_CHUNK_SIZE):
+    return await load_rows(session, StockLevel, file_path, STOCK_LEVEL_FIELDS, chunk_size)
+
+
+async def populate_supermarket_categories(session: AsyncSession, file_path: str, chunk_size: int = SEED_CHUNK_SIZE):
+    return await load_rows(session, SupermarketCategory, file_path, SUPERMARKET_CATEGORY_FIELDS, chunk_size)
+
+
+async def populate_wallet_transactions(session: AsyncSession, file_path: str, chunk_size: int = SEED_CHUNK_SIZE):
+    # Balance reads skip rows older than their snapshot's transactions_since, so
+    # historical rows loaded after compaction would silently drop out of every balance
+    if (await session.execute(select(WalletBalanceSnapshot.wallet_id).limit(1))).first() is not None:
+        raise ValueError("wallet balance snapshots exist; reseed with reset to load historical transactions")
+    loaded = rejected = 0
+    async for result in read_chunks(file_path, WALLET_TRANSACTION_FIELDS, chunk_size):
+        if not result.valid.empty:
+            # Historical transactions go to their own month's partition, not the default one
+            created_at = result.valid["created_at"]
+            await ensure_partitions(session, WALLET_TRANSACTIONS, created_at.min(), created_at.max())
+            await session.execute(insert(WalletTransaction), records(result.valid))
+        await session.commit()
+        loaded, rejected = loaded + len(result.valid), rejected + len(result.rejected)
+    return loaded, rejected
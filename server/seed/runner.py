@@ -0,0 +1,273 @@
+"""
+Loads the CSV seed data table by table, in dependency order.
+
+Tables are grouped into stages: every table in a stage only references tables
+from earlier stages, so a stage's tables load concurrently, each in its own
+session. Files are streamed and committed in chunks: a table that fails keeps
+the chunks committed before the failure, the tables that depend on it are
+skipped, and the rest of the seed carries on.
+"""
+import os
+import time
+import asyncio
+from dataclasses import dataclass
+from typing import Awaitable, Callable, Dict, List, Optional, Sequence, Tuple
+from sqlalchemy.ext.asyncio import AsyncSession
+from server.database import SessionLocal, setup_database, drop_all_tables
+from server.utils.http_cache import bump_catalog_version
+from server.enums import CatalogScope
+from .validation import SEED_CHUNK_SIZE, Field, iter_valid
+from .delta import DELTA_FEEDS, write_manifests
+from .loaders import (
+    ADDRESS_FIELDS,
+    CATEGORY_FIELDS,
+    SUPERMARKET_FIELDS,
+    ITEM_FIELDS,
+    ORDER_SLOT_FIELDS,
+    USER_FIELDS,
+    WALLET_FIELDS,
+    STOCK_LEVEL_FIELDS,
+    SUPERMARKET_CATEGORY_FIELDS,
+    WALLET_TRANSACTION_FIELDS,
+    populate_addresses,
+    populate_categories,
+    populate_supermarkets,
+    populate_items,
+    populate_order_slots,
+    populate_users,
+    populate_wallets,
+    populate_stock_levels,
+    populate_supermarket_categories,
+    populate_wallet_transactions,
+)
+
+# Folder holding the seed CSV files
+SEED_DATA_DIR = os.getenv("SEED_DATA_DIR", "./server/data/")
+
+
+@dataclass(frozen=True)
+class SeedTable:
+    name: str
+    file_name: str
+    loader: Callable[[AsyncSession, str, int], Awaitable[Tuple[int, int]]]
+    fields: Dict[str, Field]
+    depends_on: Tuple[str, ...] = ()
+
+
+SEED_TABLES: List[SeedTable] = [
+    SeedTable("addresses", "addresses.csv", populate_addresses, ADDRESS_FIELDS),
+    SeedTable("categories", "categories.csv", populate_categories, CATEGORY_FIELDS),
+    SeedTable("supermarkets", "supermarkets.csv", populate_supermarkets, SUPERMARKET_FIELDS),
+    SeedTable(
+        "items",
+        "items.csv",
+        populate_items,
+        ITEM_FIELDS,
+        ("categories", "supermarkets"),
+    ),
+    SeedTable(
+        "order_slots",
+        "order_slots.csv",
+        populate_order_slots,
+        ORDER_SLOT_FIELDS,
+        ("supermarkets",),
+    ),
+    SeedTable(
+        "supermarket_categories",
+        "supermarket_categories.csv",
+        populate_supermarket_categories,
+        SUPERMARKET_CATEGORY_FIELDS,
+        ("supermarkets", "categories"),
+    ),
+    SeedTable("users", "users.csv", populate_users, USER_FIELDS, ("addresses",)),
+    SeedTable("wallets", "wallet.csv", populate_wallets, WALLET_FIELDS, ("users",)),
+    SeedTable(
+        "stock_levels",
+        "stock_levels.csv",
+        populate_stock_levels,
+        STOCK_LEVEL_FIELDS,
+        ("items", "supermarkets"),
+    ),
+    SeedTable(
+        "wallet_transactions",
+        "wallet_transactions.csv",
+        populate_wallet_transactions,
+        WALLET_TRANSACTION_FIELDS,
+        ("wallets", "users"),
+    ),
+]
+
+
+class SeedStatus:
+    LOADED = "loaded"
+    VALID = "valid"
+    MISSING = "missing"
+    FAILED = "failed"
+    SKIPPED = "skipped"
+
+
+@dataclass(frozen=True)
+class TableResult:
+    table: str
+    status: str
+    rows: int = 0
+    rejected: int = 0
+    seconds: float = 0.0
+    error: Optional[str] = None
+
+    @property
+    def failed(self) -> bool:
+        return self.status in (SeedStatus.FAILED, SeedStatus.SKIPPED)
+
+    @property
+    def rows_per_second(self) -> float:
+        return self.rows / self.seconds if self.seconds > 0 else 0.0
+
+
+def seed_stages(tables: Sequence[SeedTable] = SEED_TABLES) -> List[List[SeedTable]]:
+    """
+    Group tables into stages so that every table comes after the tables it depends on.
+    Raises ValueError for unknown or circular dependencies.
+    """
+    names = {table.name for table in tables}
+    remaining = list(tables)
+    placed = set()
+    stages = []
+    while remaining:
+        stage = [
+            table for table in remaining
+            if all(dependency in placed for dependency in table.depends_on)
+        ]
+        if not stage:
+            unresolved = {
+                table.name: [d for d in table.depends_on if d not in placed]
+                for table in remaining
+            }
+            unknown = {d for deps in unresolved.values() for d in deps if d not in names}
+            raise ValueError(f"Cannot order seed tables; unknown {sorted(unknown)} or circular dependencies: {unresolved}")
+        stages.append(stage)
+        placed.update(table.name for table in stage)
+        remaining = [table for table in remaining if table.name not in placed]
+    return stages
+
+
+async def load_table(
+    table: SeedTable,
+    data_dir: str,
+    session_factory=SessionLocal,
+    chunk_size: int = SEED_CHUNK_SIZE,
+) -> TableResult:
+    file_path = os.path.join(data_dir, table.file_name)
+    if not os.path.exists(file_path):
+        return TableResult(table.name, SeedStatus.MISSING, error=f"{table.file_name} not found")
+    started = time.perf_counter()
+    async with session_factory() as session:
+        try:
+            rows, rejected = await table.loader(session, file_path, chunk_size)
+        except Exception as e:
+            await session.rollback()
+            return TableResult(table.name, SeedStatus.FAILED, seconds=time.perf_counter() - started, error=str(e).strip())
+    return TableResult(table.name, SeedStatus.LOADED, rows, rejected, time.perf_counter() - started)
+
+
+def count_valid(file_path: str, fields: Dict[str, Field], chunk_size: int) -> Tuple[int, int]:
+    rows = rejected = 0
+    for result in iter_valid(file_path, fields, chunk_size):
+        rows, rejected = rows + len(result.valid), rejected + len(result.rejected)
+    return rows, rejected
+
+
+async def validate_table(table: SeedTable, data_dir: str, chunk_size: int = SEED_CHUNK_SIZE) -> TableResult:
+    """
+    Dry-run check of one file: it parses and every row is validated against the
+    table's fields, writing the rejected-rows report. Touches no database.
+    """
+    file_path = os.path.join(data_dir, table.file_name)
+    if not os.path.exists(file_path):
+        return TableResult(table.name, SeedStatus.MISSING, error=f"{table.file_name} not found")
+    started = time.perf_counter()
+    try:
+        rows, rejected = await asyncio.to_thread(count_valid, file_path, table.fields, chunk_size)
+    except Exception as e:
+        return TableResult(table.name, SeedStatus.FAILED, error=str(e).strip())
+    return TableResult(table.name, SeedStatus.VALID, rows, rejected, time.perf_counter() - started)
+
+
+def print_result(result: TableResult, done: int, total: int):
+    line = f"[{done}/{total}] {result.table:<24}{result.status:<9}{result.rows:>8} rows{result.rejected:>7} rejected"
+    if result.seconds:
+        line += f"{result.seconds:>8.2f}s{result.rows_per_second:>10.0f} rows/s"
+    if result.error:
+        line += f"  {result.error}"
+    print(line)
+
+
+async def run_seed(
+    data_dir: str = SEED_DATA_DIR,
+    dry_run: bool = False,
+    session_factory=SessionLocal,
+    tables: Sequence[SeedTable] = SEED_TABLES,
+    report: Callable[[TableResult, int, int], None] = print_result,
+    chunk_size: int = SEED_CHUNK_SIZE,
+) -> List[TableResult]:
+    """
+    Load (or, with dry_run, only validate) every seed table stage by stage.
+    Each result is reported as soon as its table finishes. Returns the results in table order.
+    """
+    stages = seed_stages(tables)
+    results: Dict[str, TableResult] = {}
+    broken = set()
+    total = len(tables)
+
+    async def run(table: SeedTable) -> TableResult:
+        blocked = [dependency for dependency in table.depends_on if dependency in broken]
+        if blocked:
+            result = TableResult(table.name, SeedStatus.SKIPPED, error=f"depends on failed {blocked}")
+        elif dry_run:
+            result = await validate_table(table, data_dir, chunk_size)
+        else:
+            result = await load_table(table, data_dir, session_factory, chunk_size)
+        results[table.name] = result
+        report(result, len(results), total)
+        return result
+
+    for stage in stages:
+        for result in await asyncio.gather(*(run(table) for table in stage)):
+            if result.failed:
+                broken.add(result.table)
+    return [results[table.name] for table in tables]
+
+
+async def populate_database(data_dir: str = SEED_DATA_DIR, chunk_size: int = SEED_CHUNK_SIZE) -> List[TableResult]:
+    started = time.perf_counter()
+    results = await run_seed(data_dir, chunk_size=chunk_size)
+    rows = sum(result.rows for result in results)
+    failed = [result.table for result in results if result.failed]
+    elapsed = time.perf_counter() - started
+    if failed:
+        print(f"Database population finished with failures in {failed}.")
+    else:
+        print(f"Database population completed successfully: {rows} rows in {elapsed:.2f}s.")
+    return results
+
+
+async def seed_database(
+    data_dir: str = SEED_DATA_DIR,
+    reset: bool = True,
+    chunk_size: int = SEED_CHUNK_SIZE,
+) -> List[TableResult]:
+    """
+    Recreate all tables from scratch (unless reset is False) and load the CSV seed data.
+    """
+    if reset:
+        await drop_all_tables()
+    await setup_database()
+    results = await populate_database(data_dir, chunk_size)
+    # Baseline for later delta imports of the supplier feeds
+    loaded = {result.table for result in results if result.status == SeedStatus.LOADED}
+    await asyncio.to_thread(write_manifests, data_dir, [feed for feed in DELTA_FEEDS if feed.name in loaded], chunk_size=chunk_size)
+    async with SessionLocal() as session:
+        # Freshly seeded data invalidates every cached catalog response
+        await bump_catalog_version(session, *CatalogScope)
+        await session.commit()
+    return results
@@ -0,0 +1,225 @@
+"""
+Vectorized validation of seed CSV frames.
+
+Each column of a frame is coerced in bulk with pandas (to_numeric, to_datetime,
+map), which yields a mask of the rows that failed. Rows failing any column are
+rejected with the reasons joined together; the clean rows come back with
+their columns already converted to one dtype per kind (Int64, Float64, string),
+ready for a bulk insert. Files are processed in chunks of SEED_CHUNK_SIZE rows.
+"""
+import os
+import asyncio
+from enum import Enum
+from dataclasses import dataclass
+from typing import AsyncIterator, Dict, Iterator, List, Optional, Tuple, Type
+import numpy as np
+import pandas as pd
+from pandas.api.types import is_bool_dtype, is_datetime64_any_dtype, is_integer_dtype, is_numeric_dtype
+
+# Folder receiving a <file>.rejected.csv report for every file with rejected rows
+SEED_REJECTS_DIR = os.getenv("SEED_REJECTS_DIR", "./server/data/rejected/")
+
+# Rows read, validated and committed at a time
+SEED_CHUNK_SIZE = int(os.getenv("SEED_CHUNK_SIZE", "50000"))
+
+
+@dataclass(frozen=True)
+class Field:
+    """
+    How one CSV column is coerced. `kind` is one of "int", "float", "str", "datetime",
+    "time" or "enum". Optional fields may be missing or empty and then load as NULL.
+    """
+    kind: str
+    required: bool = True
+    minimum: Optional[float] = None
+    format: Optional[str] = None
+    choices: Optional[Type[Enum]] = None
+    null_values: Tuple[str, ...] = ()
+
+
+@dataclass
+class ValidationResult:
+    valid: pd.DataFrame
+    rejected: pd.DataFrame
+
+
+def missing_columns(df: pd.DataFrame, schema: Dict[str, Field]) -> List[str]:
+    return [name for name, field in schema.items() if field.required and name not in df.columns]
+
+
+def coerce(raw: pd.Series, field: Field) -> Tuple[pd.Series, pd.Series]:
+    """
+    Convert a column and return (values, bad), where `bad` marks values that are
+    present but cannot be converted, or missing from a required field.
+
+    Columns read_csv already parsed as numbers are used as they are; only text
+    columns go through string cleanup and conversion.
+    """
+    if is_numeric_dtype(raw) and not is_bool_dtype(raw):
+        empty = raw.isna()
+        source = raw
+    else:
+        text = raw.astype("string").str.strip()
+        # Explicit null markers, e.g. "now" for a slot without a time of day
+        empty = text.isna() | (text == "")
+        if field.null_values:
+            empty = empty | text.isin(field.null_values)
+        source = text.mask(empty)
+
+    if field.kind == "int":
+        values = source if is_numeric_dtype(source) else pd.to_numeric(source, errors="coerce")
+        invalid = values.isna()
+        if not is_integer_dtype(values):
+            invalid = invalid | (values % 1 != 0)
+        values = values.where(~invalid).astype("Int64")
+    elif field.kind == "float":
+        values = source if is_numeric_dtype(source) else pd.to_numeric(source, errors="coerce")
+        invalid = values.isna() | values.isin([np.inf, -np.inf])
+        values = values.astype("Float64")
+    elif field.kind == "datetime":
+        values = pd.to_datetime(source, format=field.format, errors="coerce")
+        invalid = values.isna()
+    elif field.kind == "time":
+        values = pd.to_datetime(source, format=field.format, errors="coerce").dt.time
+        invalid = values.isna()
+    elif field.kind == "enum":
+        values = source.astype("string").str.upper().map({member.name: member for member in field.choices})
+        invalid = values.isna()
+    elif field.kind == "str":
+        values = source.astype("string")
+        invalid = pd.Series(False, index=raw.index)
+    else:
+        raise ValueError(f"Unknown field kind {field.kind!r}")
+
+    if field.minimum is not None and field.kind in ("int", "float"):
+        invalid = invalid | (values < field.minimum).fillna(False).astype(bool)
+
+    bad = invalid & ~empty
+    if field.required:
+        bad = bad | empty
+    return values.where(~(empty | invalid)), bad.astype(bool)
+
+
+def validate_frame(df: pd.DataFrame, schema: Dict[str, Field], line_offset: int = 2) -> ValidationResult:
+    """
+    Validate and convert every column of `schema` at once.
+    Raises ValueError when a required column is missing altogether.
+
+    Rejected rows keep their original values, plus the CSV `line` they came from
+    (the header is line 1) and the `reason` they were rejected.
+    """
+    missing = missing_columns(df, schema)
+    if missing:
+        raise ValueError(f"missing columns {missing}")
+
+    clean = {}
+    bad_columns = {}
+    for name, field in schema.items():
+        if name not in df.columns:
+            clean[name] = pd.Series(None, index=df.index, dtype=object)
+            continue
+        clean[name], bad = coerce(df[name], field)
+        if bad.any():
+            bad_columns[name] = bad.to_numpy()
+    clean = pd.DataFrame(clean, index=df.index)
+
+    rejected_mask = np.zeros(len(df), dtype=bool)
+    for bad in bad_columns.values():
+        rejected_mask |= bad
+    rejected = df.loc[rejected_mask].copy()
+    # Reasons are only built for the rejected rows
+    reasons = [
+        "; ".join(f"invalid {name}" for name, bad in bad_columns.items() if bad[position])
+        for position in np.flatnonzero(rejected_mask)
+    ]
+    rejected.insert(0, "reason", reasons)
+    rejected.insert(0, "line", rejected.index + line_offset)
+    return ValidationResult(clean.loc[~rejected_mask], rejected)
+
+
+def column_values(series: pd.Series) -> list:
+    """
+    Python values of a column, with missing values as None. Datetimes are
+    converted as a whole rather than boxed into Timestamps one at a time.
+    """
+    if is_datetime64_any_dtype(series):
+        series = pd.Series(series.dt.to_pydatetime(), index=series.index, dtype=object)
+    if series.isna().any():
+        series = series.astype(object).where(series.notna(), None)
+    return series.tolist()
+
+
+def records(df: pd.DataFrame) -> List[dict]:
+    """
+    Rows of a clean frame as dicts for a bulk insert.
+    """
+    names = list(df.columns)
+    columns = [column_values(df[name]) for name in names]
+    return [dict(zip(names, row)) for row in zip(*columns)]
+
+
+class RejectedReport:
+    """
+    Rejected rows of one file, appended chunk by chunk to `<rejects_dir>/<file>.rejected.csv`.
+    The file is only created once a row is rejected; a stale report from an
+    earlier run is removed when nothing was rejected.
+    """
+
+    def __init__(self, file_path: str, rejects_dir: str = SEED_REJECTS_DIR):
+        stem = os.path.splitext(os.path.basename(file_path))[0]
+        self.file_name = os.path.basename(file_path)
+        self.path = os.path.join(rejects_dir, f"{stem}.rejected.csv")
+        self.rows = 0
+
+    def add(self, rejected: pd.DataFrame):
+        if rejected.empty:
+            return
+        if self.rows == 0:
+            os.makedirs(os.path.dirname(self.path), exist_ok=True)
+        rejected.to_csv(self.path, mode="w" if self.rows == 0 else "a", header=self.rows == 0, index=False)
+        self.rows += len(rejected)
+
+    def close(self) -> Optional[str]:
+        if self.rows == 0:
+            if os.path.exists(self.path):
+                os.remove(self.path)
+            return None
+        print(f"{self.rows} rows of {self.file_name} rejected, see {self.path}")
+        return self.path
+
+
+def iter_valid(file_path: str, schema: Dict[str, Field], chunk_size: int = SEED_CHUNK_SIZE) -> Iterator[ValidationResult]:
+    """
+    Read and validate a CSV file `chunk_size` rows at a time, so memory stays flat
+    whatever the file size. Rejected rows are streamed to the file's report.
+    """
+    report = RejectedReport(file_path)
+    try:
+        # Only empty cells are missing; text such as "NA" stays a value
+        with pd.read_csv(file_path, keep_default_na=False, na_values=[""], chunksize=chunk_size) as reader:
+            for chunk in reader:
+                result = validate_frame(chunk, schema)
+                report.add(result.rejected)
+                yield result
+    finally:
+        report.close()
+
+
+async def read_chunks(
+    file_path: str,
+    schema: Dict[str, Field],
+    chunk_size: int = SEED_CHUNK_SIZE,
+) -> AsyncIterator[ValidationResult]:
+    """
+    `iter_valid` for async loaders: each chunk is read and validated in a worker
+    thread, so tables loading concurrently are not blocked by it.
+    """
+    chunks = iter_valid(file_path, schema, chunk_size)
+    try:
+        while True:
+            result = await asyncio.to_thread(next, chunks, None)
+            if result is None:
+                return
+            yield result
+    finally:
+        chunks.close()
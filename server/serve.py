@@ -0,0 +1,71 @@
+"""
+Production launcher.
+
+Usage:
+    python -m server.serve
+
+Settings (environment):
+- SERVER_HOST / SERVER_LISTEN_PORT: bind address inside the container (0.0.0.0:5200)
+- WEB_CONCURRENCY:              worker processes (default: one per CPU)
+- SERVER_BACKLOG:               pending connection queue (2048)
+- SERVER_KEEPALIVE:             idle keep-alive seconds (5)
+- SERVER_GRACEFUL_TIMEOUT:      seconds to finish in-flight requests on shutdown (30)
+- SERVER_RELOAD:                1 for a single auto-reloading development process
+- EVENT_BROKER:                 set to postgres whenever WEB_CONCURRENCY is above 1
+
+uvloop and httptools are used when installed (uvicorn[standard]).
+With several workers the database is seeded once here, before the workers start,
+instead of by every worker.
+"""
+import os
+import asyncio
+import importlib.util
+import uvicorn
+from loguru import logger
+from server.utils.events import EVENT_BROKER
+
+
+
+def env_flag(name: str, default: str = "0") -> bool:
+    return os.getenv(name, default).lower() in ("1", "true", "yes")
+
+
+def main():
+    reload = env_flag("SERVER_RELOAD")
+    workers = 1 if reload else int(os.getenv("WEB_CONCURRENCY", os.cpu_count() or 1))
+
+    if workers > 1 and EVENT_BROKER == "memory":
+        logger.warning(
+            f"Running {workers} workers with EVENT_BROKER=memory: shared-cart events only reach "
+            "subscribers on the worker that published them. Set EVENT_BROKER=postgres."
+        )
+
+    if workers > 1 and env_flag("SEED_ON_STARTUP"):
+        from server.database import dispose_engines
+        from server.seed import seed_database
+
+        async def seed():
+            await seed_database()
+            await dispose_engines()
+
+        asyncio.run(seed())
+        os.environ["SEED_ON_STARTUP"] = "0"
+
+    uvicorn.run(
+        "server.app:app",
+        host=os.getenv("SERVER_HOST", "0.0.0.0"),
+        port=int(os.getenv("SERVER_LISTEN_PORT", 5200)),
+        workers=workers,
+        reload=reload,
+        loop="uvloop" if importlib.util.find_spec("uvloop") else "auto",
+        http="httptools" if importlib.util.find_spec("httptools") else "auto",
+        backlog=int(os.getenv("SERVER_BACKLOG", 2048)),
+        timeout_keep_alive=int(os.getenv("SERVER_KEEPALIVE", 5)),
+        timeout_graceful_shutdown=int(os.getenv("SERVER_GRACEFUL_TIMEOUT", 30)),
+        proxy_headers=True,
+        access_log=env_flag("SERVER_ACCESS_LOG", "1"),
+    )
+
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,38 @@
+from decimal import Decimal
+import numpy as np
+import pytest
+from server.models.money import from_cents, split_money, to_cents, to_money
+
+
+@pytest.mark.parametrize("value, cents", [
+    (Decimal("12.34"), 1234),
+    ("0.285", 29),
+    (0.285, 29),
+    (1.005, 101),
+    (7, 700),
+    (Decimal("-0.285"), -29),
+])
+def test_to_cents(value, cents):
+    assert to_cents(value) == cents
+
+
+@pytest.mark.parametrize("value, cents", [
+    (np.float64(0.285), 29),
+    (np.float64(1.005), 101),
+    (np.float32(2.5), 250),
+    (np.int64(7), 700),
+    (np.int32(-3), -300),
+])
+def test_to_cents_numpy_scalars(value, cents):
+    assert to_cents(value) == cents
+
+
+def test_to_money_rounds_to_cents():
+    assert to_money(np.float64(0.285)) == Decimal("0.29")
+    assert from_cents(np.int64(1234)) == Decimal("12.34")
+
+
+def test_split_money_adds_up():
+    shares = split_money(Decimal("10.00"), 3)
+    assert shares == [Decimal("3.34"), Decimal("3.33"), Decimal("3.33")]
+    assert sum(shares) == Decimal("10.00")
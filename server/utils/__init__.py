@@ -1,3 +1,3 @@
-from .cart import transfer_cart_items_to_shared_cart, find_or_create_shared_cart, handle_order_now, handle_schedule_order
-from .user import get_cart_by_id, get_order_by_id, get_orders_by_user_id, get_user_wallet
-from .order import automated_order_placement, parse_delivery_time, aggregate_items, deduct_delivery_fee_contributions, add_contributor_to_shared_cart
\ No newline at end of file
+from .cart import transfer_cart_items_to_shared_cart, handle_order_now, handle_schedule_order
+from .user import get_cart_by_id, get_order_by_id, get_orders_by_user_id, get_user_wallet, get_user_addresses, remember_user_address, forget_user_addresses
+from .order import automated_order_placement, find_or_create_shared_cart, parse_delivery_time, aggregate_items, deduct_delivery_fee_contributions, add_contributor_to_shared_cart
\ No newline at end of file
@@ -0,0 +1,46 @@
+import time
+from typing import Any, Dict, Hashable, Optional, Tuple
+
+
+class TTLCache:
+    """
+    Small in-process cache whose entries expire `ttl` seconds after being set.
+
+    Each worker holds its own copy, so entries may be up to `ttl` seconds stale
+    with respect to writes made by other workers.
+    """
+
+    def __init__(self, ttl: float, max_entries: int = 10000):
+        self.ttl = ttl
+        self.max_entries = max_entries
+        self._entries: Dict[Hashable, Tuple[float, Any]] = {}
+
+    def get(self, key: Hashable) -> Optional[Any]:
+        entry = self._entries.get(key)
+        if entry is None:
+            return None
+        expires_at, value = entry
+        if expires_at < time.monotonic():
+            self._entries.pop(key, None)
+            return None
+        return value
+
+    def set(self, key: Hashable, value: Any):
+        if len(self._entries) >= self.max_entries:
+            self._evict()
+        self._entries[key] = (time.monotonic() + self.ttl, value)
+
+    def invalidate(self, key: Hashable):
+        self._entries.pop(key, None)
+
+    def clear(self):
+        self._entries.clear()
+
+    def _evict(self):
+        """
+        Drop expired entries, then the oldest entries if the cache is still full.
+        """
+        now = time.monotonic()
+        self._entries = {key: entry for key, entry in self._entries.items() if entry[0] >= now}
+        while len(self._entries) >= self.max_entries:
+            self._entries.pop(next(iter(self._entries)))
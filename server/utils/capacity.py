@@ -0,0 +1,86 @@
+import os
+from typing import Dict, List, Optional
+from fastapi import HTTPException
+from sqlalchemy import select, tuple_
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from server.models import OrderSlotBooking
+from server.utils.cache import TTLCache
+from server.utils.slots import SlotEntry, SlotOccurrence
+
+# Seconds a supermarket's remaining-capacity view may be served from memory
+SLOT_CAPACITY_CACHE_TTL = float(os.getenv("SLOT_CAPACITY_CACHE_TTL", "10"))
+
+# supermarket_id -> (slot occurrences, {slot_id: remaining capacity}); a display hint only, bookings are checked in the database
+_remaining_cache = TTLCache(ttl=SLOT_CAPACITY_CACHE_TTL)
+
+
+async def book_slot(db: AsyncSession, slot: SlotEntry, window: SlotOccurrence) -> int:
+    """
+    Reserve one order in the given slot occurrence and return the new booked count.
+
+    The counter is incremented by a single conditional upsert, so concurrent checkouts
+    can never push it past the slot's capacity. Runs inside the caller's transaction;
+    the reservation only becomes visible when the caller commits. Raises 409 when full.
+    """
+    if slot.capacity is not None and slot.capacity <= 0:
+        raise HTTPException(status_code=409, detail=f"Delivery slot {slot.label} is fully booked.")
+
+    stmt = insert(OrderSlotBooking).values(order_slot_id=slot.id, slot_date=window.slot_date, booked=1)
+    if slot.capacity is None:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[OrderSlotBooking.order_slot_id, OrderSlotBooking.slot_date],
+            set_={"booked": OrderSlotBooking.booked + 1},
+        )
+    else:
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[OrderSlotBooking.order_slot_id, OrderSlotBooking.slot_date],
+            set_={"booked": OrderSlotBooking.booked + 1},
+            where=OrderSlotBooking.booked < slot.capacity,
+        )
+    result = await db.execute(stmt.returning(OrderSlotBooking.booked))
+    booked = result.scalar_one_or_none()
+    if booked is None:
+        raise HTTPException(status_code=409, detail=f"Delivery slot {slot.label} is fully booked.")
+
+    _remaining_cache.invalidate(slot.supermarket_id)
+    return booked
+
+
+async def remaining_capacity(
+    db: AsyncSession,
+    supermarket_id: int,
+    slots: List[SlotEntry],
+    windows: Dict[int, SlotOccurrence],
+) -> Dict[int, Optional[int]]:
+    """
+    Remaining orders per slot id for the given upcoming occurrences; None means unlimited.
+
+    Served from a short-lived per-worker cache, so the numbers may lag real bookings by up
+    to SLOT_CAPACITY_CACHE_TTL seconds. book_slot remains the authoritative check.
+    A cached view computed for other slots, occurrences or capacities, e.g. before the registry
+    reloaded or a slot rolled over to its next day, is recomputed.
+    """
+    occurrences = tuple((slot.id, windows[slot.id].slot_date, slot.capacity) for slot in slots)
+    cached = _remaining_cache.get(supermarket_id)
+    if cached is not None and cached[0] == occurrences:
+        return cached[1]
+
+    limited = [slot for slot in slots if slot.capacity is not None]
+    booked: Dict[int, int] = {}
+    if limited:
+        result = await db.execute(
+            select(OrderSlotBooking.order_slot_id, OrderSlotBooking.booked).where(
+                tuple_(OrderSlotBooking.order_slot_id, OrderSlotBooking.slot_date).in_(
+                    [(slot.id, windows[slot.id].slot_date) for slot in limited]
+                )
+            )
+        )
+        booked = {row.order_slot_id: row.booked for row in result.all()}
+
+    remaining = {
+        slot.id: None if slot.capacity is None else max(slot.capacity - booked.get(slot.id, 0), 0)
+        for slot in slots
+    }
+    _remaining_cache.set(supermarket_id, (occurrences, remaining))
+    return remaining
@@ -1,45 +1,36 @@
-from fastapi import HTTPException
-from sqlalchemy.orm import joinedload
-from sqlalchemy import func
-from server.dependencies import AsyncSession
-from server.schemas import SubmitDeliveryDetailsRequest, SubmitDeliveryDetailsResponse
-from server.models import SharedCart, CartItems, SharedCartItem, Order, OrderSlot, Supermarket, Wallet, WalletTransaction, SharedCartContributor, OrderItem, Cart
-from server.models.shared_cart import SharedCartStatus
-from server.models.order import OrderStatus
-from server.models.carts import CartStatus
-from server.models.wallet_transaction import TransactionType
-from .user import get_cart_by_id
-from .order import get_order_slot, automated_order_placement, parse_delivery_time, aggregate_shared_cart_items, deduct_delivery_fee_contributions, add_contributor_to_shared_cart, process_payment
-from sqlalchemy import select, delete
-import asyncio
-from datetime import datetime, timedelta
 import os
-from dotenv import load_dotenv
-load_dotenv()
-
-
 import asyncio
 from datetime import datetime
-from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy.future import select
-from sqlalchemy.orm import joinedload
 from fastapi import HTTPException
+from sqlalchemy import select, update, delete
+from sqlalchemy.ext.asyncio import AsyncSession
 from server.models import (
     Cart,
-    CartItems,
     SharedCart,
     SharedCartContributor,
     SharedCartItem,
     Order,
+    OrderItem,
     WalletTransaction,
-    OrderSlot,
     Supermarket,
     Wallet,
-    User
 )
 from server.schemas import SubmitDeliveryDetailsRequest, SubmitDeliveryDetailsResponse
-from server.enums import CartStatus, SharedCartStatus, OrderStatus
-from server.utils.order import parse_delivery_time, automated_order_placement, find_or_create_shared_cart
+from server.enums import CartStatus, OrderStatus, TransactionType
+from server.utils.user import get_cart_by_id, remember_user_address, forget_user_addresses
+from server.utils.order import (
+    get_order_slot,
+    parse_delivery_time,
+    aggregate_shared_cart_items,
+    automated_order_placement,
+)
+from server.utils.slots import utc_now
+from server.utils.capacity import book_slot
+from server.utils.wallet import get_wallet_balance
+from server.models.money import ZERO
+from server.utils.shared_cart import join_shared_cart, transfer_items, TransferResult
+from server.utils.scheduler import placement_scheduler
+from server.utils.events import publish_shared_cart_event, SharedCartEventType
 
 # Enumerations and Helper Functions
 
@@ -59,23 +50,12 @@ async def validate_cart(db: AsyncSession, cart_id: int) -> Cart:
 
 async def transfer_cart_items_to_shared_cart(
     db: AsyncSession, normal_cart_id: int, shared_cart_id: int, user_id: int
-):
+) -> TransferResult:
     """
-    Transfers items from a normal cart to a shared cart.
+    Transfers items from a normal cart to a shared cart and marks the normal cart inactive.
+    Returns the transferred line, unit and cost counts.
     """
     try:
-        # Fetch all items from the normal cart
-        result = await db.execute(
-            select(CartItems).where(CartItems.cart_id == normal_cart_id)
-        )
-        cart_items = result.scalars().all()
-
-        if not cart_items:
-            print(f"No items found in the normal cart ID {normal_cart_id}.")
-            raise HTTPException(status_code=400, detail="No items found in the cart.")
-
-        #print(f"Items found in normal cart {normal_cart_id}: {[vars(item) for item in cart_items]}")
-
         # Verify the contributor is associated with the shared cart
         contributor_result = await db.execute(
             select(SharedCartContributor.id).where(
@@ -90,41 +70,17 @@ async def transfer_cart_items_to_shared_cart(
                 status_code=400, detail="Contributor not associated with the shared cart."
             )
 
-        print(f"Contributor ID for User {user_id} in Shared Cart {shared_cart_id}: {contributor_id}")
-
-        # Transfer items to the shared cart
-        for item in cart_items:
-            print(f"Transferring item {item.item_id} from normal cart {normal_cart_id} to shared cart {shared_cart_id}")
-            shared_cart_item = SharedCartItem(
-                shared_cart_id=shared_cart_id,
-                contributor_id=contributor_id,
-                item_id=item.item_id,
-                quantity=item.quantity,
-                price=item.price,
-            )
-            db.add(shared_cart_item)
-
-        # Mark the normal cart as inactive
-        cart_result = await db.execute(select(Cart).where(Cart.id == normal_cart_id))
-        normal_cart = cart_result.scalar_one_or_none()
-        if normal_cart:
-            print(f"Marking normal cart {normal_cart_id} as inactive.")
-            normal_cart.status = CartStatus.INACTIVE
-            db.add(normal_cart)
-
+        transferred = await transfer_items(db, normal_cart_id, shared_cart_id, contributor_id)
+        await db.execute(update(Cart).where(Cart.id == normal_cart_id).values(status=CartStatus.INACTIVE))
         await db.commit()
-        print(f"Successfully transferred items from cart {normal_cart_id} to shared cart {shared_cart_id}.")
-
-        # Fetch and print shared cart items for verification
-        shared_cart_items_result = await db.execute(
-            select(SharedCartItem).where(SharedCartItem.shared_cart_id == shared_cart_id)
-        )
-        shared_cart_items = shared_cart_items_result.scalars().all()
-        print("Shared Cart Items after transfer for Shared Cart {}:".format(shared_cart_id))
-        for item in shared_cart_items:
-            print(f"Item ID: {item.item_id}, Quantity: {item.quantity}, Price: {item.price}, Contributor ID: {item.contributor_id}")
+        print(f"Transferred {transferred.items} items from cart {normal_cart_id} to shared cart {shared_cart_id}.")
+        return transferred
 
+    except HTTPException:
+        await db.rollback()
+        raise
     except Exception as e:
+        await db.rollback()
         print(f"Error transferring items from normal cart {normal_cart_id} to shared cart {shared_cart_id}: {str(e)}")
         raise HTTPException(
             status_code=500, detail=f"Failed to transfer items to shared cart: {str(e)}"
@@ -161,7 +117,7 @@ async def create_order(
 
         # Step 2: Calculate total costs
         total_item_cost = sum(data["total_price"] for data in aggregated_items.values())
-        delivery_fee = shared_cart.supermarket.delivery_fee or 0.0
+        delivery_fee = shared_cart.supermarket.delivery_fee or ZERO
         total_cost = total_item_cost + delivery_fee
 
         # Step 3: Fetch the existing order for the shared cart, if any
@@ -281,7 +237,7 @@ async def handle_order_now(cart_id: int, request: SubmitDeliveryDetailsRequest,
         raise HTTPException(status_code=404, detail="Supermarket not found")
 
     total_item_cost = sum(item.quantity * item.price for item in cart.cart_items)
-    delivery_fee = supermarket.delivery_fee or 0.0
+    delivery_fee = supermarket.delivery_fee or ZERO
     total_cost = total_item_cost + delivery_fee
     print(f"Total item cost: {total_item_cost}, Delivery fee: {delivery_fee}, Total cost: {total_cost}")
 
@@ -296,10 +252,7 @@ async def handle_order_now(cart_id: int, request: SubmitDeliveryDetailsRequest,
         raise HTTPException(status_code=404, detail="Wallet not found")
 
     print(f"Calculating wallet balance for wallet_id: {wallet.id}")
-    balance_result = await db.execute(
-        select(func.sum(WalletTransaction.amount)).where(WalletTransaction.wallet_id == wallet.id)
-    )
-    balance = balance_result.scalar() or 0.0
+    balance = await get_wallet_balance(db, wallet.id)
     print(f"Current wallet balance: {balance}")
 
     if balance < total_cost:
@@ -317,6 +270,9 @@ async def handle_order_now(cart_id: int, request: SubmitDeliveryDetailsRequest,
 
     print(f"Creating order slot for supermarket_id: {cart.supermarket_id}")
     now_slot = await get_order_slot("now", cart.supermarket_id, db)
+    # Reserved in this transaction; released automatically if the order is not committed
+    await book_slot(db, now_slot, now_slot.next_window(utc_now()))
+    address_linked = await remember_user_address(db, cart.user_id, request.address_id)
 
     print(f"Creating order for cart_id: {cart.id}")
     order = Order(
@@ -345,6 +301,8 @@ async def handle_order_now(cart_id: int, request: SubmitDeliveryDetailsRequest,
 
     cart.status = CartStatus.INACTIVE
     await db.commit()
+    if address_linked:
+        await forget_user_addresses(cart.user_id)
     await db.refresh(order)
 
     print(f"Order placed successfully for cart_id: {cart.id}")
@@ -357,153 +315,56 @@ async def handle_order_now(cart_id: int, request: SubmitDeliveryDetailsRequest,
 
 async def handle_schedule_order(cart_id: int, request: SubmitDeliveryDetailsRequest, db: AsyncSession) -> SubmitDeliveryDetailsResponse:
     """
-    Handles scheduled orders: validates the cart, manages shared cart, creates or updates order, and schedules placement.
+    Handles scheduled orders: joins the cart to the matching shared cart in one transaction and schedules placement.
     """
     try:
-        # Step 1: Validate the cart
-        cart = await validate_cart(db, cart_id)
-
-        # Step 2: Fetch the order slot
+        # Step 1: Fetch the order slot
         try:
             order_slot = await get_order_slot(request.order_time, request.supermarket_id, db)
-            if not order_slot:
-                raise HTTPException(status_code=400, detail=f"Invalid delivery time: {request.order_time}.")
         except Exception as e:
             raise HTTPException(status_code=500, detail=f"Failed to fetch order slot: {str(e)}")
-        """
-        try:
-            await add_contributor_to_shared_cart(db, request.user_id, request.supermarket_id, request.address_id,order_slot.id)
-        except HTTPException as http_exc:
-            print(f"Error adding contributor: {http_exc.detail}")
-            raise http_exc
-        except Exception as e:
-            print(f"Failed to add contributor: {e}")
-            raise HTTPException(status_code=500, detail=f"Failed to add contributor: {str(e)}")
-        """
-        try:
-            shared_cart = await find_or_create_shared_cart(
-                db=db,
-                user_id=request.user_id,
-                supermarket_id=request.supermarket_id,
-                address_id=request.address_id,
-                order_slot_id=order_slot.id,
-            )
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Error finding or creating shared cart: {str(e)}")
-
-        # Step 4: Transfer items to shared cart
-        try:
-            await transfer_cart_items_to_shared_cart(
-                db,
-                normal_cart_id=cart_id,
-                shared_cart_id=shared_cart.id,
-                user_id=request.user_id,
-            )
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Failed to transfer items to shared cart: {str(e)}")
-
-        # Step 5: Fetch shared cart items
-        try:
-            shared_cart_items = await fetch_shared_cart_items(db, shared_cart.id)
-            print("Items In Shared Cart:")
-            for item in shared_cart_items:
-                print(f"Item ID: {item.item_id}, Quantity: {item.quantity}, Price: {item.price}, Contributor ID: {item.contributor_id}")
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Failed to fetch shared cart items: {str(e)}")
-
-        try:
-            # Fetch the shared cart with related contributors, items, and supermarket
-            shared_cart_result = await db.execute(
-                select(SharedCart)
-                .options(
-                    joinedload(SharedCart.orders),
-                    joinedload(SharedCart.shared_cart_items),
-                    joinedload(SharedCart.supermarket),
-                    joinedload(SharedCart.contributors)
-                        .joinedload(SharedCartContributor.user)
-                        .joinedload(User.wallet),
-                )
-                .where(SharedCart.id == shared_cart.id)
-            )
-            shared_cart = shared_cart_result.scalars().first()
-            print("Items In Shared Cart:")
-            for item in shared_cart_items:
-                print(f"Item ID: {item.item_id}, Quantity: {item.quantity}, Price: {item.price}, Contributor ID: {item.contributor_id}")
-        
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Failed to find or create shared cart: {str(e)}")
-        
-    
-        try:
-            print("Items In Shared Cart:")
-            for item in shared_cart_items:
-                print(f"Item ID: {item.item_id}, Quantity: {item.quantity}, Price: {item.price}, Contributor ID: {item.contributor_id}")
-            delivery_fee = shared_cart.supermarket.delivery_fee
-            await process_payment(db, request.user_id, delivery_fee, shared_cart_items)
-            print(f"Deducted max delivery fee contributions and item cost contributions for shared cart ID {shared_cart.id}.")
-        except HTTPException as http_exc:
-            raise http_exc
-        except Exception as e:
-            print(f"Failed to deduct delivery fee contributions: {e}")
-            raise HTTPException(status_code=500, detail=f"Failed to deduct delivery fee contributions: {str(e)}")
-
-        
-        try:
-            shared_cart = await find_or_create_shared_cart(
-                db,
-                user_id=request.user_id,
-                supermarket_id=request.supermarket_id,
-                address_id=request.address_id,
-                order_slot_id=order_slot.id,
-            )
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Failed to find or create shared cart: {str(e)}")
-        
-        try:
-            order = await create_order(
-                db=db,
-                shared_cart=shared_cart,
-                shared_cart_items=shared_cart_items,
-                user_id=request.user_id,
-                address_id=request.address_id,
-                order_slot_id=order_slot.id,
-            )
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Failed to create or update the order: {str(e)}")
+        if not order_slot or order_slot.time_of_day is None:
+            raise HTTPException(status_code=400, detail=f"Invalid delivery time: {request.order_time}.")
+
+        # Step 2: Join the shared cart (contributor, items, payment, order and capacity commit together)
+        window = order_slot.next_window(utc_now())
+        joined = await join_shared_cart(
+            db,
+            cart_id=cart_id,
+            user_id=request.user_id,
+            supermarket_id=request.supermarket_id,
+            address_id=request.address_id,
+            order_slot=order_slot,
+            window=window,
+        )
 
-        try:
-            shared_cart = await find_or_create_shared_cart(
-                db,
-                user_id=request.user_id,
-                supermarket_id=request.supermarket_id,
-                address_id=request.address_id,
-                order_slot_id=order_slot.id,
-            )
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Failed to find or create shared cart: {str(e)}")
-        
-        try:
-            # Schedule automated order placement
-            environment = os.getenv("ENVIRONMENT", "production")
-            if environment == "development":
-                asyncio.create_task(automated_order_placement(db, request.user_id, shared_cart.id, delay=20))
-            else:
-                delivery_time = parse_delivery_time(request.order_time)
-                current_time = datetime.utcnow()
-                delay = max((delivery_time - current_time).total_seconds(), 0)
-                asyncio.create_task(automated_order_placement(db, request.user_id, shared_cart.id, delay=delay))
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Failed to schedule automated order placement: {str(e)}")
-        #print(f"Mode: {environment}")
-        #print("Scheduled Order")
+        # Step 3: Push the committed deltas to anyone watching the shared cart
+        if joined.contributor_created:
+            await publish_shared_cart_event(joined.shared_cart_id, SharedCartEventType.CONTRIBUTOR_JOINED, user_id=request.user_id)
+        await publish_shared_cart_event(
+            joined.shared_cart_id,
+            SharedCartEventType.ITEMS_ADDED,
+            user_id=request.user_id,
+            items=joined.items_transferred,
+            item_cost=joined.item_cost,
+        )
+        await publish_shared_cart_event(
+            joined.shared_cart_id,
+            SharedCartEventType.ORDER_UPDATED,
+            order_id=joined.order_id,
+            created=joined.order_created,
+        )
 
-        try:
-            await deactivate_cart(db, cart_id)
-        except Exception as e:
-            raise HTTPException(status_code=500, detail=f"Failed to deactivate cart: {str(e)}")
+        # Step 4: Schedule automated order placement once the slot stops accepting orders
+        environment = os.getenv("ENVIRONMENT", "production")
+        if environment == "development":
+            delay = 20
+        else:
+            delay = (window.cutoff_at - utc_now()).total_seconds()
+        placement_scheduler.schedule(joined.shared_cart_id, delay)
 
         return SubmitDeliveryDetailsResponse(
-            cart_id=shared_cart.id,
+            cart_id=joined.shared_cart_id,
             delivery_time=request.order_time,
             message="Items added to the shared cart successfully. The order will be processed automatically.",
         )
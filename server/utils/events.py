@@ -0,0 +1,194 @@
+import os
+import json
+import asyncio
+from decimal import Decimal
+from contextlib import asynccontextmanager
+from typing import Any, AsyncIterator, Callable, Dict, List, Optional, Set
+from loguru import logger
+from server.utils.slots import utc_now
+
+# Fan-out backend for shared-cart events: "memory" (single worker) or "postgres" (LISTEN/NOTIFY across workers)
+EVENT_BROKER = os.getenv("EVENT_BROKER", "memory").lower()
+
+# Events buffered per subscriber before the oldest are dropped
+EVENT_QUEUE_SIZE = int(os.getenv("EVENT_QUEUE_SIZE", "100"))
+
+# Postgres notification channel shared by all workers
+NOTIFY_CHANNEL = "shared_cart_events"
+
+# Connections each worker may use at once to publish events with the postgres broker
+EVENT_PUBLISH_POOL_SIZE = int(os.getenv("EVENT_PUBLISH_POOL_SIZE", "4"))
+
+# Seconds between attempts to re-open a dropped listener connection
+EVENT_RECONNECT_INTERVAL = float(os.getenv("EVENT_RECONNECT_INTERVAL", "2"))
+
+
+class SharedCartEventType:
+    CONTRIBUTOR_JOINED = "contributor_joined"
+    ITEMS_ADDED = "items_added"
+    ORDER_UPDATED = "order_updated"
+    FEE_SPLIT_CHANGED = "fee_split_changed"
+    ORDER_PLACED = "order_placed"
+
+
+def shared_cart_channel(shared_cart_id: int) -> str:
+    return f"shared_cart:{shared_cart_id}"
+
+
+class MemoryBroker:
+    """
+    In-process pub/sub: every subscriber of a channel gets its own bounded queue.
+    Only reaches subscribers connected to the same worker.
+    """
+
+    def __init__(self, queue_size: int = EVENT_QUEUE_SIZE):
+        self.queue_size = queue_size
+        self._subscribers: Dict[str, Set[asyncio.Queue]] = {}
+        self._listeners: Dict[str, List[Callable[[Dict[str, Any]], None]]] = {}
+
+    async def start(self, dsn: Optional[str] = None):
+        pass
+
+    async def stop(self):
+        pass
+
+    async def publish(self, channel: str, message: Dict[str, Any]):
+        self._deliver(channel, message)
+
+    def add_listener(self, channel: str, callback: Callable[[Dict[str, Any]], None]):
+        """
+        Call `callback` with every message published on `channel`, by any worker.
+        """
+        self._listeners.setdefault(channel, []).append(callback)
+
+    def _deliver(self, channel: str, message: Dict[str, Any]):
+        for callback in self._listeners.get(channel, ()):
+            try:
+                callback(message)
+            except Exception as e:
+                logger.error(f"Event listener for {channel} failed: {e}")
+        for queue in self._subscribers.get(channel, ()):
+            if queue.full():
+                # Slow consumer: drop its oldest event rather than block publishers
+                queue.get_nowait()
+            queue.put_nowait(message)
+
+    @asynccontextmanager
+    async def subscribe(self, channel: str) -> AsyncIterator[asyncio.Queue]:
+        queue: asyncio.Queue = asyncio.Queue(maxsize=self.queue_size)
+        self._subscribers.setdefault(channel, set()).add(queue)
+        try:
+            yield queue
+        finally:
+            subscribers = self._subscribers.get(channel)
+            if subscribers is not None:
+                subscribers.discard(queue)
+                if not subscribers:
+                    self._subscribers.pop(channel, None)
+
+
+class PostgresBroker(MemoryBroker):
+    """
+    Fans events out across workers with Postgres LISTEN/NOTIFY.
+
+    Each worker holds one dedicated asyncpg connection that listens and delivers every
+    notification to the worker's local subscribers, including the publisher's own.
+    Events are published through a small pool of other connections, since an asyncpg
+    connection runs one operation at a time. A dropped listener connection is re-opened
+    in the background; events sent while it is down are not delivered to this worker.
+    """
+
+    def __init__(self, queue_size: int = EVENT_QUEUE_SIZE):
+        super().__init__(queue_size)
+        self._dsn = None
+        self._connection = None
+        self._pool = None
+        self._reconnect_task: Optional[asyncio.Task] = None
+
+    async def start(self, dsn: Optional[str] = None):
+        import asyncpg
+
+        self._dsn = dsn
+        self._pool = await asyncpg.create_pool(dsn, min_size=1, max_size=EVENT_PUBLISH_POOL_SIZE)
+        await self._listen()
+
+    async def _listen(self):
+        import asyncpg
+
+        connection = await asyncpg.connect(self._dsn)
+        await connection.add_listener(NOTIFY_CHANNEL, self._on_notification)
+        connection.add_termination_listener(self._on_termination)
+        self._connection = connection
+
+    def _on_termination(self, connection):
+        if connection is not self._connection:
+            return
+        self._connection = None
+        logger.warning("Event listener connection dropped; reconnecting.")
+        self._reconnect_task = asyncio.get_running_loop().create_task(self._reconnect())
+
+    async def _reconnect(self):
+        while self._pool is not None:
+            try:
+                await self._listen()
+                logger.info("Event listener reconnected.")
+                return
+            except Exception as e:
+                logger.error(f"Failed to reconnect the event listener: {e}")
+                await asyncio.sleep(EVENT_RECONNECT_INTERVAL)
+
+    async def stop(self):
+        pool, self._pool = self._pool, None
+        if self._reconnect_task is not None:
+            self._reconnect_task.cancel()
+            self._reconnect_task = None
+        connection, self._connection = self._connection, None
+        if connection is not None:
+            await connection.close()
+        if pool is not None:
+            await pool.close()
+
+    async def publish(self, channel: str, message: Dict[str, Any]):
+        if self._pool is None:
+            self._deliver(channel, message)
+            return
+        payload = json.dumps({"channel": channel, "message": message}, default=str)
+        await self._pool.execute("SELECT pg_notify($1, $2)", NOTIFY_CHANNEL, payload)
+
+    def _on_notification(self, connection, pid, channel, payload):
+        try:
+            envelope = json.loads(payload)
+        except ValueError:
+            logger.warning(f"Ignoring malformed event notification: {payload[:200]}")
+            return
+        self._deliver(envelope["channel"], envelope["message"])
+
+
+def create_broker(kind: str = EVENT_BROKER) -> MemoryBroker:
+    if kind == "postgres":
+        return PostgresBroker()
+    if kind != "memory":
+        logger.warning(f"Unknown EVENT_BROKER={kind!r}; using the in-memory broker.")
+    return MemoryBroker()
+
+
+# Broker used by the shared-cart event stream
+event_broker = create_broker()
+
+
+async def publish_shared_cart_event(shared_cart_id: int, event_type: str, **data: Any):
+    """
+    Publish a delta for a shared cart. Call after the change is committed.
+    Delivery is best effort: failures are logged and never fail the caller.
+    """
+    message = {
+        "type": event_type,
+        "shared_cart_id": shared_cart_id,
+        "at": utc_now().isoformat(),
+        # Amounts go out as JSON numbers, as the API serves them
+        "data": {key: float(value) if isinstance(value, Decimal) else value for key, value in data.items()},
+    }
+    try:
+        await event_broker.publish(shared_cart_channel(shared_cart_id), message)
+    except Exception as e:
+        logger.error(f"Failed to publish {event_type} for shared cart {shared_cart_id}: {e}")
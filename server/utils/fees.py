@@ -0,0 +1,142 @@
+## Delivery-fee allocation for whole batches of shared carts, with array math over
+## the contributor rows. Amounts here are integer cents. numpy is loaded with this
+## module, so import it lazily from code on the app's cold import path.
+
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Dict, Sequence, Tuple
+import numpy as np
+from sqlalchemy import BigInteger, bindparam, func, insert, select, type_coerce, update
+from sqlalchemy.ext.asyncio import AsyncSession
+from server.enums import TransactionType
+from server.models import (
+    SharedCart,
+    SharedCartContribution,
+    SharedCartContributor,
+    Supermarket,
+    Wallet,
+    WalletTransaction,
+)
+
+
+@dataclass
+class FeeAllocation:
+    """
+    One entry per contributor, ordered by shared cart and join order.
+    `shares` and `refunds` are in cents; `remainders` holds the leftover cents of
+    each contributor's shared cart, the same for every contributor of a cart.
+    """
+    shared_cart_ids: np.ndarray
+    contributor_ids: np.ndarray
+    shares: np.ndarray
+    remainders: np.ndarray
+    refunds: np.ndarray
+
+    def __len__(self) -> int:
+        return len(self.contributor_ids)
+
+    def per_cart(self) -> Dict[int, Tuple[int, int]]:
+        """
+        (contributors, largest share in cents) by shared cart ID. The first contributor
+        of a cart carries its leftover cents, so their share is the largest.
+        """
+        shared_cart_ids, first, counts = np.unique(self.shared_cart_ids, return_index=True, return_counts=True)
+        return dict(zip(shared_cart_ids.tolist(), zip(counts.tolist(), self.shares[first].tolist())))
+
+
+def allocate_fees(shared_cart_ids, contributor_ids, fees, held) -> FeeAllocation:
+    """
+    Split each shared cart's fee between its contributors and work out their refunds.
+
+    Takes one row per contributor: the contributor's shared cart, the contributor ID
+    (join order), the cart's fee and what the contributor holds, the last two in cents.
+    A contributor is never refunded less than nothing, even if they hold less than their share.
+    """
+    shared_cart_ids = np.asarray(shared_cart_ids, dtype=np.int64)
+    contributor_ids = np.asarray(contributor_ids, dtype=np.int64)
+    fees = np.asarray(fees, dtype=np.int64)
+    held = np.asarray(held, dtype=np.int64)
+
+    # Contributors grouped by shared cart, in join order within each cart
+    order = np.lexsort((contributor_ids, shared_cart_ids))
+    shared_cart_ids, contributor_ids, fees, held = (
+        shared_cart_ids[order], contributor_ids[order], fees[order], held[order]
+    )
+    starts = np.flatnonzero(np.r_[True, shared_cart_ids[1:] != shared_cart_ids[:-1]])
+    counts = np.diff(np.r_[starts, len(shared_cart_ids)])
+    rank = np.arange(len(shared_cart_ids)) - np.repeat(starts, counts)
+
+    base, remainders = np.divmod(fees, np.repeat(counts, counts))
+    shares = base + (rank < remainders)
+    refunds = np.maximum(held - shares, 0)
+    return FeeAllocation(shared_cart_ids, contributor_ids, shares, remainders, refunds)
+
+
+async def settle_delivery_fees(db: AsyncSession, shared_cart_ids: Sequence[int]) -> FeeAllocation:
+    """
+    Allocate the delivery fee of every given shared cart, record each contributor's
+    share and refund every contributor the rest of what they held, in bulk.
+
+    The contributor rows are locked and their held amount becomes their share, so
+    settling a cart again refunds nothing.
+    Runs inside the caller's transaction; the caller commits.
+    """
+    # Raw cents, so the rows go straight into arrays
+    fee = type_coerce(Supermarket.delivery_fee, BigInteger)
+    held = type_coerce(SharedCartContributor.delivery_fee_contribution, BigInteger)
+    result = await db.execute(
+        select(
+            SharedCartContributor.shared_cart_id,
+            SharedCartContributor.id,
+            SharedCartContributor.user_id,
+            Wallet.id,
+            fee,
+            func.coalesce(held, 0),
+        )
+        .join(SharedCart, SharedCart.id == SharedCartContributor.shared_cart_id)
+        .join(Supermarket, Supermarket.id == SharedCart.supermarket_id)
+        .outerjoin(Wallet, Wallet.user_id == SharedCartContributor.user_id)
+        .where(SharedCartContributor.shared_cart_id.in_(shared_cart_ids), fee.isnot(None))
+        .with_for_update(of=SharedCartContributor)
+    )
+    rows = result.all()
+    if not rows:
+        return allocate_fees([], [], [], [])
+    cart_column, contributor_column, user_column, wallet_column, fee_column, held_column = zip(*rows)
+    allocation = allocate_fees(cart_column, contributor_column, fee_column, held_column)
+
+    contributors = allocation.contributor_ids.tolist()
+    shares = allocation.shares.tolist()
+    now = datetime.utcnow()
+    await db.execute(
+        update(SharedCartContributor.__table__)
+        .where(SharedCartContributor.id == bindparam("contributor"))
+        .values(delivery_fee_contribution=bindparam("share", type_=BigInteger)),
+        [{"contributor": contributor, "share": share} for contributor, share in zip(contributors, shares)],
+    )
+    # Keep the contribution summaries in step with the final split
+    await db.execute(
+        update(SharedCartContribution.__table__)
+        .where(SharedCartContribution.contributor_id == bindparam("contributor"))
+        .values(delivery_fee_contribution=bindparam("share", type_=BigInteger), updated_at=now),
+        [{"contributor": contributor, "share": share} for contributor, share in zip(contributors, shares)],
+    )
+
+    users = dict(zip(contributor_column, zip(user_column, wallet_column)))
+    refunds = [
+        {"wallet_id": users[contributor][1], "user_id": users[contributor][0], "amount": refund}
+        for contributor, refund in zip(contributors, allocation.refunds.tolist())
+        if refund > 0 and users[contributor][1] is not None
+    ]
+    if refunds:
+        await db.execute(
+            insert(WalletTransaction.__table__).values(
+                wallet_id=bindparam("wallet_id"),
+                user_id=bindparam("user_id"),
+                amount=bindparam("amount", type_=BigInteger),
+                transaction_type=TransactionType.REFUND,
+                created_at=now,
+            ),
+            refunds,
+        )
+    return allocation
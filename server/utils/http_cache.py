@@ -0,0 +1,98 @@
+import hashlib
+from datetime import datetime, timezone
+from email.utils import format_datetime, parsedate_to_datetime
+from typing import Iterable, Optional, Sequence
+from fastapi import Request, Response
+from sqlalchemy import select
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from server.models import CatalogVersion
+from server.enums import CatalogScope
+
+# Default Cache-Control max-age (seconds) for catalog responses
+CATALOG_MAX_AGE = 60
+
+
+async def bump_catalog_version(db: AsyncSession, *scopes: CatalogScope):
+    """
+    Increment the version of the given catalog scopes.
+    Runs inside the caller's transaction; the caller commits.
+    """
+    for scope in scopes:
+        stmt = insert(CatalogVersion).values(scope=scope.value, version=1, updated_at=datetime.utcnow())
+        stmt = stmt.on_conflict_do_update(
+            index_elements=[CatalogVersion.scope],
+            set_={"version": CatalogVersion.version + 1, "updated_at": stmt.excluded.updated_at},
+        )
+        await db.execute(stmt)
+
+
+async def get_catalog_versions(db: AsyncSession, scopes: Sequence[CatalogScope]):
+    """
+    Fetch (scope, version, updated_at) rows for the given scopes.
+    """
+    result = await db.execute(
+        select(CatalogVersion.scope, CatalogVersion.version, CatalogVersion.updated_at)
+        .where(CatalogVersion.scope.in_([scope.value for scope in scopes]))
+        .order_by(CatalogVersion.scope)
+    )
+    return result.all()
+
+
+def _etag_matches(if_none_match: str, etag: str) -> bool:
+    if if_none_match.strip() == "*":
+        return True
+    # Compare weakly: a compressed representation keeps the same validator
+    candidates = {tag.strip().removeprefix("W/") for tag in if_none_match.split(",")}
+    return etag.removeprefix("W/") in candidates
+
+
+async def conditional_get(
+    request: Request,
+    response: Response,
+    db: AsyncSession,
+    scopes: Sequence[CatalogScope],
+    extra: Iterable[str] = (),
+    max_age: int = CATALOG_MAX_AGE,
+) -> Optional[Response]:
+    """
+    Attach ETag, Last-Modified and Cache-Control headers for a catalog response.
+
+    The ETag is derived from the catalog versions of `scopes`, any `extra` validator parts,
+    and the request URL. With no scopes the database is not queried at all. Returns a 304 response when the client's copy is still current,
+    otherwise None and the caller builds the full body.
+    """
+    versions = await get_catalog_versions(db, scopes) if scopes else []
+    parts = [f"{row.scope}:{row.version}:{row.updated_at.isoformat()}" for row in versions]
+    parts.extend(extra)
+    parts.append(request.url.path)
+    parts.append(str(request.url.query))
+    etag = 'W/"' + hashlib.sha1("|".join(parts).encode()).hexdigest()[:20] + '"'
+
+    headers = {
+        "ETag": etag,
+        "Cache-Control": f"public, max-age={max_age}",
+        "Vary": "Accept-Encoding",
+    }
+    last_modified = max((row.updated_at for row in versions), default=None)
+    if last_modified is not None:
+        headers["Last-Modified"] = format_datetime(last_modified.replace(tzinfo=timezone.utc, microsecond=0), usegmt=True)
+
+    if_none_match = request.headers.get("if-none-match")
+    if_modified_since = request.headers.get("if-modified-since")
+    not_modified = False
+    if if_none_match is not None:
+        not_modified = _etag_matches(if_none_match, etag)
+    elif if_modified_since and last_modified is not None and not extra:
+        # Last-Modified only covers the versioned scopes, so it is ignored when extra validators apply
+        try:
+            since = parsedate_to_datetime(if_modified_since)
+            not_modified = last_modified.replace(tzinfo=timezone.utc, microsecond=0) <= since
+        except (TypeError, ValueError):
+            not_modified = False
+
+    if not_modified:
+        return Response(status_code=304, headers=headers)
+
+    response.headers.update(headers)
+    return None
@@ -0,0 +1,72 @@
+from typing import Optional, Tuple
+from fastapi import HTTPException
+from sqlalchemy import select, text
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from server.models import SharedCart
+from server.enums import SharedCartStatus
+
+# Predicate of the partial unique index on open shared carts (SQLAlchemy stores enum names)
+OPEN_SHARED_CART_PREDICATE = text("status = 'OPEN'")
+
+MATCH_COLUMNS = [SharedCart.supermarket_id, SharedCart.address_id, SharedCart.order_slot_id]
+
+# Times to look up or create the open shared cart before giving up
+MATCH_ATTEMPTS = 3
+
+
+async def find_open_shared_cart_id(
+    db: AsyncSession, supermarket_id: int, address_id: int, order_slot_id: int
+) -> Optional[int]:
+    """
+    Look up the id of the open shared cart for a (supermarket, address, slot) triple.
+    Served by the partial unique index uq_shared_carts_open_match.
+    """
+    result = await db.execute(
+        select(SharedCart.id).where(
+            SharedCart.supermarket_id == supermarket_id,
+            SharedCart.address_id == address_id,
+            SharedCart.order_slot_id == order_slot_id,
+            SharedCart.status == SharedCartStatus.OPEN,
+        )
+    )
+    return result.scalar()
+
+
+async def resolve_open_shared_cart_id(
+    db: AsyncSession, supermarket_id: int, address_id: int, order_slot_id: int
+) -> Tuple[int, bool]:
+    """
+    Return (shared_cart_id, created) for the open shared cart matching the triple,
+    creating the cart if there is none.
+
+    Two concurrent callers cannot both create a cart: the loser's insert hits the
+    partial unique index, does nothing, and picks up the winner's row instead. If the
+    winner's cart closes before it is read back, the insert is tried again.
+    Runs inside the caller's transaction; the caller commits.
+    """
+    for _ in range(MATCH_ATTEMPTS):
+        shared_cart_id = await find_open_shared_cart_id(db, supermarket_id, address_id, order_slot_id)
+        if shared_cart_id is not None:
+            return shared_cart_id, False
+
+        result = await db.execute(
+            insert(SharedCart)
+            .values(
+                supermarket_id=supermarket_id,
+                address_id=address_id,
+                order_slot_id=order_slot_id,
+                status=SharedCartStatus.OPEN,
+            )
+            .on_conflict_do_nothing(index_elements=MATCH_COLUMNS, index_where=OPEN_SHARED_CART_PREDICATE)
+            .returning(SharedCart.id)
+        )
+        shared_cart_id = result.scalar()
+        if shared_cart_id is not None:
+            return shared_cart_id, True
+
+        shared_cart_id = await find_open_shared_cart_id(db, supermarket_id, address_id, order_slot_id)
+        if shared_cart_id is not None:
+            return shared_cart_id, False
+
+    raise HTTPException(status_code=409, detail="Could not find an open shared cart; please try again.")
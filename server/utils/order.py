@@ -1,27 +1,29 @@
 from fastapi import HTTPException
 from sqlalchemy.orm import joinedload
-from sqlalchemy import func
 from datetime import datetime
+from decimal import Decimal
 from sqlalchemy.ext.asyncio import AsyncSession
-from sqlalchemy import select
+from sqlalchemy import select, update
 from collections import defaultdict
 import asyncio
-from typing import List, Dict, Any
-from dotenv import load_dotenv
-load_dotenv()
+from typing import List, Dict, Any, Sequence, Tuple
+from loguru import logger
 
 from server.models import (
     SharedCart,
-    Wallet,
     Supermarket,
-    Order,
     OrderSlot,
     SharedCartContributor,
+    Order,
     WalletTransaction,
-    OrderItem,
     User
 )
 from server.enums import SharedCartStatus, OrderStatus, TransactionType
+from server.utils.slots import slot_registry, parse_slot_label, SlotEntry
+from server.utils.matching import resolve_open_shared_cart_id
+from server.utils.wallet import get_user_balance
+from server.models.money import ZERO, from_cents
+from server.utils.events import publish_shared_cart_event, SharedCartEventType
 
 
 async def find_or_create_shared_cart(
@@ -36,36 +38,19 @@ async def find_or_create_shared_cart(
     Ensures that the user is added as a contributor to the shared cart.
     """
     try:
-        # Fetch the shared cart with eager loading
+        # Resolve the open cart through the matching index; creation races end in ON CONFLICT
+        shared_cart_id, created = await resolve_open_shared_cart_id(db, supermarket_id, address_id, order_slot_id)
+        if created:
+            await db.commit()
+            print(f"Created a new shared cart with ID {shared_cart_id}")
+
         shared_cart_result = await db.execute(
             select(SharedCart)
-            .options(
-                joinedload(SharedCart.shared_cart_items),
-                joinedload(SharedCart.contributors),
-                joinedload(SharedCart.supermarket)
-            )
-            .where(
-                SharedCart.supermarket_id == supermarket_id,
-                SharedCart.address_id == address_id,
-                SharedCart.order_slot_id == order_slot_id,
-                SharedCart.status == SharedCartStatus.OPEN,
-            )
+            .options(joinedload(SharedCart.supermarket))
+            .where(SharedCart.id == shared_cart_id)
         )
         shared_cart = shared_cart_result.scalars().first()
 
-        if not shared_cart:
-            # Create a new shared cart
-            shared_cart = SharedCart(
-                supermarket_id=supermarket_id,
-                address_id=address_id,
-                order_slot_id=order_slot_id,
-                status=SharedCartStatus.OPEN,
-            )
-            db.add(shared_cart)
-            await db.commit()
-            await db.refresh(shared_cart)
-            print(f"Created a new shared cart with ID {shared_cart.id}")
-
         # Check if the user is already a contributor
         contributor_result = await db.execute(
             select(SharedCartContributor)
@@ -107,153 +92,92 @@ def parse_delivery_time(delivery_time: str) -> datetime:
     Parse the delivery time string (e.g., "6:00AM") into a datetime object for today.
     """
     current_date = datetime.utcnow().date()
-    return datetime.strptime(f"{current_date} {delivery_time}", "%Y-%m-%d %I:%M%p")
+    return datetime.combine(current_date, parse_slot_label(delivery_time))
+
+
+async def place_shared_carts(db: AsyncSession, shared_cart_ids: Sequence[int]) -> Tuple[List[int], List[int]]:
+    """
+    Place the scheduled orders of the given open shared carts in one pass, e.g. every
+    cart of a slot when it closes: their delivery fees are settled together, refunding
+    every contributor in bulk, and the orders and carts are marked placed and closed
+    in the same transaction.
+    Carts already closed, without contributors or without a delivery fee are left
+    alone, so placing a cart twice is harmless. Carts locked by another transaction,
+    e.g. a join still committing, are skipped rather than waited for.
+    Returns (IDs placed, IDs skipped while locked); the caller retries the skipped ones.
+    Commits, then publishes the events of the carts placed.
+    """
+    has_contributors = (
+        select(SharedCartContributor.id)
+        .where(SharedCartContributor.shared_cart_id == SharedCart.id)
+        .exists()
+    )
+    due_carts = (
+        select(SharedCart.id, Order.id, Supermarket.delivery_fee)
+        .join(Order, Order.shared_cart_id == SharedCart.id)
+        .join(Supermarket, Supermarket.id == SharedCart.supermarket_id)
+        .where(
+            SharedCart.id.in_(shared_cart_ids),
+            SharedCart.status == SharedCartStatus.OPEN,
+            Order.status == OrderStatus.SCHEDULED,
+            Supermarket.delivery_fee.isnot(None),
+            has_contributors,
+        )
+    )
+    due = (await db.execute(due_carts.with_for_update(of=SharedCart, skip_locked=True))).all()
+    placed = [shared_cart_id for shared_cart_id, _, _ in due]
+    # Still due but held by another transaction
+    skipped = [
+        shared_cart_id
+        for shared_cart_id, _, _ in (await db.execute(due_carts.where(SharedCart.id.notin_(placed)))).all()
+    ]
+    if not due:
+        return [], skipped
+
+    # Imported here so numpy stays out of the app's cold import
+    from server.utils.fees import settle_delivery_fees
+    allocation = await settle_delivery_fees(db, placed)
+    await db.execute(
+        update(Order).where(Order.id.in_([order_id for _, order_id, _ in due])).values(status=OrderStatus.PLACED)
+    )
+    await db.execute(update(SharedCart).where(SharedCart.id.in_(placed)).values(status=SharedCartStatus.CLOSED))
+    await db.commit()
+
+    splits = allocation.per_cart()
+    for shared_cart_id, order_id, delivery_fee in due:
+        contributors, share = splits.get(shared_cart_id, (0, 0))
+        await publish_shared_cart_event(
+            shared_cart_id,
+            SharedCartEventType.FEE_SPLIT_CHANGED,
+            contributors=contributors,
+            delivery_fee=delivery_fee,
+            delivery_fee_contribution=from_cents(share),
+        )
+        await publish_shared_cart_event(shared_cart_id, SharedCartEventType.ORDER_PLACED, order_id=order_id)
+    logger.info(f"Placed {len(placed)} shared carts, refunded {from_cents(allocation.refunds.sum())} in delivery fees.")
+    return placed, skipped
 
 
 async def automated_order_placement(db: AsyncSession, user_id : int, shared_cart_id: int, delay: int):
     """
     Finalize the order for the shared cart at the scheduled time.
+    Single-cart form of place_shared_carts, which the placement scheduler calls for
+    every cart closing at the same time.
     """
     await asyncio.sleep(delay)
-    print("In automated_order_placement")
-
     try:
-        # Fetch the shared cart and associated order
-        try:
-            shared_cart_result = await db.execute(
-                select(SharedCart)
-                .options(
-                    joinedload(SharedCart.orders),  
-                    joinedload(SharedCart.shared_cart_items),
-                    joinedload(SharedCart.supermarket),
-                    joinedload(SharedCart.contributors)
-                )
-                .where(SharedCart.id == shared_cart_id)
-            )
-            shared_cart = shared_cart_result.scalars().first()
-
-            for item in shared_cart.shared_cart_items:
-                print(f"In automatic order placement: Item ID: {item.item_id}, Quantity: {item.quantity}, Price: {item.price}, Contributor ID: {item.contributor_id}")
-        
-            if not shared_cart:
-                raise HTTPException(status_code=400, detail="Shared cart not found.")
-
-            # Ensure there is an order associated with this shared cart
-            if not shared_cart.orders:
-                raise HTTPException(status_code=400, detail="No order associated with this shared cart.")
-            
-            order = shared_cart.orders[0] 
-        except Exception as e:
-            print(f"Error in automated_order_placement--fetching shared cart and associated order: {e}")
-            return
-        
-        try:
-            # Fetch delivery fee from the supermarket
-            delivery_fee = shared_cart.supermarket.delivery_fee
-            if delivery_fee is None:
-                print(f"Supermarket delivery fee not set for shared cart ID {shared_cart_id}.")
-                return 
-        except Exception as e:
-            print(f"Error in automated_order_placement--fetching delivery fee from the supermarket: {e}")
-            return
-         
-        try:
-            contributors = shared_cart.contributors
-            if not contributors:
-                print(f"No contributors found in shared cart ID {shared_cart_id}.")
-                return  # Early exit since no contributors exist
-        except Exception as e:
-            print(f"Error in automated_order_placement--fetching contributors: {e}")
-            return 
-
-        # Update delivery fee contributions if necessary
-        await update_delivery_fee_contribution(db, shared_cart)
-
-        # Aggregate shared cart items
-        #aggregated_items = await aggregate_shared_cart_items(shared_cart.shared_cart_items)
-
-        # Calculate total item cost
-        #total_item_cost = sum(data["total_price"] for data in aggregated_items.values())
-
-        # Calculate total cost (items + delivery fee)
-        #total_cost = total_item_cost + delivery_fee
-
-        # Update the order details
-        order.status = OrderStatus.PLACED
-        #order.total_amount = total_cost
-        db.add(order)
-
-        # Add aggregated items to the order
-        #for item_id, data in aggregated_items.items():
-        #        order_item = OrderItem(
-        #            order_id=order.id,
-       #             item_id=item_id,
-       #             quantity=data["quantity"],
-       #             price=data["total_price"] / data["quantity"], 
-       #         )
-       #         db.add(order_item)
-
-        # Update shared cart status to CLOSED
-        shared_cart.status = SharedCartStatus.CLOSED
-        db.add(shared_cart)
-
-        # Commit the changes to update the order and cart
-        await db.commit()
-
-        # Calculate the split of the delivery fee among contributors
-        num_contributors = len(contributors)
-        split_delivery_fee = delivery_fee / num_contributors
-        print(f"SPLIT DELIVERY FEE: {split_delivery_fee}")
-
-        
-        # Process refunds: Contributors are refunded the difference between their initial contribution and the split fee
-        #for contributor in contributors:
-        initial_contribution = delivery_fee
-        print(f"INITIAL CONTRIBUTION: {initial_contribution}")
-        refund_amount = initial_contribution - split_delivery_fee
-        print(f"REFUND AMOUNT: {refund_amount}")
-
-        if refund_amount > 0:
-            try:
-                    # Use the process_payment function to issue a refund
-                    await process_payment_by_amount(
-                        db=db,
-                        user_id=user_id,
-                        amount=refund_amount,
-                        transaction_type=TransactionType.REFUND,
-                    )
-                    print(f"Refund of {refund_amount} processed for User ID {user_id}")
-            except Exception as e:
-                print(f"Failed to process refund for User ID {user_id}: {e}")
-
-                
-        # Commit the refunds to the database
-        await db.commit()
-        
-
+        _, skipped = await place_shared_carts(db, [shared_cart_id])
+        if skipped:
+            logger.warning(f"Shared cart {shared_cart_id} is locked by another transaction; not placed.")
     except Exception as e:
+        await db.rollback()
         print(f"Internal Server Error in automated_order_placement for shared cart ID {shared_cart_id}: {e}")
 
-async def update_delivery_fee_contribution(db: AsyncSession, shared_cart: SharedCart):
-    """
-    Updates the delivery fee contributions for each contributor based on the finalized order.
-    """
-    # Example logic:
-    total_delivery_fee = shared_cart.supermarket.delivery_fee
-    num_contributors = len(shared_cart.contributors)
-    split_delivery_fee = total_delivery_fee / num_contributors
-
-    for contributor in shared_cart.contributors:
-        contributor.delivery_fee_contribution = split_delivery_fee
-        db.add(contributor)
-
-    await db.commit()
-
 async def aggregate_shared_cart_items(shared_cart_items):
     """
     Aggregate items from the shared cart by item_id.
     """
-    aggregated_items = defaultdict(lambda: {"quantity": 0, "total_price": 0.0})
+    aggregated_items = defaultdict(lambda: {"quantity": 0, "total_price": ZERO})
 
     for shared_cart_item in shared_cart_items:
         item_id = shared_cart_item.item_id
@@ -262,16 +186,25 @@ async def aggregate_shared_cart_items(shared_cart_items):
 
     return aggregated_items
 
-async def get_order_slot(slot : str, supermarket_id : int, db: AsyncSession) -> OrderSlot:
+async def get_order_slot(slot : str, supermarket_id : int, db: AsyncSession) -> SlotEntry:
     """
-    Fetch the 'now' order slot
+    Fetch an order slot by its label (e.g. "now", "6:00AM") from the slot registry.
+    Falls back to the database and reloads the registry when the slot is not cached yet.
     """
+    await slot_registry.ensure_loaded(db)
+    entry = slot_registry.get(supermarket_id, slot)
+    if entry:
+        return entry
+
     result = await db.execute(
-        select(OrderSlot).where(OrderSlot.delivery_time == slot, OrderSlot.supermarket_id == supermarket_id)
+        select(OrderSlot.id).where(OrderSlot.delivery_time == slot, OrderSlot.supermarket_id == supermarket_id)
     )
-    now_slot = result.scalars().first()
+    if result.scalar() is None:
+        return None
 
-    return now_slot
+    logger.info(f"Order slot {slot} for supermarket {supermarket_id} missing from registry; reloading.")
+    await slot_registry.load(db)
+    return slot_registry.get(supermarket_id, slot)
 
 def aggregate_items(items: List[Any]) -> List[Dict[str, Any]]:
     """
@@ -283,7 +216,7 @@ def aggregate_items(items: List[Any]) -> List[Dict[str, Any]]:
     Returns:
     - List of dictionaries with aggregated item details.
     """
-    aggregated = defaultdict(lambda: {"quantity": 0, "total_cost": 0.0, "price": 0.0, "item": None})
+    aggregated = defaultdict(lambda: {"quantity": 0, "total_cost": ZERO, "price": ZERO, "item": None})
 
     for item in items:
         item_id = item.item.id  # Assuming `item` relationship is loaded
@@ -327,7 +260,7 @@ async def deduct_delivery_fee_contributions(db: AsyncSession, shared_cart: Share
         print(f"Initial Contribution for user {user_id} is {initial_contribution}")
 
         # Calculate current balance
-        balance = await get_wallet_balance(db, user_id)
+        balance = await get_user_balance(db, user_id)
         print(f"User ID {user_id} - Current Balance: {balance}")
 
         if balance < initial_contribution:
@@ -347,7 +280,7 @@ async def deduct_delivery_fee_contributions(db: AsyncSession, shared_cart: Share
         )
         db.add(wallet_transaction)
         print(f"Deducted {initial_contribution} from User ID {user_id}'s wallet.")
-        balance = await get_wallet_balance(db, user_id)
+        balance = await get_user_balance(db, user_id)
         print(f"User ID {user_id} - Current Balance: {balance}")
 
 
@@ -356,15 +289,6 @@ async def deduct_delivery_fee_contributions(db: AsyncSession, shared_cart: Share
     print(f"Deducted delivery fee contributions from {len(contributors)} contributors.")
 
 
-async def get_wallet_balance(db: AsyncSession, user_id: int) -> float:
-    result = await db.execute(
-        select(func.sum(WalletTransaction.amount))
-        .where(WalletTransaction.user_id == user_id)
-    )
-    total = result.scalar() or 0.0
-    return total
-
-
 async def add_contributor_to_shared_cart(
     db: AsyncSession, user_id: int, supermarket_id: int, address_id: int, order_slot_id: int
 ):
@@ -452,7 +376,7 @@ async def add_contributor_to_shared_cart(
 async def process_payment(
     db: AsyncSession,
     user_id: int,
-    delivery_fee: float,
+    delivery_fee: Decimal,
     shared_cart_items
 ):
     print(f"In Process Payment For User: {user_id}")
@@ -479,7 +403,7 @@ async def process_payment(
     wallet_id = user.wallet.id
 
     # Get the user's wallet balance
-    wallet_balance = await get_wallet_balance(db, user_id)
+    wallet_balance = await get_user_balance(db, user_id)
 
     # Calculate total cost for the user
 
@@ -524,7 +448,7 @@ async def process_payment(
 async def process_payment_by_amount(
     db: AsyncSession,
     user_id: int,
-    amount: float,
+    amount: Decimal,
     transaction_type: TransactionType = TransactionType.DEBIT,
 ):
     """
@@ -552,7 +476,7 @@ async def process_payment_by_amount(
     wallet_id = user.wallet.id
 
     # Get the user's wallet balance
-    wallet_balance = await get_wallet_balance(db, user_id)
+    wallet_balance = await get_user_balance(db, user_id)
 
     # For DEBIT transactions, ensure sufficient balance
     if transaction_type == TransactionType.DEBIT and wallet_balance < amount:
@@ -0,0 +1,30 @@
+import base64
+import json
+from typing import Any, Tuple
+from fastapi import HTTPException
+
+
+def encode_cursor(sort_value: Any, row_id: int, sort_by: str, order: str) -> str:
+    """
+    Encode the last row of a page as an opaque keyset cursor, along with the
+    sort it was taken from.
+    """
+    # Decimal amounts are kept as exact strings
+    payload = json.dumps([sort_by, order, sort_value, row_id], separators=(",", ":"), default=str)
+    return base64.urlsafe_b64encode(payload.encode()).decode().rstrip("=")
+
+
+def decode_cursor(cursor: str, sort_by: str, order: str) -> Tuple[Any, int]:
+    """
+    Decode a cursor produced by encode_cursor into (sort_value, row_id).
+    Raises 400 when the cursor is malformed or was taken from a different sort.
+    """
+    try:
+        padded = cursor + "=" * (-len(cursor) % 4)
+        cursor_sort_by, cursor_order, sort_value, row_id = json.loads(base64.urlsafe_b64decode(padded.encode()))
+        row_id = int(row_id)
+    except (ValueError, TypeError) as e:
+        raise HTTPException(status_code=400, detail="Invalid pagination cursor.") from e
+    if (cursor_sort_by, cursor_order) != (sort_by, order):
+        raise HTTPException(status_code=400, detail="Pagination cursor does not match the requested sort.")
+    return sort_value, row_id
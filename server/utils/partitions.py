@@ -0,0 +1,204 @@
+import os
+import re
+import asyncio
+from dataclasses import dataclass
+from datetime import date, datetime
+from typing import Dict, List
+from sqlalchemy import text
+from sqlalchemy.ext.asyncio import AsyncSession
+from loguru import logger
+
+# Monthly partitions created ahead of the current month, so inserts never land in the default partition
+PARTITION_MONTHS_AHEAD = int(os.getenv("PARTITION_MONTHS_AHEAD", "3"))
+
+# Seconds between partition maintenance runs; 0 disables the background maintainer
+PARTITION_MAINTENANCE_INTERVAL = float(os.getenv("PARTITION_MAINTENANCE_INTERVAL", "3600"))
+
+# Advisory lock serializing partition DDL across workers
+PARTITION_MAINTENANCE_LOCK = 815_003
+
+# Start of a monthly range in a partition bound expression
+PARTITION_BOUND = re.compile(r"FROM \('(\d{4})-(\d{2})-01")
+
+
+@dataclass(frozen=True)
+class PartitionedTable:
+    """
+    A table range-partitioned by month on `created_at`, and the table its old
+    partitions are moved to. Both must have the same columns and partition key.
+    """
+    name: str
+    archive: str
+
+
+WALLET_TRANSACTIONS = PartitionedTable("wallet_transactions", "wallet_transactions_archive")
+
+PARTITIONED_TABLES: List[PartitionedTable] = [WALLET_TRANSACTIONS]
+
+
+def month_start(moment) -> date:
+    return date(moment.year, moment.month, 1)
+
+
+def add_months(month: date, months: int) -> date:
+    index = month.year * 12 + month.month - 1 + months
+    return date(index // 12, index % 12 + 1, 1)
+
+
+def partition_name(table: str, month: date) -> str:
+    return f"{table}_y{month.year:04d}m{month.month:02d}"
+
+
+async def list_partitions(db: AsyncSession, table: str) -> Dict[date, str]:
+    """
+    Monthly partitions currently attached to `table`, by the month their range starts.
+    Read from the partition bounds, since archived partitions keep the name they had in the ledger.
+    """
+    result = await db.execute(
+        text(
+            "SELECT child.relname, pg_get_expr(child.relpartbound, child.oid) FROM pg_inherits "
+            "JOIN pg_class child ON child.oid = pg_inherits.inhrelid "
+            "WHERE pg_inherits.inhparent = CAST(:table AS regclass)"
+        ),
+        {"table": table},
+    )
+    partitions = {}
+    for name, bound in result.all():
+        # e.g. FOR VALUES FROM ('2026-10-01 00:00:00') TO ('2026-11-01 00:00:00'); the default partition has none
+        start = PARTITION_BOUND.search(bound)
+        if start is not None:
+            partitions[date(int(start.group(1)), int(start.group(2)), 1)] = name
+    return partitions
+
+
+async def ensure_partitions(db: AsyncSession, table: PartitionedTable, first: date, last: date) -> List[str]:
+    """
+    Create the default partition and every missing monthly partition from `first` to `last`.
+    A month whose rows already sit in the default partition is skipped with a warning.
+    Returns the names of the partitions created.
+    Runs inside the caller's transaction; the caller commits.
+    """
+    await db.execute(text("SELECT pg_advisory_xact_lock(:lock)"), {"lock": PARTITION_MAINTENANCE_LOCK})
+    await db.execute(text(f"CREATE TABLE IF NOT EXISTS {table.name}_default PARTITION OF {table.name} DEFAULT"))
+    existing = await list_partitions(db, table.name)
+    created = []
+    month = month_start(first)
+    while month <= month_start(last):
+        end = add_months(month, 1)
+        if month not in existing:
+            bounds = {"start": month, "end": end}
+            stranded = await db.execute(
+                text(f"SELECT EXISTS (SELECT 1 FROM {table.name}_default WHERE created_at >= :start AND created_at < :end)"),
+                bounds,
+            )
+            if stranded.scalar():
+                logger.warning(f"Rows for {month:%Y-%m} are in {table.name}_default; not creating its partition.")
+            else:
+                name = partition_name(table.name, month)
+                await db.execute(
+                    text(f"CREATE TABLE {name} PARTITION OF {table.name} FOR VALUES FROM ('{month}') TO ('{end}')")
+                )
+                created.append(name)
+        month = end
+    return created
+
+
+async def ensure_upcoming_partitions(db: AsyncSession, months_ahead: int = PARTITION_MONTHS_AHEAD) -> List[str]:
+    """
+    Partitions of every partitioned table from the current month to `months_ahead` months later.
+    Runs inside the caller's transaction; the caller commits.
+    """
+    this_month = month_start(datetime.utcnow())
+    created = []
+    for table in PARTITIONED_TABLES:
+        created += await ensure_partitions(db, table, this_month, add_months(this_month, months_ahead))
+    return created
+
+
+async def fully_snapshotted(db: AsyncSession, partition: str) -> bool:
+    """
+    Whether every transaction in a wallet_transactions partition is covered by its
+    wallet's balance snapshot, so moving it out of the ledger leaves balances unchanged.
+    """
+    result = await db.execute(
+        text(
+            f"SELECT NOT EXISTS (SELECT 1 FROM {partition} t "
+            "LEFT JOIN wallet_balance_snapshots s ON s.wallet_id = t.wallet_id "
+            "WHERE s.wallet_id IS NULL OR t.id > s.last_transaction_id)"
+        )
+    )
+    return bool(result.scalar())
+
+
+async def archive_partitions(db: AsyncSession, before: datetime, table: PartitionedTable = WALLET_TRANSACTIONS) -> List[str]:
+    """
+    Move every monthly partition of `table` that ends before `before` to its archive
+    table: a detach and an attach, without copying or deleting any row. Partitions
+    holding transactions not yet covered by a balance snapshot stay in place.
+    Returns the names of the partitions moved.
+    Runs inside the caller's transaction; the caller commits.
+    """
+    await db.execute(text("SELECT pg_advisory_xact_lock(:lock)"), {"lock": PARTITION_MAINTENANCE_LOCK})
+    moved = []
+    for month, name in sorted((await list_partitions(db, table.name)).items()):
+        end = add_months(month, 1)
+        if end > before.date():
+            break
+        # Blocks writes to the partition until commit, so the check below stays true
+        await db.execute(text(f"LOCK TABLE {name} IN SHARE MODE"))
+        if not await fully_snapshotted(db, name):
+            logger.info(f"Keeping {name}: some of its transactions are not covered by a balance snapshot yet.")
+            break
+        await db.execute(text(f"ALTER TABLE {table.name} DETACH PARTITION {name}"))
+        await db.execute(text(f"ALTER TABLE {table.archive} ATTACH PARTITION {name} FOR VALUES FROM ('{month}') TO ('{end}')"))
+        moved.append(name)
+    return moved
+
+
+async def detach_archived_partitions(
+    db: AsyncSession,
+    before: datetime,
+    drop: bool = False,
+    table: PartitionedTable = WALLET_TRANSACTIONS,
+) -> List[str]:
+    """
+    Retention: detach every archived partition that ends before `before`. Detached
+    partitions are left as standalone tables, ready to be dumped, unless `drop` is set.
+    Returns the names of the partitions detached.
+    Runs inside the caller's transaction; the caller commits.
+    """
+    await db.execute(text("SELECT pg_advisory_xact_lock(:lock)"), {"lock": PARTITION_MAINTENANCE_LOCK})
+    detached = []
+    for month, name in sorted((await list_partitions(db, table.archive)).items()):
+        if add_months(month, 1) > before.date():
+            break
+        await db.execute(text(f"ALTER TABLE {table.archive} DETACH PARTITION {name}"))
+        if drop:
+            await db.execute(text(f"DROP TABLE {name}"))
+        detached.append(name)
+    return detached
+
+
+class PartitionMaintainer:
+    """
+    Background loop creating the monthly partitions of the coming months.
+    """
+
+    async def run(self, session_factory, interval: float = PARTITION_MAINTENANCE_INTERVAL):
+        """
+        Create upcoming partitions now and then every `interval` seconds.
+        """
+        while True:
+            try:
+                async with session_factory() as session:
+                    created = await ensure_upcoming_partitions(session)
+                    await session.commit()
+                if created:
+                    logger.info(f"Created partitions {created}.")
+            except Exception as e:
+                logger.error(f"Failed to create upcoming partitions: {e}")
+            await asyncio.sleep(interval)
+
+
+# Shared maintainer started with the app
+partition_maintainer = PartitionMaintainer()
@@ -0,0 +1,130 @@
+import os
+import time
+import asyncio
+import itertools
+from typing import Dict, List, Optional
+from sqlalchemy import text
+from loguru import logger
+
+# Comma-separated SQLAlchemy URLs of read replicas; empty keeps every read on the primary
+REPLICA_URLS = [url.strip() for url in os.getenv("REPLICA_URLS", "").split(",") if url.strip()]
+
+# Replicas lagging further behind than this many seconds are skipped
+REPLICA_MAX_LAG_SECONDS = float(os.getenv("REPLICA_MAX_LAG_SECONDS", "2"))
+
+# Seconds between replica lag checks
+REPLICA_LAG_CHECK_INTERVAL = float(os.getenv("REPLICA_LAG_CHECK_INTERVAL", "1"))
+
+# After a client's own write, its reads go to the primary for this many seconds
+READ_YOUR_WRITES_SECONDS = float(os.getenv("READ_YOUR_WRITES_SECONDS", "5"))
+
+# Cookie carrying the time until which a client's reads stick to the primary
+PRIMARY_STICKY_COOKIE = "db_primary_until"
+
+# Seconds since the last replayed transaction, or 0 when the replica has replayed everything it received
+REPLICA_LAG_QUERY = text(
+    """
+    SELECT CASE
+        WHEN NOT pg_is_in_recovery() THEN 0
+        WHEN pg_last_wal_receive_lsn() = pg_last_wal_replay_lsn() THEN 0
+        ELSE COALESCE(EXTRACT(EPOCH FROM now() - pg_last_xact_replay_timestamp()), 0)
+    END
+    """
+)
+
+
+class ReplicaRouter:
+    """
+    Chooses the session factory for read-only requests.
+
+    Replicas are used round-robin while their measured lag stays within
+    REPLICA_MAX_LAG_SECONDS; otherwise, or when the client is sticky after its own
+    write, reads fall back to the primary.
+    """
+
+    def __init__(self, primary, replicas: Optional[List] = None):
+        self.primary = primary
+        self.replicas = list(replicas or [])
+        # Unknown until the first check: replicas are not used before it
+        self.lag: Dict[int, Optional[float]] = {index: None for index in range(len(self.replicas))}
+        self._cycle = itertools.cycle(range(len(self.replicas))) if self.replicas else None
+
+    def healthy(self) -> List[int]:
+        return [
+            index for index, lag in self.lag.items()
+            if lag is not None and lag <= REPLICA_MAX_LAG_SECONDS
+        ]
+
+    def choose(self, sticky: bool = False):
+        """
+        Return the session factory to use for a read.
+        """
+        if sticky or self._cycle is None:
+            return self.primary
+        healthy = set(self.healthy())
+        if not healthy:
+            return self.primary
+        for _ in range(len(self.replicas)):
+            index = next(self._cycle)
+            if index in healthy:
+                return self.replicas[index]
+        return self.primary
+
+    async def check_lag(self):
+        for index, factory in enumerate(self.replicas):
+            try:
+                async with factory() as session:
+                    self.lag[index] = float((await session.execute(REPLICA_LAG_QUERY)).scalar() or 0)
+            except Exception as e:
+                if self.lag[index] is not None:
+                    logger.warning(f"Replica {index} unavailable, reading from the primary: {e}")
+                self.lag[index] = None
+
+    async def run(self, interval: float = REPLICA_LAG_CHECK_INTERVAL):
+        """
+        Re-measure replica lag forever, every `interval` seconds.
+        """
+        while True:
+            await self.check_lag()
+            await asyncio.sleep(interval)
+
+
+def sticky_until(cookies: Dict[str, str]) -> float:
+    try:
+        return float(cookies.get(PRIMARY_STICKY_COOKIE, 0))
+    except ValueError:
+        return 0.0
+
+
+def is_sticky(cookies: Dict[str, str]) -> bool:
+    """
+    True while the client's recent write may not have reached the replicas yet.
+    """
+    return sticky_until(cookies) > time.time()
+
+
+class ReadYourWritesMiddleware:
+    """
+    ASGI middleware that marks a client sticky to the primary after a successful write,
+    by setting PRIMARY_STICKY_COOKIE on the response.
+    """
+
+    SAFE_METHODS = {"GET", "HEAD", "OPTIONS"}
+
+    def __init__(self, app, seconds: float = READ_YOUR_WRITES_SECONDS):
+        self.app = app
+        self.seconds = seconds
+
+    async def __call__(self, scope, receive, send):
+        if scope["type"] != "http" or scope["method"] in self.SAFE_METHODS:
+            await self.app(scope, receive, send)
+            return
+
+        async def send_with_cookie(message):
+            if message["type"] == "http.response.start" and message["status"] < 400:
+                until = time.time() + self.seconds
+                cookie = f"{PRIMARY_STICKY_COOKIE}={until:.3f}; Max-Age={int(self.seconds) + 1}; Path=/; HttpOnly; SameSite=Lax"
+                message["headers"] = list(message.get("headers", [])) + [(b"set-cookie", cookie.encode("latin-1"))]
+            await send(message)
+
+        await self.app(scope, receive, send_with_cookie)
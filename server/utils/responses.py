@@ -0,0 +1,39 @@
+import os
+from typing import Any
+from fastapi.datastructures import Default
+from fastapi.responses import JSONResponse
+
+try:
+    import orjson
+except ImportError:  # orjson is optional
+    orjson = None
+
+# JSON serializer for large list responses: "default" or "orjson"
+JSON_SERIALIZER = os.getenv("JSON_SERIALIZER", "default").lower()
+
+# Responses smaller than this many bytes are sent uncompressed
+GZIP_MINIMUM_SIZE = int(os.getenv("GZIP_MINIMUM_SIZE", "1024"))
+GZIP_COMPRESS_LEVEL = int(os.getenv("GZIP_COMPRESS_LEVEL", "6"))
+
+
+class OrjsonResponse(JSONResponse):
+    """
+    JSON response rendered with orjson.
+    """
+
+    def render(self, content: Any) -> bytes:
+        return orjson.dumps(content, option=orjson.OPT_NON_STR_KEYS)
+
+
+def list_response_class():
+    """
+    Response class for endpoints returning large lists.
+
+    By default FastAPI serializes the response model straight to JSON bytes with
+    pydantic-core, which only happens while the route keeps the default response
+    class. JSON_SERIALIZER=orjson switches to orjson instead. Run
+    `python -m server.benchmarks.serialization` to compare both on realistic payloads.
+    """
+    if JSON_SERIALIZER == "orjson" and orjson is not None:
+        return OrjsonResponse
+    return Default(JSONResponse)
@@ -0,0 +1,165 @@
+import os
+import time
+import asyncio
+from datetime import timezone
+from typing import Dict, Optional, Set
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from loguru import logger
+from server.models import SharedCart, Order
+from server.enums import SharedCartStatus, OrderStatus
+from server.utils.order import place_shared_carts
+from server.utils.slots import slot_registry, utc_now
+
+# Advisory lock held by the one worker that recovers pending placements after a restart
+SCHEDULER_LEADER_LOCK = 815_001
+
+# Seconds before retrying carts that were locked by another transaction when their job ran
+PLACEMENT_RETRY_DELAY = float(os.getenv("PLACEMENT_RETRY_DELAY", "5"))
+
+
+class PlacementScheduler:
+    """
+    Places shared-cart orders when their slot closes.
+
+    Carts closing at the same second share one job, which places all of them in one
+    pass with `place_shared_carts`, so their delivery fees are settled and refunded
+    together. Each job opens its own session when it fires, so it never borrows the
+    request session that scheduled it. Pending carts are tracked so that duplicates
+    are skipped and shutdown can wait for or cancel them.
+    """
+
+    def __init__(self):
+        self.session_factory = None
+        # Close time (epoch second) -> waiting job, and the carts it places
+        self._tasks: Dict[int, asyncio.Task] = {}
+        self._due: Dict[int, Set[int]] = {}
+        # shared_cart_id -> close time of its job
+        self._scheduled: Dict[int, int] = {}
+        self._running: Set[asyncio.Task] = set()
+        self._leader_connection = None
+
+    def bind(self, session_factory):
+        self.session_factory = session_factory
+
+    @property
+    def pending(self) -> int:
+        return len(self._scheduled)
+
+    def schedule(self, shared_cart_id: int, delay: float) -> Optional[asyncio.Task]:
+        """
+        Schedule placement of a shared cart `delay` seconds from now, with every other
+        cart closing at the same second. Returns None when the cart is already pending.
+        """
+        if shared_cart_id in self._scheduled:
+            return None
+        delay = max(delay, 0)
+        close = round(time.time() + delay)
+        self._scheduled[shared_cart_id] = close
+        self._due.setdefault(close, set()).add(shared_cart_id)
+        task = self._tasks.get(close)
+        if task is None:
+            task = asyncio.create_task(self._run(close, delay))
+            self._tasks[close] = task
+            task.add_done_callback(lambda done: self._tasks.pop(close) if self._tasks.get(close) is done else None)
+        return task
+
+    async def _run(self, close: int, delay: float):
+        await asyncio.sleep(delay)
+        # From here on, carts scheduled for the same second start a new job
+        self._tasks.pop(close, None)
+        shared_cart_ids = sorted(self._due.pop(close, ()))
+        for shared_cart_id in shared_cart_ids:
+            self._scheduled.pop(shared_cart_id, None)
+        if self.session_factory is None:
+            logger.error(f"Placement scheduler is not bound to a database; shared carts {shared_cart_ids} were not placed.")
+            return
+        task = asyncio.current_task()
+        self._running.add(task)
+        try:
+            async with self.session_factory() as session:
+                placed, skipped = await place_shared_carts(session, shared_cart_ids)
+            logger.info(f"Placed {len(placed)} of {len(shared_cart_ids)} shared carts due at {close}.")
+            if skipped:
+                logger.warning(f"Shared carts {skipped} were locked; retrying in {PLACEMENT_RETRY_DELAY}s.")
+                for shared_cart_id in skipped:
+                    self.schedule(shared_cart_id, PLACEMENT_RETRY_DELAY)
+        except Exception as e:
+            logger.error(f"Failed to place shared carts {shared_cart_ids}: {e}")
+        finally:
+            self._running.discard(task)
+
+    async def drain(self, timeout: float):
+        """
+        Stop the scheduler for shutdown: placements already running get up to `timeout`
+        seconds to finish, placements still waiting are cancelled. Cancelled placements are
+        picked up again by `recover` on the next start.
+        """
+        waiting = list(self._tasks.values())
+        running = list(self._running)
+        for task in waiting:
+            task.cancel()
+        if running:
+            _, unfinished = await asyncio.wait(running, timeout=timeout)
+            for task in unfinished:
+                task.cancel()
+            if unfinished:
+                logger.warning(f"Cancelled {len(unfinished)} order placements still running after {timeout}s.")
+        logger.info(f"Placement scheduler drained: {len(running)} running, {len(waiting)} deferred to next start.")
+
+    async def acquire_leadership(self, dsn: str) -> bool:
+        """
+        Try to become the worker that recovers placements, using a session-level advisory
+        lock held on a dedicated connection until `release_leadership`.
+        """
+        import asyncpg
+
+        connection = await asyncpg.connect(dsn)
+        if await connection.fetchval("SELECT pg_try_advisory_lock($1)", SCHEDULER_LEADER_LOCK):
+            self._leader_connection = connection
+            return True
+        await connection.close()
+        return False
+
+    async def release_leadership(self):
+        if self._leader_connection is not None:
+            await self._leader_connection.close()
+            self._leader_connection = None
+
+    async def recover(self, db: AsyncSession, development: bool = False) -> int:
+        """
+        Re-schedule placements of open shared carts with a scheduled order, e.g. after a restart.
+        Carts whose cutoff passed while the server was down are placed immediately, together.
+        Returns the number of placements scheduled.
+        """
+        result = await db.execute(
+            select(
+                SharedCart.id,
+                SharedCart.supermarket_id,
+                SharedCart.order_slot_id,
+                SharedCart.created_at,
+            )
+            .join(Order, Order.shared_cart_id == SharedCart.id)
+            .where(SharedCart.status == SharedCartStatus.OPEN, Order.status == OrderStatus.SCHEDULED)
+        )
+        await slot_registry.ensure_loaded(db)
+        now = utc_now()
+        scheduled = 0
+        for row in result.all():
+            slot = slot_registry.get_by_id(row.supermarket_id, row.order_slot_id)
+            if slot is None:
+                logger.warning(f"Slot {row.order_slot_id} of shared cart {row.id} not found; placing now.")
+                delay = 0
+            elif development:
+                delay = 20
+            else:
+                # The occurrence the cart was opened for, not the next one from now
+                window = slot.next_window(row.created_at.replace(tzinfo=timezone.utc))
+                delay = (window.cutoff_at - now).total_seconds()
+            if self.schedule(row.id, delay):
+                scheduled += 1
+        return scheduled
+
+
+# Shared scheduler used by scheduled checkout
+placement_scheduler = PlacementScheduler()
@@ -0,0 +1,233 @@
+import os
+import re
+import math
+import heapq
+import asyncio
+from bisect import bisect_left
+from collections import defaultdict
+from dataclasses import dataclass
+from datetime import datetime
+from typing import Callable, Dict, List, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from loguru import logger
+from server.models import Item, CatalogVersion
+from server.enums import CatalogScope
+
+TOKEN_PATTERN = re.compile(r"[a-z0-9]+")
+
+# Matches in the item name count more than matches in the description
+NAME_WEIGHT = 3.0
+DESCRIPTION_WEIGHT = 1.0
+# Prefix expansions rank slightly below exact term matches
+PREFIX_PENALTY = 0.8
+
+# Seconds between checks of the catalog version; the index is rebuilt when it changed. 0 disables them
+SEARCH_INDEX_REFRESH_INTERVAL = float(os.getenv("SEARCH_INDEX_REFRESH_INTERVAL", "30"))
+
+
+def tokenize(text: Optional[str]) -> List[str]:
+    """
+    Lowercase the text and split it into alphanumeric tokens.
+    """
+    if not text:
+        return []
+    return TOKEN_PATTERN.findall(text.lower())
+
+
+@dataclass(frozen=True)
+class IndexedItem:
+    id: int
+    name: str
+    photo_url: Optional[str]
+    price: float
+    description: Optional[str]
+    category_id: Optional[int]
+    supermarket_id: Optional[int]
+
+
+def match_order(match: Tuple[IndexedItem, float]) -> Tuple[float, str, int]:
+    """
+    Sort key ranking (item, score) matches: best score first, then by name and id.
+    """
+    item, score = match
+    return -score, item.name, item.id
+
+
+class ItemSearchIndex:
+    """
+    In-process inverted index over item names and descriptions.
+
+    The index is rebuilt from the catalog as a whole and swapped in atomically,
+    so readers never observe a half-built index.
+    """
+
+    def __init__(self):
+        self._items: Dict[int, IndexedItem] = {}
+        self._postings: Dict[str, Dict[int, float]] = {}
+        self._terms: List[str] = []
+        self._lock = asyncio.Lock()
+        self.built_at: Optional[datetime] = None
+        self.catalog_version: Optional[int] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.built_at is not None
+
+    async def rebuild(self, db: AsyncSession) -> int:
+        """
+        Reload every item from the database and rebuild the index.
+        Returns the number of indexed items.
+        """
+        async with self._lock:
+            self.catalog_version = await self._current_version(db)
+            result = await db.execute(
+                select(
+                    Item.id,
+                    Item.name,
+                    Item.photo_url,
+                    Item.price,
+                    Item.description,
+                    Item.category_id,
+                    Item.supermarket_id,
+                )
+            )
+            self.build([IndexedItem(*row) for row in result.all()])
+            return len(self._items)
+
+    def build(self, items: List[IndexedItem]):
+        """
+        Build the index from already loaded items.
+        """
+        postings: Dict[str, Dict[int, float]] = defaultdict(dict)
+
+        for item in items:
+            weights: Dict[str, float] = defaultdict(float)
+            for token in tokenize(item.name):
+                weights[token] += NAME_WEIGHT
+            for token in tokenize(item.description):
+                weights[token] += DESCRIPTION_WEIGHT
+            for token, weight in weights.items():
+                postings[token][item.id] = weight
+
+        self._items = {item.id: item for item in items}
+        self._postings = dict(postings)
+        self._terms = sorted(postings)
+        self.built_at = datetime.utcnow()
+
+    def _expand_prefix(self, prefix: str) -> List[str]:
+        """
+        Return all indexed terms starting with the given prefix.
+        """
+        start = bisect_left(self._terms, prefix)
+        matches = []
+        for term in self._terms[start:]:
+            if not term.startswith(prefix):
+                break
+            matches.append(term)
+        return matches
+
+    def _idf(self, term: str) -> float:
+        return math.log(1 + len(self._items) / len(self._postings[term]))
+
+    def _score_token(self, token: str, prefix: bool) -> Dict[int, float]:
+        """
+        Score every item matching a single query token.
+        The last token of a query is matched as a prefix to support search-as-you-type.
+        """
+        scores: Dict[int, float] = {}
+        terms = self._expand_prefix(token) if prefix else ([token] if token in self._postings else [])
+        for term in terms:
+            factor = self._idf(term) * (1.0 if term == token else PREFIX_PENALTY)
+            for item_id, weight in self._postings[term].items():
+                score = weight * factor
+                if score > scores.get(item_id, 0.0):
+                    scores[item_id] = score
+        return scores
+
+    def search(
+        self,
+        query: str,
+        supermarket_id: Optional[int] = None,
+        offset: int = 0,
+        limit: int = 20,
+        predicate: Optional[Callable[[IndexedItem], bool]] = None,
+    ) -> Tuple[int, List[Tuple[IndexedItem, float]]]:
+        """
+        Rank items matching every token of the query.
+        An optional predicate further filters the matched items before paging.
+
+        Returns the total number of matches and the requested page of (item, score) pairs.
+        """
+        matches = self._match(query, supermarket_id, predicate)
+        matches.sort(key=match_order)
+        return len(matches), matches[offset:offset + limit]
+
+    def _match(
+        self,
+        query: str,
+        supermarket_id: Optional[int] = None,
+        predicate: Optional[Callable[[IndexedItem], bool]] = None,
+    ) -> List[Tuple[IndexedItem, float]]:
+        """
+        Unordered (item, score) pairs of the items matching every token of the query.
+        """
+        tokens = tokenize(query)
+        if not tokens:
+            return []
+
+        totals: Optional[Dict[int, float]] = None
+        for position, token in enumerate(tokens):
+            scores = self._score_token(token, prefix=position == len(tokens) - 1)
+            if totals is None:
+                totals = scores
+            else:
+                totals = {item_id: totals[item_id] + score for item_id, score in scores.items() if item_id in totals}
+            if not totals:
+                return []
+
+        return [
+            (self._items[item_id], score)
+            for item_id, score in totals.items()
+            if (supermarket_id is None or self._items[item_id].supermarket_id == supermarket_id)
+            and (predicate is None or predicate(self._items[item_id]))
+        ]
+
+    def autocomplete(self, prefix: str, supermarket_id: Optional[int] = None, limit: int = 10) -> List[str]:
+        """
+        Suggest distinct item names for a partially typed query.
+        """
+        # Best match per name, then only the top `limit` names instead of sorting every match
+        best: Dict[str, Tuple[IndexedItem, float]] = {}
+        for match in self._match(prefix, supermarket_id=supermarket_id):
+            key = match[0].name.lower()
+            if key not in best or match_order(match) < match_order(best[key]):
+                best[key] = match
+        return [item.name for item, _ in heapq.nsmallest(limit, best.values(), key=match_order)]
+
+
+    @staticmethod
+    async def _current_version(db: AsyncSession) -> Optional[int]:
+        result = await db.execute(
+            select(CatalogVersion.version).where(CatalogVersion.scope == CatalogScope.CATALOG.value)
+        )
+        return result.scalar()
+
+    async def run(self, session_factory, interval: float = SEARCH_INDEX_REFRESH_INTERVAL):
+        """
+        Rebuild the index whenever the catalog version moves, e.g. after a delta import
+        run by another process. Checks every `interval` seconds.
+        """
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                async with session_factory() as session:
+                    if await self._current_version(session) != self.catalog_version:
+                        count = await self.rebuild(session)
+                        logger.info(f"Catalog changed; rebuilt the search index with {count} items.")
+            except Exception as e:
+                logger.error(f"Failed to refresh search index: {e}")
+
+
+# Shared index used by the search endpoints
+item_search_index = ItemSearchIndex()
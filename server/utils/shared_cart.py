@@ -0,0 +1,368 @@
+from dataclasses import dataclass
+from typing import Optional, Tuple
+from datetime import datetime
+from decimal import Decimal
+from fastapi import HTTPException
+from sqlalchemy import Integer, Numeric, cast, select, update, delete, func, literal, literal_column, text
+from sqlalchemy.dialects.postgresql import insert, aggregate_order_by
+from sqlalchemy.ext.asyncio import AsyncSession
+from server.models import (
+    Cart,
+    CartItems,
+    SharedCart,
+    SharedCartContributor,
+    SharedCartItem,
+    SharedCartContribution,
+    Item,
+    User,
+    Order,
+    OrderItem,
+    Supermarket,
+    Wallet,
+    WalletTransaction,
+)
+from server.models.money import money_units
+from server.enums import CartStatus, OrderStatus, SharedCartStatus, TransactionType
+from server.utils.matching import resolve_open_shared_cart_id
+from server.utils.capacity import book_slot
+from server.utils.wallet import wallet_balance
+from server.utils.user import remember_user_address, forget_user_addresses
+from server.utils.slots import SlotEntry, SlotOccurrence
+
+# Times a join looks for an open shared cart when the one it found is placed meanwhile
+JOIN_ATTEMPTS = 3
+
+
+@dataclass(frozen=True)
+class JoinResult:
+    shared_cart_id: int
+    contributor_id: int
+    order_id: int
+    items_transferred: int
+    item_cost: Decimal
+    amount_charged: Decimal
+    contributor_created: bool
+    order_created: bool
+
+
+async def claim_cart(db: AsyncSession, cart_id: int) -> Tuple[int, int]:
+    """
+    Mark an active cart inactive and return (owner's user id, supermarket id).
+    A cart can only be claimed once, so concurrent submits of the same cart cannot both succeed.
+    """
+    result = await db.execute(
+        update(Cart)
+        .where(Cart.id == cart_id, Cart.status == CartStatus.ACTIVE)
+        .values(status=CartStatus.INACTIVE)
+        .returning(Cart.user_id, Cart.supermarket_id)
+    )
+    row = result.first()
+    if row is None:
+        raise HTTPException(status_code=400, detail="Cart is inactive or does not exist.")
+    return row.user_id, row.supermarket_id
+
+
+async def lock_open_shared_cart(db: AsyncSession, shared_cart_id: Optional[int]) -> bool:
+    """
+    Lock the shared cart row until the transaction ends and return whether it is still open.
+    FOR NO KEY UPDATE conflicts with the lock place_shared_carts takes, so a join and the
+    placement of the same cart run one after the other.
+    """
+    if shared_cart_id is None:
+        return False
+    result = await db.execute(
+        select(SharedCart.status).where(SharedCart.id == shared_cart_id).with_for_update(key_share=True)
+    )
+    return result.scalar() == SharedCartStatus.OPEN
+
+
+async def upsert_contributor(db: AsyncSession, shared_cart_id: int, user_id: int, delivery_fee: Decimal):
+    """
+    Add the user to the shared cart, or return their existing contributor row.
+    Returns (contributor_id, created).
+    """
+    stmt = insert(SharedCartContributor).values(
+        shared_cart_id=shared_cart_id,
+        user_id=user_id,
+        delivery_fee_contribution=delivery_fee,
+    )
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_shared_cart_contributor",
+        # No-op update so the existing row is returned
+        set_={"shared_cart_id": stmt.excluded.shared_cart_id},
+    ).returning(SharedCartContributor.id, literal_column("xmax = 0").label("created"))
+    row = (await db.execute(stmt)).one()
+    return row.id, row.created
+
+
+@dataclass(frozen=True)
+class TransferResult:
+    items: int
+    quantity: int
+    cost: Decimal
+
+
+async def transfer_items(db: AsyncSession, cart_id: int, shared_cart_id: int, contributor_id: int) -> TransferResult:
+    """
+    Copy a cart's items into the shared cart under the given contributor.
+
+    Runs as one INSERT ... SELECT wrapped in a CTE, so no rows are loaded into Python;
+    only the number of lines, units and their cost come back. Raises 400 for an empty cart.
+    """
+    moved = (
+        insert(SharedCartItem)
+        .from_select(
+            ["shared_cart_id", "contributor_id", "item_id", "quantity", "price"],
+            select(
+                literal(shared_cart_id, Integer),
+                literal(contributor_id, Integer),
+                CartItems.item_id,
+                CartItems.quantity,
+                CartItems.price,
+            ).where(CartItems.cart_id == cart_id),
+        )
+        .returning(SharedCartItem.quantity, SharedCartItem.price)
+        .cte("moved")
+    )
+    result = await db.execute(
+        select(
+            func.count(),
+            func.coalesce(func.sum(moved.c.quantity), 0),
+            func.coalesce(func.sum(moved.c.quantity * moved.c.price), 0),
+        ).select_from(moved)
+    )
+    items, quantity, cost = result.one()
+    if not items:
+        raise HTTPException(status_code=400, detail="No items found in the cart.")
+    return TransferResult(items, quantity, cost)
+
+
+async def refresh_contribution(db: AsyncSession, contributor_id: int):
+    """
+    Recompute one contributor's row in shared_cart_contributions from their shared cart items.
+    A single INSERT ... SELECT ... ON CONFLICT, touching only that contributor's lines.
+    """
+    line_cost = SharedCartItem.quantity * SharedCartItem.price
+    line = func.jsonb_build_object(
+        "item_id", SharedCartItem.item_id,
+        "name", Item.name,
+        # Amounts, not cents, as the items are served as they are
+        "price", money_units(SharedCartItem.price),
+        "quantity", SharedCartItem.quantity,
+        "total_cost", money_units(line_cost),
+    )
+    summary = (
+        select(
+            SharedCartContributor.shared_cart_id,
+            SharedCartContributor.user_id,
+            SharedCartContributor.id,
+            User.name,
+            func.count(SharedCartItem.id),
+            func.coalesce(func.sum(SharedCartItem.quantity), 0),
+            func.coalesce(func.sum(line_cost), 0),
+            func.coalesce(SharedCartContributor.delivery_fee_contribution, 0),
+            func.coalesce(
+                func.jsonb_agg(aggregate_order_by(line, SharedCartItem.id)).filter(SharedCartItem.id.isnot(None)),
+                text("'[]'::jsonb"),
+            ),
+            func.timezone("UTC", func.now()),
+        )
+        .join(User, User.id == SharedCartContributor.user_id)
+        .outerjoin(SharedCartItem, SharedCartItem.contributor_id == SharedCartContributor.id)
+        .outerjoin(Item, Item.id == SharedCartItem.item_id)
+        .where(SharedCartContributor.id == contributor_id)
+        .group_by(SharedCartContributor.id, User.name)
+    )
+    stmt = insert(SharedCartContribution).from_select(
+        [
+            "shared_cart_id",
+            "user_id",
+            "contributor_id",
+            "user_name",
+            "item_count",
+            "item_quantity",
+            "item_total",
+            "delivery_fee_contribution",
+            "items",
+            "updated_at",
+        ],
+        summary,
+    )
+    await db.execute(
+        stmt.on_conflict_do_update(
+            constraint="pk_shared_cart_contributions",
+            set_={
+                column: stmt.excluded[column]
+                for column in (
+                    "contributor_id",
+                    "user_name",
+                    "item_count",
+                    "item_quantity",
+                    "item_total",
+                    "delivery_fee_contribution",
+                    "items",
+                    "updated_at",
+                )
+            },
+        )
+    )
+
+
+async def debit_wallet(db: AsyncSession, user_id: int, amount: Decimal):
+    """
+    Debit the user's wallet after checking the balance.
+    The wallet row is locked first so concurrent debits for the same user are serialized.
+    """
+    result = await db.execute(
+        select(Wallet.id, wallet_balance(Wallet.id).label("balance")).where(Wallet.user_id == user_id).with_for_update(of=Wallet)
+    )
+    wallet = result.first()
+    if wallet is None:
+        raise HTTPException(status_code=404, detail=f"User or wallet not found for user ID {user_id}.")
+    if wallet.balance < amount:
+        raise HTTPException(status_code=400, detail=f"Insufficient balance for user ID {user_id}.")
+
+    await db.execute(
+        insert(WalletTransaction).values(
+            wallet_id=wallet.id,
+            user_id=user_id,
+            amount=-amount,
+            transaction_type=TransactionType.DEBIT,
+            created_at=datetime.utcnow(),
+        )
+    )
+
+
+async def upsert_shared_order(
+    db: AsyncSession,
+    shared_cart_id: int,
+    user_id: int,
+    supermarket_id: int,
+    address_id: int,
+    order_slot_id: int,
+    delivery_fee: Decimal,
+):
+    """
+    Create or refresh the scheduled order of a shared cart from its current items.
+    Returns (order_id, created). Raises 409 when the order is no longer scheduled.
+    """
+    item_total = (
+        select(func.coalesce(func.sum(SharedCartItem.quantity * SharedCartItem.price), 0))
+        .where(SharedCartItem.shared_cart_id == shared_cart_id)
+        .scalar_subquery()
+    )
+    stmt = insert(Order).values(
+        user_id=user_id,
+        shared_cart_id=shared_cart_id,
+        supermarket_id=supermarket_id,
+        address_id=address_id,
+        delivery_fee=delivery_fee,
+        total_amount=item_total + delivery_fee,
+        order_slot_id=order_slot_id,
+        status=OrderStatus.SCHEDULED,
+    )
+    stmt = stmt.on_conflict_do_update(
+        constraint="uq_shared_cart_order",
+        set_={
+            "total_amount": stmt.excluded.total_amount,
+            "delivery_fee": stmt.excluded.delivery_fee,
+        },
+        # A placed order is never reopened
+        where=Order.status == OrderStatus.SCHEDULED,
+    ).returning(Order.id, literal_column("xmax = 0").label("created"))
+    order = (await db.execute(stmt)).one_or_none()
+    if order is None:
+        raise HTTPException(status_code=409, detail="The shared cart's order was already placed.")
+
+    # Rebuild the order lines from the aggregated shared cart items
+    await db.execute(delete(OrderItem).where(OrderItem.order_id == order.id))
+    quantity = func.sum(SharedCartItem.quantity)
+    await db.execute(
+        insert(OrderItem).from_select(
+            ["order_id", "item_id", "quantity", "price"],
+            select(
+                literal(order.id, Integer),
+                SharedCartItem.item_id,
+                quantity,
+                # Average unit price, rounded to the cent
+                func.round(cast(func.sum(SharedCartItem.quantity * SharedCartItem.price), Numeric) / quantity),
+            )
+            .where(SharedCartItem.shared_cart_id == shared_cart_id)
+            .group_by(SharedCartItem.item_id),
+        )
+    )
+    return order.id, order.created
+
+
+async def join_shared_cart(
+    db: AsyncSession,
+    cart_id: int,
+    user_id: int,
+    supermarket_id: int,
+    address_id: int,
+    order_slot: SlotEntry,
+    window: SlotOccurrence,
+) -> JoinResult:
+    """
+    Move a cart into the open shared cart for (supermarket, address, slot) in a single transaction.
+
+    Claims the cart, resolves and locks the shared cart, upserts the contributor, transfers the items,
+    refreshes the contributor's summary row, debits the wallet, upserts the order and reserves slot capacity, then commits once.
+    The statement count does not depend on the number of items or contributors.
+    Any failure rolls the whole join back.
+    """
+    try:
+        # Checked before anything is charged; raising rolls the claim back
+        owner_id, cart_supermarket_id = await claim_cart(db, cart_id)
+        if owner_id != user_id:
+            raise HTTPException(status_code=403, detail="Cart belongs to another user.")
+        if cart_supermarket_id != supermarket_id:
+            raise HTTPException(status_code=400, detail="Cart belongs to another supermarket.")
+
+        result = await db.execute(select(Supermarket.delivery_fee).where(Supermarket.id == supermarket_id))
+        delivery_fee = result.scalar()
+        if delivery_fee is None:
+            raise HTTPException(status_code=400, detail="Supermarket delivery fee not set.")
+
+        # The cart found may be placed before it is locked; a placed cart no longer
+        # matches, so looking again finds or opens the next one
+        for _ in range(JOIN_ATTEMPTS):
+            shared_cart_id, _ = await resolve_open_shared_cart_id(db, supermarket_id, address_id, order_slot.id)
+            if await lock_open_shared_cart(db, shared_cart_id):
+                break
+        else:
+            raise HTTPException(status_code=409, detail="The shared cart was just placed; please try again.")
+
+        contributor_id, contributor_created = await upsert_contributor(db, shared_cart_id, user_id, delivery_fee)
+        transferred = await transfer_items(db, cart_id, shared_cart_id, contributor_id)
+        await refresh_contribution(db, contributor_id)
+
+        # The full delivery fee is held once per contributor and settled when the order is placed
+        amount = transferred.cost + (delivery_fee if contributor_created else 0)
+        await debit_wallet(db, user_id, amount)
+
+        order_id, order_created = await upsert_shared_order(
+            db, shared_cart_id, user_id, supermarket_id, address_id, order_slot.id, delivery_fee
+        )
+        # A shared cart is one delivery: only the join that creates its order takes slot capacity
+        if order_created:
+            await book_slot(db, order_slot, window)
+        address_linked = await remember_user_address(db, user_id, address_id)
+
+        await db.commit()
+    except Exception:
+        await db.rollback()
+        raise
+    if address_linked:
+        await forget_user_addresses(user_id)
+
+    return JoinResult(
+        shared_cart_id,
+        contributor_id,
+        order_id,
+        transferred.items,
+        transferred.cost,
+        amount,
+        contributor_created,
+        order_created,
+    )
@@ -0,0 +1,178 @@
+import os
+import asyncio
+import hashlib
+from dataclasses import dataclass
+from datetime import date, datetime, time, timedelta, timezone
+from typing import Dict, List, Optional, Tuple
+from zoneinfo import ZoneInfo
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from loguru import logger
+from server.models import OrderSlot
+
+# Label of the slot used for immediate orders
+NOW_SLOT = "now"
+
+# Seconds between background reloads of the slot registry; 0 disables them
+SLOT_REGISTRY_REFRESH_INTERVAL = float(os.getenv("SLOT_REGISTRY_REFRESH_INTERVAL", "60"))
+
+
+def parse_slot_label(label: str) -> Optional[time]:
+    """
+    Parse a slot label such as "6:00AM" into a time of day. The "now" slot has no time.
+    """
+    if label == NOW_SLOT:
+        return None
+    return datetime.strptime(label, "%I:%M%p").time()
+
+
+def utc_now() -> datetime:
+    return datetime.now(timezone.utc)
+
+
+@dataclass(frozen=True)
+class SlotOccurrence:
+    """
+    One concrete delivery of a slot. Orders for it are accepted until cutoff_at.
+    Both instants are timezone-aware UTC datetimes.
+    """
+    slot_id: int
+    label: str
+    delivery_at: datetime
+    cutoff_at: datetime
+    slot_date: date
+
+
+@dataclass(frozen=True)
+class SlotEntry:
+    id: int
+    supermarket_id: int
+    label: str
+    time_of_day: Optional[time]
+    timezone: str = "UTC"
+    cutoff: timedelta = timedelta(0)
+    capacity: Optional[int] = None
+
+    def next_window(self, now: Optional[datetime] = None) -> SlotOccurrence:
+        """
+        Return the next occurrence of this slot that still accepts orders.
+
+        The time of day is interpreted in the slot's own timezone. Once today's cutoff
+        has passed, the slot rolls over to the same local time tomorrow.
+        """
+        now = now or utc_now()
+        zone = ZoneInfo(self.timezone)
+        local_date = now.astimezone(zone).date()
+        if self.time_of_day is None:
+            return SlotOccurrence(self.id, self.label, now, now, local_date)
+
+        while True:
+            delivery_at = datetime.combine(local_date, self.time_of_day, tzinfo=zone).astimezone(timezone.utc)
+            cutoff_at = delivery_at - self.cutoff
+            if cutoff_at > now:
+                return SlotOccurrence(self.id, self.label, delivery_at, cutoff_at, local_date)
+            local_date += timedelta(days=1)
+
+    def next_occurrence(self, now: Optional[datetime] = None) -> datetime:
+        """
+        Return the next delivery instant (UTC) that still accepts orders.
+        """
+        return self.next_window(now).delivery_at
+
+
+class SlotRegistry:
+    """
+    In-memory copy of every order slot, keyed by (supermarket_id, label), with pre-parsed times.
+    """
+
+    def __init__(self):
+        self._by_key: Dict[Tuple[int, str], SlotEntry] = {}
+        self._by_supermarket: Dict[int, List[SlotEntry]] = {}
+        self._digests: Dict[int, str] = {}
+        self.loaded_at: Optional[datetime] = None
+
+    @property
+    def ready(self) -> bool:
+        return self.loaded_at is not None
+
+    async def load(self, db: AsyncSession) -> int:
+        """
+        (Re)load all slots from the database. Returns the number of slots.
+        """
+        result = await db.execute(
+            select(
+                OrderSlot.id,
+                OrderSlot.supermarket_id,
+                OrderSlot.delivery_time,
+                OrderSlot.slot_time,
+                OrderSlot.timezone,
+                OrderSlot.cutoff_minutes,
+                OrderSlot.capacity,
+            ).order_by(OrderSlot.id)
+        )
+        by_key: Dict[Tuple[int, str], SlotEntry] = {}
+        by_supermarket: Dict[int, List[SlotEntry]] = {}
+        for row in result.all():
+            try:
+                time_of_day = row.slot_time or parse_slot_label(row.delivery_time)
+                ZoneInfo(row.timezone)
+            except (ValueError, KeyError) as e:
+                logger.warning(f"Skipping order slot {row.id} with invalid time or timezone: {e}")
+                continue
+            entry = SlotEntry(
+                row.id,
+                row.supermarket_id,
+                row.delivery_time,
+                time_of_day,
+                row.timezone,
+                timedelta(minutes=row.cutoff_minutes or 0),
+                row.capacity,
+            )
+            by_key[(entry.supermarket_id, entry.label)] = entry
+            by_supermarket.setdefault(entry.supermarket_id, []).append(entry)
+
+        self._by_key = by_key
+        self._by_supermarket = by_supermarket
+        self._digests = {
+            supermarket_id: hashlib.sha1(
+                ",".join(f"{s.id}:{s.label}:{s.timezone}:{s.cutoff}:{s.capacity}" for s in slots).encode()
+            ).hexdigest()
+            for supermarket_id, slots in by_supermarket.items()
+        }
+        self.loaded_at = datetime.utcnow()
+        return len(by_key)
+
+    async def ensure_loaded(self, db: AsyncSession):
+        if not self.ready:
+            await self.load(db)
+
+    def get(self, supermarket_id: int, label: str) -> Optional[SlotEntry]:
+        return self._by_key.get((supermarket_id, label))
+
+    def get_by_id(self, supermarket_id: int, slot_id: int) -> Optional[SlotEntry]:
+        return next((slot for slot in self.for_supermarket(supermarket_id) if slot.id == slot_id), None)
+
+    def for_supermarket(self, supermarket_id: int) -> List[SlotEntry]:
+        return self._by_supermarket.get(supermarket_id, [])
+
+    def digest(self, supermarket_id: int) -> str:
+        """
+        Content digest of a supermarket's slots, usable as a cache validator.
+        """
+        return self._digests.get(supermarket_id, "empty")
+
+    async def run(self, session_factory, interval: float = SLOT_REGISTRY_REFRESH_INTERVAL):
+        """
+        Reload the registry forever, every `interval` seconds.
+        """
+        while True:
+            await asyncio.sleep(interval)
+            try:
+                async with session_factory() as session:
+                    await self.load(session)
+            except Exception as e:
+                logger.error(f"Failed to reload slot registry: {e}")
+
+
+# Shared registry used by slot listing and checkout
+slot_registry = SlotRegistry()
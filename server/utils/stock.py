@@ -0,0 +1,88 @@
+import os
+import asyncio
+import hashlib
+from collections import defaultdict
+from datetime import datetime
+from typing import Dict, Optional, Tuple
+from sqlalchemy import select
+from sqlalchemy.ext.asyncio import AsyncSession
+from loguru import logger
+from server.models import StockLevel
+
+# Seconds between snapshot refreshes; 0 disables the background refresher
+STOCK_SNAPSHOT_INTERVAL = float(os.getenv("STOCK_SNAPSHOT_INTERVAL", "5"))
+
+
+class StockSnapshot:
+    """
+    Periodically refreshed, read-only copy of every stock level.
+
+    Reads from the snapshot may be a few seconds stale. Writes that reserve stock
+    must keep locking the StockLevel row; the snapshot only answers "is it likely
+    available" on read paths.
+    """
+
+    def __init__(self):
+        self._quantities: Dict[Tuple[int, int], int] = {}
+        self._digests: Dict[int, str] = {}
+        self.refreshed_at: Optional[datetime] = None
+        self.running = False
+
+    @property
+    def ready(self) -> bool:
+        return self.refreshed_at is not None
+
+    async def refresh(self, db: AsyncSession) -> int:
+        """
+        Reload all stock levels. Returns the number of stock records.
+        """
+        result = await db.execute(
+            select(StockLevel.item_id, StockLevel.supermarket_id, StockLevel.quantity)
+        )
+        quantities = {(row.item_id, row.supermarket_id): row.quantity for row in result.all()}
+
+        # Content digest of each supermarket's stock, identical on every worker holding the same data
+        per_supermarket = defaultdict(list)
+        for (item_id, supermarket_id), quantity in sorted(quantities.items()):
+            per_supermarket[supermarket_id].append(f"{item_id}:{quantity}")
+        digests = {
+            supermarket_id: hashlib.sha1(",".join(entries).encode()).hexdigest()
+            for supermarket_id, entries in per_supermarket.items()
+        }
+
+        self._quantities = quantities
+        self._digests = digests
+        self.refreshed_at = datetime.utcnow()
+        return len(quantities)
+
+    def quantity(self, item_id: int, supermarket_id: int) -> Optional[int]:
+        """
+        Return the snapshot quantity, or None when the snapshot has no record.
+        """
+        return self._quantities.get((item_id, supermarket_id))
+
+    def digest(self, supermarket_id: int) -> Optional[str]:
+        """
+        Return a digest of the supermarket's stock levels, usable as a cache validator.
+        Returns None unless the snapshot is kept fresh by the background refresher.
+        """
+        if not self.running:
+            return None
+        return self._digests.get(supermarket_id, "empty")
+
+    async def run(self, session_factory, interval: float = STOCK_SNAPSHOT_INTERVAL):
+        """
+        Refresh the snapshot forever, every `interval` seconds.
+        """
+        self.running = True
+        while True:
+            try:
+                async with session_factory() as session:
+                    await self.refresh(session)
+            except Exception as e:
+                logger.error(f"Failed to refresh stock snapshot: {e}")
+            await asyncio.sleep(interval)
+
+
+# Shared snapshot used by read-only availability checks
+stock_snapshot = StockSnapshot()
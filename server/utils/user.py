@@ -1,7 +1,24 @@
-from sqlalchemy import select, delete
-from server.models import Cart, Order, Wallet
+import os
+from typing import List, Tuple
+from sqlalchemy import select, delete, case
+from sqlalchemy.dialects.postgresql import insert
+from server.models import Cart, Order, Wallet, Address, User, UserAddress
 from sqlalchemy.orm import joinedload
-from server.dependencies import AsyncSession
+from sqlalchemy.ext.asyncio import AsyncSession
+from loguru import logger
+from server.utils.cache import TTLCache
+from server.utils.events import event_broker
+
+# Seconds a user's address book may be served from memory
+USER_ADDRESS_CACHE_TTL = float(os.getenv("USER_ADDRESS_CACHE_TTL", "300"))
+
+# user_id -> [(address_id, building_name)], default address first
+_address_cache = TTLCache(ttl=USER_ADDRESS_CACHE_TTL)
+
+# Event channel on which workers tell each other to drop a user's cached addresses
+ADDRESS_INVALIDATION_CHANNEL = "user_addresses"
+
+event_broker.add_listener(ADDRESS_INVALIDATION_CHANNEL, lambda message: _address_cache.invalidate(message["user_id"]))
 
 
 async def get_cart_by_id(db: AsyncSession, cart_id: int):
@@ -27,3 +44,55 @@ async def get_orders_by_user_id(db: AsyncSession, user_id: int):
 async def get_user_wallet(db: AsyncSession, user_id: int):
     result = await db.execute(select(Wallet).where(Wallet.user_id == user_id))
     return result.scalars().first()
+
+
+async def get_user_addresses(db: AsyncSession, user_id: int) -> List[Tuple[int, str]]:
+    """
+    Fetch (address_id, building_name) pairs linked to the user, default address first.
+    """
+    cached = _address_cache.get(user_id)
+    if cached is not None:
+        return cached
+
+    result = await db.execute(
+        select(Address.id, Address.building_name)
+        .join(UserAddress, UserAddress.address_id == Address.id)
+        .join(User, User.id == UserAddress.user_id)
+        .where(UserAddress.user_id == user_id)
+        .order_by(
+            case((Address.id == User.default_address_id, 0), else_=1),
+            UserAddress.created_at,
+            Address.id,
+        )
+    )
+    addresses = [(row.id, row.building_name) for row in result.all()]
+    _address_cache.set(user_id, addresses)
+    return addresses
+
+
+async def remember_user_address(db: AsyncSession, user_id: int, address_id: int) -> bool:
+    """
+    Link an address to the user if it is not linked yet, and return whether it was.
+    Runs inside the caller's transaction; the caller commits, then calls
+    forget_user_addresses when a link was added.
+    """
+    result = await db.execute(
+        insert(UserAddress)
+        .values(user_id=user_id, address_id=address_id)
+        .on_conflict_do_nothing()
+        .returning(UserAddress.address_id)
+    )
+    return result.scalar_one_or_none() is not None
+
+
+async def forget_user_addresses(user_id: int):
+    """
+    Drop the user's cached address list on every worker. Call it after committing, so
+    a concurrent read cannot cache the list as it was before the commit.
+    """
+    _address_cache.invalidate(user_id)
+    try:
+        await event_broker.publish(ADDRESS_INVALIDATION_CHANNEL, {"user_id": user_id})
+    except Exception as e:
+        # The other workers catch up when their entry expires
+        logger.error(f"Failed to publish address invalidation for user {user_id}: {e}")
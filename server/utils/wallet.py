@@ -0,0 +1,185 @@
+import os
+import asyncio
+from datetime import datetime, timedelta
+from decimal import Decimal
+from typing import Optional
+from sqlalchemy import select, func, literal, union_all
+from sqlalchemy.dialects.postgresql import insert
+from sqlalchemy.ext.asyncio import AsyncSession
+from loguru import logger
+from server.models import Wallet, WalletTransaction, WalletBalanceSnapshot, WalletTransactionArchive
+from server.models.money import ZERO
+from server.utils.partitions import archive_partitions
+
+# Seconds between balance compactions; 0 disables the background compactor
+WALLET_COMPACTION_INTERVAL = float(os.getenv("WALLET_COMPACTION_INTERVAL", "300"))
+
+# Transactions younger than this are left out of snapshots, so a transaction committing late, or stamped by a
+# worker whose clock lags by less than this, is never skipped
+WALLET_SNAPSHOT_SETTLE_SECONDS = float(os.getenv("WALLET_SNAPSHOT_SETTLE_SECONDS", "60"))
+
+# Days after which monthly partitions covered by snapshots move to the archive table; 0 keeps them in place
+WALLET_ARCHIVE_AFTER_DAYS = float(os.getenv("WALLET_ARCHIVE_AFTER_DAYS", "0"))
+
+# Advisory lock taken by the worker compacting balances, so only one worker compacts at a time
+WALLET_COMPACTION_LOCK = 815_002
+
+
+def wallet_balance(wallet_id):
+    """
+    Balance of a wallet as a SQL expression: its snapshot plus every transaction after it.
+    `wallet_id` may be a value or a column, e.g. Wallet.id to correlate with an enclosing query.
+    Only the partitions from the snapshot's `transactions_since` on are read.
+    """
+    def snapshot(column):
+        return (
+            select(column)
+            .where(WalletBalanceSnapshot.wallet_id == wallet_id)
+            .correlate_except(WalletBalanceSnapshot)
+            .scalar_subquery()
+        )
+
+    recent = (
+        select(func.sum(WalletTransaction.amount))
+        .where(
+            WalletTransaction.wallet_id == wallet_id,
+            WalletTransaction.id > func.coalesce(snapshot(WalletBalanceSnapshot.last_transaction_id), 0),
+            WalletTransaction.created_at >= func.coalesce(snapshot(WalletBalanceSnapshot.transactions_since), datetime.min),
+        )
+        .correlate_except(WalletTransaction)
+        .scalar_subquery()
+    )
+    return func.coalesce(snapshot(WalletBalanceSnapshot.balance), 0) + func.coalesce(recent, 0)
+
+
+async def get_wallet_balance(db: AsyncSession, wallet_id: int) -> Decimal:
+    return (await db.execute(select(wallet_balance(wallet_id)))).scalar() or ZERO
+
+
+async def get_user_balance(db: AsyncSession, user_id: int) -> Decimal:
+    """
+    Balance of the user's wallet, zero when the user has none.
+    """
+    result = await db.execute(select(wallet_balance(Wallet.id)).where(Wallet.user_id == user_id))
+    return result.scalar() or ZERO
+
+
+def transaction_history(wallet_id: int, since: Optional[datetime] = None, until: Optional[datetime] = None):
+    """
+    Transactions of a wallet, archived ones included, newest first. A `since` / `until`
+    range limits the scan to the monthly partitions it overlaps.
+    """
+    columns = ("id", "wallet_id", "user_id", "amount", "transaction_type", "created_at")
+    parts = []
+    for model in (WalletTransaction, WalletTransactionArchive):
+        part = select(*(getattr(model, name) for name in columns)).where(model.wallet_id == wallet_id)
+        if since is not None:
+            part = part.where(model.created_at >= since)
+        if until is not None:
+            part = part.where(model.created_at < until)
+        parts.append(part)
+    history = union_all(*parts).subquery()
+    return select(history).order_by(history.c.created_at.desc(), history.c.id.desc())
+
+
+async def compact_wallet_balances(
+    db: AsyncSession,
+    settle_seconds: float = WALLET_SNAPSHOT_SETTLE_SECONDS,
+    archive_after_days: float = WALLET_ARCHIVE_AFTER_DAYS,
+) -> Optional[int]:
+    """
+    Roll every wallet's snapshot forward over its settled transactions, then move the
+    months older than `archive_after_days` whose transactions are all snapshotted to
+    the archive table.
+    Returns the number of snapshots written, or None when another worker is compacting.
+    Runs inside the caller's transaction; the caller commits.
+    """
+    if not (await db.execute(select(func.pg_try_advisory_xact_lock(WALLET_COMPACTION_LOCK)))).scalar():
+        return None
+    now = datetime.utcnow()
+    horizon = now - timedelta(seconds=settle_seconds)
+
+    # Snapshots stop before the oldest unsettled transaction, so ids are only ever covered in order
+    unsettled = (
+        await db.execute(select(func.min(WalletTransaction.id)).where(WalletTransaction.created_at >= horizon))
+    ).scalar()
+    # Every transaction left out by the previous compaction is at least this recent
+    since = (await db.execute(select(func.max(WalletBalanceSnapshot.transactions_since)))).scalar()
+
+    pending = (
+        select(
+            WalletTransaction.wallet_id,
+            func.max(WalletTransaction.id).label("last_transaction_id"),
+            (func.coalesce(WalletBalanceSnapshot.balance, 0) + func.sum(WalletTransaction.amount)).label("balance"),
+            # Transactions still settling may be older than the horizon by up to the settle window
+            literal(horizon - timedelta(seconds=settle_seconds)).label("transactions_since"),
+            literal(now).label("updated_at"),
+        )
+        .select_from(WalletTransaction)
+        .outerjoin(WalletBalanceSnapshot, WalletBalanceSnapshot.wallet_id == WalletTransaction.wallet_id)
+        .where(WalletTransaction.id > func.coalesce(WalletBalanceSnapshot.last_transaction_id, 0))
+        .group_by(WalletTransaction.wallet_id, WalletBalanceSnapshot.balance)
+    )
+    if unsettled is not None:
+        pending = pending.where(WalletTransaction.id < unsettled)
+    if since is not None:
+        pending = pending.where(WalletTransaction.created_at >= since)
+
+    stmt = insert(WalletBalanceSnapshot).from_select(
+        ["wallet_id", "last_transaction_id", "balance", "transactions_since", "updated_at"], pending
+    )
+    result = await db.execute(
+        stmt.on_conflict_do_update(
+            index_elements=[WalletBalanceSnapshot.wallet_id],
+            set_={
+                "last_transaction_id": stmt.excluded.last_transaction_id,
+                "balance": stmt.excluded.balance,
+                "transactions_since": stmt.excluded.transactions_since,
+                "updated_at": stmt.excluded.updated_at,
+            },
+            # A snapshot only ever moves forward
+            where=stmt.excluded.last_transaction_id > WalletBalanceSnapshot.last_transaction_id,
+        )
+    )
+    written = result.rowcount
+
+    if archive_after_days > 0:
+        archived = await archive_partitions(db, now - timedelta(days=archive_after_days))
+        if archived:
+            logger.info(f"Archived wallet transaction partitions {archived}.")
+    return written
+
+
+class WalletCompactor:
+    """
+    Background loop keeping wallet balance snapshots close to the head of the ledger,
+    so a balance read only sums the transactions made since the last compaction.
+    """
+
+    def __init__(self):
+        self.compacted_at: Optional[datetime] = None
+
+    async def compact(self, session_factory) -> Optional[int]:
+        async with session_factory() as session:
+            written = await compact_wallet_balances(session)
+            await session.commit()
+        if written is not None:
+            self.compacted_at = datetime.utcnow()
+        return written
+
+    async def run(self, session_factory, interval: float = WALLET_COMPACTION_INTERVAL):
+        """
+        Compact forever, every `interval` seconds.
+        """
+        while True:
+            try:
+                written = await self.compact(session_factory)
+                if written:
+                    logger.info(f"Rolled {written} wallet balance snapshots forward.")
+            except Exception as e:
+                logger.error(f"Failed to compact wallet balances: {e}")
+            await asyncio.sleep(interval)
+
+
+# Shared compactor started with the app
+wallet_compactor = WalletCompactor()